@@ -0,0 +1,393 @@
+# asyncio Rigol oscilloscope interface
+
+import asyncio
+import functools
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from scpi_block import encode_block, parse_block_header
+from rigol_scope import CommandBatch, RigolScope
+from commands.acquire_commands import AcquireCommands
+from commands.calibrate_commands import CalibrateCommands
+from commands.channel_commands import ChannelCommands
+from commands.cursor_commands import CursorCommands
+from commands.decoder_commands import DecoderCommands
+from commands.display_commands import DisplayCommands
+from commands.etable_commands import ETableCommands
+from commands.function_commands import FunctionCommands
+from commands.ieee_commands import IEEECommands
+from commands.la_commands import LACommands
+from commands.mask_commands import MaskCommands
+from commands.math_commands import MathCommands
+from commands.measure_commands import MeasureCommands
+from commands.reference_commands import ReferenceCommands
+from commands.source_commands import SourceCommands
+from commands.storage_commands import StorageCommands
+from commands.system_commands import SystemCommands
+from commands.timebase_commands import TimebaseCommands
+from commands.trace_commands import TraceCommands
+from commands.trigger_commands import TriggerCommands
+from commands.waveform_commands import FORMAT_DTYPES, MAX_CHUNK_POINTS, WaveformCommands
+
+MAX_WORKER_THREADS = 32  # Threads shared by all AsyncRigolScope instances for command group methods
+
+_pool = None
+_pool_users = 0
+_pool_lock = threading.Lock()
+
+def _acquire_pool():
+    """Get the shared worker pool, creating it for the first scope"""
+    global _pool, _pool_users
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_WORKER_THREADS, thread_name_prefix='AsyncRigolScope')
+        _pool_users += 1
+        return _pool
+
+def _release_pool():
+    """Drop a scope's use of the shared pool, shutting it down after the last one"""
+    global _pool, _pool_users
+    with _pool_lock:
+        _pool_users -= 1
+        if _pool_users == 0 and _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+
+class _ThreadDevice:
+    """Device for command groups running on the shared worker pool
+
+    Each send/query is run as a coroutine of the scope on its event loop;
+    only the worker thread waits for the reply (bounded by the scope timeout),
+    so the group method runs exactly once and the loop keeps serving other
+    coroutines meanwhile. Once the awaiting task is cancelled, further I/O
+    of the method raises CancelledError instead of reaching the scope.
+    """
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.loop = None  # Event loop of the running AsyncRigolScope._call
+        self.cancelled = False
+
+    @property
+    def settings_generation(self):
+        return self.scope.settings_generation
+
+    @property
+    def connected(self):
+        return self.scope.connected
+
+    def __getattr__(self, name):
+        # Command groups reach sibling groups through the device (e.g. device.decoder)
+        attribute = getattr(self.scope, name)
+        return attribute._group if isinstance(attribute, AsyncCommandGroup) else attribute
+
+    def send_command(self, command: str):
+        return self._await(self.scope.send_command(command))
+
+    def send_binary(self, command: str, payload):
+        return self._await(self.scope.send_binary(command, payload))
+
+    def query(self, command: str) -> str:
+        return self._await(self.scope.query(command))
+
+    def query_binary(self, command: str, out=None):
+        return self._await(self.scope.query_binary(command, out))
+
+    def query_many(self, commands) -> list:
+        return self._await(self.scope.query_many(commands))
+
+    def run(self):
+        return self._await(self.scope.run())
+
+    def stop(self):
+        return self._await(self.scope.stop())
+
+    def single(self):
+        return self._await(self.scope.single())
+
+    def force_trigger(self):
+        return self._await(self.scope.force_trigger())
+
+    def _await(self, coroutine):
+        if self.cancelled:
+            coroutine.close()
+            raise asyncio.CancelledError()
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        try:
+            # _transact bounds reconnecting and the exchange by the scope timeout each
+            return future.result(2 * self.scope.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+
+class AsyncCommandGroup:
+    """Awaitable view of a synchronous command group"""
+
+    def __init__(self, scope, group):
+        self._scope = scope
+        self._group = group
+
+    def __getattr__(self, name):
+        attribute = getattr(self._group, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+
+        async def call(*args, **kwargs):
+            return await self._scope._call(self._group, name, *args, **kwargs)
+        call.__name__ = name
+        call.__doc__ = attribute.__doc__
+        return call
+
+
+class AsyncWaveformCommands(AsyncCommandGroup):
+    """Awaitable waveform commands with natively asynchronous chunked reads"""
+
+    async def read_raw(self, source: str, format: str = 'BYTE', out=None):
+        """Read the full acquisition memory of a source (see WaveformCommands.read_raw)"""
+        points = await self._scope._call(self._group, 'prepare_raw', source, format)
+        if out is None:
+            out = np.empty(points, dtype=FORMAT_DTYPES.get(format.upper(), np.float64))
+        elif len(out) < points:
+            raise ValueError(f'Output array too small for {points} points')
+        direct = out.dtype == FORMAT_DTYPES.get(format.upper(), object) and out.flags.c_contiguous
+        async for start, chunk in self.iter_chunks(points, format, out=out if direct else None):
+            if not direct:
+                out[start:start + len(chunk)] = chunk
+        return out[:points]
+
+    async def iter_raw(self, source: str, format: str = 'BYTE', chunk_size: int = None):
+        """Asynchronously yield (start index, chunk) over the full acquisition memory"""
+        points = await self._scope._call(self._group, 'prepare_raw', source, format)
+        async for start, chunk in self.iter_chunks(points, format, chunk_size):
+            yield start, chunk
+
+    async def iter_chunks(self, points: int, format: str, chunk_size: int = None, out=None):
+        """Asynchronously yield (start index, chunk) after prepare_raw (see WaveformCommands.iter_chunks)"""
+        max_chunk = MAX_CHUNK_POINTS[format.upper()]
+        chunk_size = min(chunk_size or max_chunk, max_chunk)
+        for start in range(0, points, chunk_size):
+            stop = min(start + chunk_size, points)
+            await self._scope.send_command(f':WAVeform:STARt {start + 1}')
+            await self._scope.send_command(f':WAVeform:STOP {stop}')
+            target = out[start:stop] if out is not None else None
+            data = await self._scope.query_binary(':WAVeform:DATA?', target)
+            chunk = self._group._to_array(data, format)
+            if len(chunk) != stop - start:
+                raise ConnectionError(f'Incomplete waveform data at point {start + 1}: '
+                                      f'expected {stop - start}, got {len(chunk)}')
+            yield start, chunk
+
+
+class AsyncRigolScope:
+    """asyncio client exposing the RigolScope command groups as awaitables
+
+    Operations on one scope are serialized over its single connection; many
+    scopes (or other coroutines) overlap freely in one event loop. Command
+    group methods run one at a time per scope on a pool of at most
+    MAX_WORKER_THREADS threads shared by all scopes, with their I/O
+    performed as coroutines on the event loop. The pool is shut down when
+    the last scope using it disconnects.
+    """
+
+    DEFAULT_IP = RigolScope.DEFAULT_IP
+    DEFAULT_PORT = RigolScope.DEFAULT_PORT
+    BATCH_MAX_LENGTH = RigolScope.BATCH_MAX_LENGTH
+
+    def __init__(self, ip_address: str = None, port: int = None, timeout: float = 5.0):
+        self.ip_address = ip_address or self.DEFAULT_IP
+        self.port = port or self.DEFAULT_PORT
+        self.timeout = timeout
+        self.connected = False
+        self.settings_generation = 0
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+        self._call_lock = asyncio.Lock()  # One command group method at a time
+        self._device = _ThreadDevice(self)
+        self._pool = None
+
+        # Initialize all command groups
+        self.acquire = AsyncCommandGroup(self, AcquireCommands(self._device))
+        self.calibrate = AsyncCommandGroup(self, CalibrateCommands(self._device))
+        self.channel = AsyncCommandGroup(self, ChannelCommands(self._device))
+        self.cursor = AsyncCommandGroup(self, CursorCommands(self._device))
+        self.decoder = AsyncCommandGroup(self, DecoderCommands(self._device))
+        self.display = AsyncCommandGroup(self, DisplayCommands(self._device))
+        self.etable = AsyncCommandGroup(self, ETableCommands(self._device))
+        self.function = AsyncCommandGroup(self, FunctionCommands(self._device))
+        self.ieee = AsyncCommandGroup(self, IEEECommands(self._device))
+        self.la = AsyncCommandGroup(self, LACommands(self._device))
+        self.mask = AsyncCommandGroup(self, MaskCommands(self._device))
+        self.math = AsyncCommandGroup(self, MathCommands(self._device))
+        self.measure = AsyncCommandGroup(self, MeasureCommands(self._device))
+        self.reference = AsyncCommandGroup(self, ReferenceCommands(self._device))
+        self.source = AsyncCommandGroup(self, SourceCommands(self._device))
+        self.storage = AsyncCommandGroup(self, StorageCommands(self._device))
+        self.system = AsyncCommandGroup(self, SystemCommands(self._device))
+        self.timebase = AsyncCommandGroup(self, TimebaseCommands(self._device))
+        self.trace = AsyncCommandGroup(self, TraceCommands(self._device))
+        self.trigger = AsyncCommandGroup(self, TriggerCommands(self._device))
+        self.waveform = AsyncWaveformCommands(self, WaveformCommands(self._device))
+
+    async def connect(self):
+        """Connect to oscilloscope via a raw SCPI socket"""
+        try:
+            await asyncio.wait_for(self._open(), self.timeout)
+            self.connected = True
+            return True
+        except Exception as e:
+            print(f"Failed to connect via socket: {str(e) or type(e).__name__}")
+            return False
+
+    async def disconnect(self):
+        """Disconnect from oscilloscope"""
+        self._close_stream()
+        self.connected = False
+        if self._pool is not None:
+            self._pool = None
+            _release_pool()
+        return True
+
+    async def __aenter__(self):
+        if not await self.connect():
+            raise ConnectionError(f"Failed to connect to {self.ip_address}:{self.port}")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.disconnect()
+
+    async def send_command(self, command: str, timeout: float = None):
+        """Send command to oscilloscope"""
+        self._check_connected()
+        if not command.upper().startswith(RigolScope.READ_WINDOW_COMMANDS):
+            self.settings_generation += 1
+        try:
+            await self._transact(command, None, timeout)
+            return True
+        except Exception as e:
+            print(f"Failed to send command: {str(e) or type(e).__name__}")
+            return False
+
+    async def send_binary(self, command: str, payload, timeout: float = None):
+        """Send a command followed by payload as an IEEE 488.2 block (see RigolScope.send_binary)"""
+        self._check_connected()
+        self.settings_generation += 1
+        message = command.encode('ascii') + encode_block(memoryview(payload).cast('B'))
+        try:
+            await self._transact(message, None, timeout)
+            return True
+        except Exception as e:
+            print(f"Failed to send binary data: {str(e) or type(e).__name__}")
+            return False
+
+    async def query(self, command: str, timeout: float = None) -> str:
+        """Query oscilloscope and return response"""
+        self._check_connected()
+        try:
+            return await self._transact(command, self._read_line, timeout)
+        except Exception as e:
+            print(f"Failed to query: {str(e) or type(e).__name__}")
+            return ""
+
+    async def query_binary(self, command: str, out=None, timeout: float = None):
+        """Query oscilloscope and return the payload of an IEEE 488.2 block response"""
+        self._check_connected()
+        try:
+            data = await self._transact(command, self._read_block, timeout)
+        except Exception as e:
+            print(f"Failed to query binary: {str(e) or type(e).__name__}")
+            return b""
+        if out is not None:
+            target = memoryview(out).cast('B')[:len(data)]
+            target[:] = data
+            return target
+        return data
+
+    async def query_many(self, commands, timeout: float = None) -> list:
+        """Send queries as ';'-joined compound messages (see RigolScope.query_many)"""
+        batch = CommandBatch()
+        batch.commands = list(commands)
+        responses = []
+        for message in batch.messages(self.BATCH_MAX_LENGTH):
+            responses.extend(RigolScope._split_replies(message, await self.query(message, timeout)))
+        return responses
+
+    async def run(self):
+        """Start acquisition"""
+        return await self.send_command(':RUN')
+
+    async def stop(self):
+        """Stop acquisition"""
+        return await self.send_command(':STOP')
+
+    async def single(self):
+        """Arm a single trigger acquisition"""
+        return await self.send_command(':SINGle')
+
+    async def force_trigger(self):
+        """Force a trigger"""
+        return await self.send_command(':TFORce')
+
+    async def _call(self, group, name: str, *args, **kwargs):
+        """Run a synchronous command group method on the shared pool, performing its I/O asynchronously"""
+        loop = asyncio.get_running_loop()
+        async with self._call_lock:
+            if self._pool is None:
+                self._pool = _acquire_pool()
+            self._device.loop = loop
+            self._device.cancelled = False
+            future = loop.run_in_executor(self._pool, functools.partial(getattr(group, name), *args, **kwargs))
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Stop the method at its next I/O and hold the scope until it has returned
+                self._device.cancelled = True
+                await asyncio.wait([future])
+                raise
+
+    async def _open(self):
+        self._reader, self._writer = await asyncio.open_connection(self.ip_address, self.port, limit=1 << 20)
+        self._writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _close_stream(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    def _check_connected(self):
+        if not self.connected:
+            raise ConnectionError("Not connected to oscilloscope")
+
+    async def _transact(self, command, read, timeout: float = None):
+        """Write a command and optionally read its reply as one cancellable step"""
+        async with self._lock:
+            if self._writer is None:
+                await asyncio.wait_for(self._open(), timeout or self.timeout)
+            try:
+                return await asyncio.wait_for(self._exchange(command, read), timeout or self.timeout)
+            except BaseException:
+                # A partially read reply would desynchronize the stream, so reconnect on next use
+                self._close_stream()
+                raise
+
+    async def _exchange(self, command, read):
+        message = command if isinstance(command, bytes) else command.encode('ascii')
+        self._writer.write(message + b'\n')
+        await self._writer.drain()
+        return await read() if read else None
+
+    async def _read_line(self) -> str:
+        return (await self._reader.readuntil(b'\n')).decode('ascii').strip()
+
+    async def _read_block(self) -> bytes:
+        header = await self._reader.readexactly(2)
+        if header[0:1] != b'#':
+            raise ValueError(f'Invalid block header: {header!r}')
+        header += await self._reader.readexactly(int(header[1:2]))
+        _, length = parse_block_header(header)
+        data = await self._reader.readexactly(length)
+        await self._reader.readexactly(1)  # Trailing newline
+        return data
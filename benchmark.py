@@ -0,0 +1,231 @@
+"""Throughput and latency benchmarks for the Rigol oscilloscope interface
+
+Run against a real scope:
+    python benchmark.py --ip 192.168.0.5 --output benchmark_results.json
+
+or against the local simulator started in-process:
+    python benchmark.py --simulate --latency 0.0005
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import time
+import numpy as np
+from rigol_scope import RigolScope
+from commands.waveform_commands import WaveformPreamble
+
+# One-channel depths, then those only available with two or more channels enabled
+MEMORY_DEPTHS = ['12K', '120K', '1200K', '12M', '24M', '6K', '60K', '600K', '6M']
+FORMATS = ['BYTE', 'WORD', 'ASCii']
+
+# Representative call per command group: (group, description, call)
+GROUP_CALLS = [
+    ('acquire', 'get_sample_rate', lambda scope: scope.acquire.get_sample_rate()),
+    ('channel', 'set_scale', lambda scope: scope.channel.set_scale(1, 1)),
+    ('display', 'set_grid', lambda scope: scope.display.set_grid('FULL')),
+    ('ieee', 'get_identification', lambda scope: scope.ieee.get_identification()),
+    ('measure', 'get_measurement', lambda scope: scope.measure.get_measurement('VPP', 'CHANnel1')),
+    ('system', 'get_error', lambda scope: scope.system.get_error()),
+    ('timebase', 'set_main_scale', lambda scope: scope.timebase.set_main_scale(0.001)),
+    ('trigger', 'get_status', lambda scope: scope.trigger.get_status()),
+    ('trigger', 'set_edge_level', lambda scope: scope.trigger.set_edge_level(1.0)),
+    ('waveform', 'get_preamble', lambda scope: scope.waveform.get_preamble()),
+]
+
+def setup_sequence(scope):
+    """Channel/timebase/trigger setup from main.py"""
+    scope.channel.set_display(1, True)
+    scope.channel.set_coupling(1, 'DC')
+    scope.channel.set_scale(1, 2)
+    scope.timebase.set_main_scale(0.0002)
+    scope.trigger.set_mode('EDGE')
+    scope.trigger.set_edge_source('CHANnel1')
+    scope.trigger.set_edge_slope('POSitive')
+    scope.trigger.set_sweep('AUTO')
+    scope.trigger.set_edge_level(1.0)
+
+def summarize(samples):
+    """Latency statistics in seconds"""
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': ordered[-1],
+    }
+
+def bench_latency(scope, repeat: int):
+    """Round-trip latency of one call per command group
+
+    Setters are followed by *OPC? so the measured time covers the full
+    round-trip, the same as a query.
+    """
+    results = {}
+    for group, name, call in GROUP_CALLS:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            call(scope)
+            if name.startswith('set_'):
+                scope.query('*OPC?')
+            samples.append(time.perf_counter() - start)
+        results[f'{group}.{name}'] = summarize(samples)
+    return results
+
+def bench_setup(scope, repeat: int):
+    """main.py setup sent command by command vs. as one batch"""
+    unbatched, batched = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        setup_sequence(scope)
+        scope.query('*OPC?')
+        unbatched.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with scope.batch():
+            setup_sequence(scope)
+        batched.append(time.perf_counter() - start)
+    return {'unbatched': summarize(unbatched), 'batched': summarize(batched)}
+
+def depth_points(depth: str):
+    """Points of a memory depth such as '12K' or '1200K', None for AUTO"""
+    if depth.upper() == 'AUTO':
+        return None
+    return int(float(depth.upper().replace('K', 'e3').replace('M', 'e6')))
+
+def data_bytes_in(instrumentation):
+    """Payload bytes received by :WAVeform:DATA? so far"""
+    return instrumentation.snapshot()['commands'].get(':WAVeform:DATA?', {}).get('bytes_in', 0)
+
+def bench_waveforms(scope, repeat: int, depths, formats, max_ascii_points: int):
+    """Full-memory RAW download throughput per memory depth and format
+
+    Depths the scope does not take with the enabled channels are skipped.
+    Throughput is based on the block bytes actually received.
+    """
+    results = []
+    previous = scope.instrumentation
+    instrumentation = scope.enable_instrumentation()
+    try:
+        for depth in depths:
+            scope.acquire.set_memory_depth(depth)
+            scope.single()
+            scope.force_trigger()
+            scope.query('*OPC?')
+            points = scope.acquire.get_memory_depth()
+            if depth_points(depth) is not None and points != depth_points(depth):
+                print(f"Skipping memory depth {depth}: the scope reports {points or 'AUTO'}")
+                continue
+            if points is None:
+                scope.waveform.set_source('CHANnel1')
+                scope.waveform.set_mode('RAW')
+                points = scope.waveform.get_parsed_preamble(refresh=True).points
+            for format in formats:
+                if format.upper() == 'ASCII' and points > max_ascii_points:
+                    continue
+                samples = []
+                for _ in range(repeat):
+                    received = data_bytes_in(instrumentation)
+                    start = time.perf_counter()
+                    data = scope.waveform.read_raw('CHANnel1', format)
+                    samples.append(time.perf_counter() - start)
+                    wire_bytes = data_bytes_in(instrumentation) - received
+                best = min(samples)
+                results.append({
+                    'memory_depth': depth,
+                    'format': format,
+                    'points': int(len(data)),
+                    'bytes': wire_bytes,
+                    'seconds': summarize(samples),
+                    'mb_per_s': wire_bytes / best / 1e6,
+                    'points_per_s': len(data) / best,
+                })
+    finally:
+        scope.enable_instrumentation(previous or False)
+    scope.run()
+    return results
+
+def bench_conversion(repeat: int, points: int = 24000000):
+    """Host-side code-to-volts conversion cost"""
+    preamble = WaveformPreamble('BYTE', 'RAW', points, 1, 1e-9, -0.012, 0, 0.04, 0, 127)
+    codes = np.random.default_rng(0).integers(0, 256, points, dtype=np.uint8)
+    results = {}
+    for dtype in (np.float32, np.float64):
+        out = np.empty(points, dtype=dtype)
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            preamble.to_volts(codes, out=out)
+            samples.append(time.perf_counter() - start)
+        results[np.dtype(dtype).name] = dict(summarize(samples), points_per_s=points / min(samples))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Rigol oscilloscope benchmarks')
+    parser.add_argument('--ip', default=RigolScope.DEFAULT_IP, help='Scope IP address')
+    parser.add_argument('--port', type=int, default=RigolScope.DEFAULT_PORT, help='Scope SCPI port')
+    parser.add_argument('--connection', choices=['socket', 'lan'], default='socket', help='Transport')
+    parser.add_argument('--simulate', action='store_true', help='Benchmark against the local simulator')
+    parser.add_argument('--latency', type=float, default=0.0, help='Simulator latency in seconds')
+    parser.add_argument('--bandwidth', type=float, default=0.0, help='Simulator bandwidth in bytes/s')
+    parser.add_argument('--repeat', type=int, default=20, help='Repetitions for latency tests')
+    parser.add_argument('--waveform-repeat', type=int, default=3, help='Repetitions per waveform download')
+    parser.add_argument('--depths', nargs='+', default=MEMORY_DEPTHS, help='Memory depths to test')
+    parser.add_argument('--formats', nargs='+', default=FORMATS, help='Waveform formats to test')
+    parser.add_argument('--max-ascii-points', type=int, default=1200000, help='Skip larger ASCii downloads')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON results file')
+    args = parser.parse_args()
+
+    server = None
+    if args.simulate:
+        from scope_simulator import ScopeSimulatorServer
+        server = ScopeSimulatorServer('127.0.0.1', 0, args.latency, args.bandwidth).start()
+        args.ip, args.port, args.connection = '127.0.0.1', server.server_address[1], 'socket'
+
+    scope = RigolScope()
+    connected = scope.connect_socket(args.ip, args.port) if args.connection == 'socket' else scope.connect_lan(args.ip)
+    if not connected:
+        print("Failed to connect to oscilloscope")
+        return
+
+    try:
+        results = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'host': platform.node(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'target': 'simulator' if args.simulate else f'{args.ip}:{args.port}',
+            'instrument': scope.ieee.get_identification(),
+            'connection': args.connection,
+        }
+        print("Measuring command latency...")
+        results['latency'] = bench_latency(scope, args.repeat)
+        print("Measuring setup time...")
+        results['setup'] = bench_setup(scope, args.repeat)
+        print("Measuring waveform throughput...")
+        results['waveform'] = bench_waveforms(scope, args.waveform_repeat, args.depths, args.formats,
+                                              args.max_ascii_points)
+        print("Measuring host conversion...")
+        results['conversion'] = bench_conversion(args.waveform_repeat)
+    finally:
+        scope.disconnect()
+        if server:
+            server.stop()
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    for name, stats in results['latency'].items():
+        print(f"{name:32s} median {stats['median'] * 1e3:8.3f} ms")
+    setup = results['setup']
+    print(f"{'setup unbatched':32s} median {setup['unbatched']['median'] * 1e3:8.3f} ms")
+    print(f"{'setup batched':32s} median {setup['batched']['median'] * 1e3:8.3f} ms")
+    for row in results['waveform']:
+        print(f"{row['format']:6s} {row['memory_depth']:>6s} {row['points']:>9d} pts {row['mb_per_s']:9.2f} MB/s")
+    print(f"Results written to {args.output}")
+
+if __name__ == '__main__':
+    main()
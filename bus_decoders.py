@@ -0,0 +1,207 @@
+# Vectorized host-side UART/I2C/SPI decoders for analog and LA captures
+
+import numpy as np
+
+UART_DTYPE = np.dtype([('time', 'f8'), ('data', 'u2'), ('parity_error', '?'), ('framing_error', '?')])
+I2C_DTYPE = np.dtype([('time', 'f8'), ('transaction', 'i8'), ('byte', 'i8'), ('data', 'u1'),
+                      ('address', '?'), ('read', '?'), ('ack', '?')])
+SPI_DTYPE = np.dtype([('time', 'f8'), ('transaction', 'i8'), ('mosi', 'i8'), ('miso', 'i8')])
+
+def to_logic(data, threshold: float = None, hysteresis: float = 0.0, bit: int = None):
+    """Convert a capture to a boolean logic level per sample
+
+    Args:
+        data: Analog volts/codes, LA codes or an already digital array
+        threshold: Logic threshold for analog data
+        hysteresis: Total hysteresis band around threshold; samples inside
+            the band keep the previous level
+        bit: LA line (0-15) to extract from packed LA codes
+
+    Returns:
+        numpy.ndarray: bool per sample
+    """
+    data = np.asarray(data)
+    if bit is not None:
+        return (data >> bit) & 1 == 1
+    if threshold is None:
+        return data.astype(bool)
+    if not hysteresis:
+        return data > threshold
+    high = data >= threshold + hysteresis / 2
+    low = data <= threshold - hysteresis / 2
+    index = np.arange(len(data))
+    last_high = np.maximum.accumulate(np.where(high, index, -1))
+    last_low = np.maximum.accumulate(np.where(low, index, -1))
+    return last_high > last_low
+
+def edges(logic, rising: bool = None):
+    """Sample indexes where the level changes (first sample of the new level)
+
+    Args:
+        rising: True for rising edges only, False for falling only, None for both
+    """
+    logic = np.asarray(logic, dtype=bool)
+    changes = np.flatnonzero(logic[1:] != logic[:-1]) + 1
+    if rising is None:
+        return changes
+    return changes[logic[changes] == rising]
+
+def _assemble(bits, segments, word_bits: int, msb_first: bool = True):
+    """Group consecutive sampled bits into words, restarting at each new segment
+
+    Returns:
+        tuple: (index of each complete word's first bit, word values)
+    """
+    if not len(bits):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.r_[0, np.flatnonzero(np.diff(segments)) + 1]
+    lengths = np.diff(np.r_[starts, len(segments)])
+    rank = np.arange(len(segments)) - np.repeat(starts, lengths)
+    position = rank % word_bits
+    group = np.cumsum(position == 0) - 1
+    complete = np.bincount(group)[group] == word_bits
+    shift = word_bits - 1 - position if msb_first else position
+    weights = np.left_shift(np.int64(1), shift.astype(np.int64))
+    values = np.bincount(group[complete], weights=(bits[complete] * weights[complete]).astype(np.float64),
+                         minlength=group[-1] + 1)
+    first = np.flatnonzero(position == 0)
+    full = complete[first]
+    return first[full], values[full].astype(np.int64)
+
+def decode_uart(data, sample_interval: float, baud: float, x_origin: float = 0.0, data_bits: int = 8,
+                parity: str = 'NONE', stop_bits: float = 1, idle_high: bool = True, msb_first: bool = False,
+                threshold: float = None, bit: int = None):
+    """Decode a UART line
+
+    Start bits are located from the falling edges (one step per frame, not per
+    sample) and all data, parity and stop bits are then sampled at bit centers
+    in one vectorized gather.
+
+    Args:
+        data: Capture of the line (see to_logic for threshold/bit)
+        sample_interval: Seconds per sample
+        baud: Bit rate
+        parity: NONE|EVEN|ODD
+        stop_bits: 1, 1.5 or 2
+
+    Returns:
+        numpy.ndarray: One row per frame, fields as in UART_DTYPE
+    """
+    if parity.upper() not in ['NONE', 'EVEN', 'ODD']:
+        raise ValueError("Invalid parity. Must be one of ['NONE', 'EVEN', 'ODD']")
+    logic = to_logic(data, threshold, bit=bit)
+    if not idle_high:
+        logic = ~logic
+    samples_per_bit = 1.0 / (baud * sample_interval)
+    parity_bits = 0 if parity.upper() == 'NONE' else 1
+    frame_bits = 1 + data_bits + parity_bits + stop_bits
+    falling = edges(logic, rising=False)
+    last_center = (1 + data_bits + parity_bits + 0.5) * samples_per_bit
+    falling = falling[falling + last_center < len(logic)]
+
+    # Each frame starts at the first falling edge after the previous frame's stop bit:
+    # look up that edge for every candidate at once, then follow the chain
+    frame_length = (frame_bits - 0.5) * samples_per_bit
+    following = np.searchsorted(falling, falling + frame_length).tolist()
+    chain = []
+    i = 0
+    while i < len(following):
+        chain.append(i)
+        i = following[i]
+    starts = falling[np.array(chain, dtype=np.int64)]
+
+    centers = starts[:, None] + ((np.arange(1 + data_bits + parity_bits + 1) + 0.5) * samples_per_bit)[None, :]
+    sampled = logic[np.minimum(centers.astype(np.int64), len(logic) - 1)]
+    payload = sampled[:, 1:1 + data_bits].astype(np.int64)
+    shifts = np.arange(data_bits)[::-1] if msb_first else np.arange(data_bits)
+    frames = np.zeros(len(starts), dtype=UART_DTYPE)
+    frames['time'] = x_origin + starts * sample_interval
+    frames['data'] = (payload << shifts).sum(axis=1)
+    if parity_bits:
+        ones = payload.sum(axis=1) + sampled[:, 1 + data_bits]
+        frames['parity_error'] = ones % 2 != (0 if parity.upper() == 'EVEN' else 1)
+    frames['framing_error'] = sampled[:, 0] | ~sampled[:, -1]
+    return frames
+
+def decode_i2c(scl, sda, sample_interval: float, x_origin: float = 0.0, threshold: float = None,
+               scl_bit: int = None, sda_bit: int = None):
+    """Decode I2C traffic into bytes with address/read/ack flags
+
+    START/STOP conditions (SDA changing while SCL is high) split the capture
+    into transactions; SDA is sampled on every SCL rising edge and grouped
+    into 9-bit words (8 data bits and ACK).
+
+    Returns:
+        numpy.ndarray: One row per byte, fields as in I2C_DTYPE
+    """
+    scl = to_logic(scl, threshold, bit=scl_bit)
+    sda = to_logic(sda, threshold, bit=sda_bit)
+    sda_edges = edges(sda)
+    while_high = sda_edges[scl[sda_edges] & scl[sda_edges - 1]]
+    starts = while_high[~sda[while_high]]
+    stops = while_high[sda[while_high]]
+    clock = edges(scl, rising=True)
+    transaction = np.searchsorted(starts, clock, side='right') - 1
+    # A transaction ends at the next START or the first STOP after it, whichever comes first
+    stop_after = np.append(stops, len(scl))[np.searchsorted(stops, starts, side='right')]
+    ends = np.minimum(np.r_[starts[1:], len(scl)], stop_after)
+    valid = transaction >= 0
+    valid[valid] = clock[valid] < ends[transaction[valid]]
+    clock, transaction = clock[valid], transaction[valid]
+    first, values = _assemble(sda[clock].astype(np.int64), transaction, 9)
+
+    frames = np.zeros(len(first), dtype=I2C_DTYPE)
+    frames['time'] = x_origin + clock[first] * sample_interval
+    frames['transaction'] = transaction[first]
+    new = np.r_[True, frames['transaction'][1:] != frames['transaction'][:-1]] if len(first) else np.zeros(0, bool)
+    index = np.arange(len(first))
+    frames['byte'] = index - np.maximum.accumulate(np.where(new, index, 0))
+    frames['data'] = values >> 1
+    frames['address'] = frames['byte'] == 0
+    frames['read'] = frames['address'] & (frames['data'] & 1 == 1)
+    frames['ack'] = values & 1 == 0
+    return frames
+
+def decode_spi(sclk, sample_interval: float, mosi=None, miso=None, cs=None, x_origin: float = 0.0,
+               mode: int = 0, word_bits: int = 8, msb_first: bool = True, cs_active_low: bool = True,
+               threshold: float = None, bits: dict = None):
+    """Decode SPI words on MOSI and/or MISO
+
+    Data lines are sampled on the clock edge given by the SPI mode (rising
+    for modes 0 and 3, falling for 1 and 2). With CS, words restart at each
+    CS assertion and clocks while CS is inactive are ignored.
+
+    Args:
+        bits: LA line per signal for packed LA codes, e.g. {'sclk': 0, 'mosi': 1, 'cs': 3}
+
+    Returns:
+        numpy.ndarray: One row per word, fields as in SPI_DTYPE (-1 for a missing line)
+    """
+    if mode not in [0, 1, 2, 3]:
+        raise ValueError('Invalid mode. Must be one of [0, 1, 2, 3]')
+    bits = bits or {}
+    clock = edges(to_logic(sclk, threshold, bit=bits.get('sclk')), rising=mode in (0, 3))
+    transaction = np.zeros(len(clock), dtype=np.int64)
+    if cs is not None:
+        select = to_logic(cs, threshold, bit=bits.get('cs'))
+        active = ~select if cs_active_low else select
+        clock = clock[active[clock]]
+        assertions = edges(active, rising=True)
+        transaction = np.searchsorted(assertions, clock, side='right')
+    lines = {}
+    for name, line in (('mosi', mosi), ('miso', miso)):
+        if line is not None:
+            lines[name] = to_logic(line, threshold, bit=bits.get(name))[clock].astype(np.int64)
+    if not lines:
+        raise ValueError('At least one of mosi and miso is required')
+
+    frames = None
+    for name, sampled in lines.items():
+        first, values = _assemble(sampled, transaction, word_bits, msb_first)
+        if frames is None:
+            frames = np.zeros(len(first), dtype=SPI_DTYPE)
+            frames['time'] = x_origin + clock[first] * sample_interval
+            frames['transaction'] = transaction[first]
+            frames['mosi'] = frames['miso'] = -1
+        frames[name] = values
+    return frames
@@ -0,0 +1,180 @@
+# Append-only on-disk capture files with memory-mapped access
+
+import json
+import os
+import time
+import numpy as np
+from commands.waveform_commands import FORMAT_DTYPES, WaveformPreamble
+
+MAGIC = b'RIGOLCAP'
+VERSION = 1
+ALIGNMENT = 4096  # Sample data starts on a page boundary so it maps cleanly
+# Preamble fields every record of a file shares, since one preamble scales them all
+SCALING_FIELDS = ['x_increment', 'x_origin', 'y_increment', 'y_origin', 'y_reference']
+
+# Queries saved in the header by record_capture()
+SETTINGS_QUERIES = [':ACQuire:SRATe?', ':ACQuire:MDEPth?', ':ACQuire:TYPE?', ':TIMebase:SCALe?',
+                    ':TIMebase:OFFSet?']
+
+def _dtype(format: str):
+    return FORMAT_DTYPES.get(format.upper(), np.dtype('<f8'))
+
+
+class CaptureWriter:
+    """Appends raw sample chunks to a capture file
+
+    Layout: 8-byte magic, 2-byte version, 4-byte header length, a JSON header
+    (preamble, source, settings) padded to ALIGNMENT, then the samples of one
+    or more records back to back. Nothing is rewritten after the header, so a
+    capture interrupted mid-write is still readable up to the last sample.
+
+    Args:
+        path: Capture file
+        preamble: WaveformPreamble of the data (format and scaling)
+        source: Waveform source the data came from
+        settings: Extra scope settings to keep in the header
+        append: Add records to an existing file with the same format, length
+            and scaling (SCALING_FIELDS)
+    """
+
+    def __init__(self, path: str, preamble: WaveformPreamble, source: str = None, settings: dict = None,
+                 append: bool = False):
+        self.path = path
+        self.preamble = preamble
+        self.dtype = _dtype(preamble.format)
+        if append and os.path.exists(path):
+            existing = CaptureFile(path)
+            if existing.dtype != self.dtype or existing.points != preamble.points:
+                raise ValueError(f'{path} holds {existing.dtype} records of {existing.points} points')
+            for field in SCALING_FIELDS:
+                if getattr(existing.preamble, field) != getattr(preamble, field):
+                    raise ValueError(f'{path} has {field}={getattr(existing.preamble, field)!r}, '
+                                     f'not {getattr(preamble, field)!r}')
+            # Drop a partially written record before appending
+            self.samples = existing.records * existing.points
+            self.file = open(path, 'r+b')
+            self.file.truncate(existing.offset + self.samples * self.dtype.itemsize)
+            self.file.seek(0, os.SEEK_END)
+        else:
+            header = json.dumps({
+                'preamble': vars(preamble),
+                'source': source,
+                'settings': settings or {},
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }).encode('utf-8')
+            prefix = MAGIC + VERSION.to_bytes(2, 'little') + len(header).to_bytes(4, 'little') + header
+            self.file = open(path, 'wb')
+            self.file.write(prefix + b' ' * (-len(prefix) % ALIGNMENT))
+            self.samples = 0
+
+    def write(self, codes):
+        """Append samples straight from a buffer (NumPy chunk, memoryview or bytes)"""
+        view = memoryview(codes).cast('B')
+        if view.nbytes % self.dtype.itemsize:
+            raise ValueError(f'Chunk of {view.nbytes} bytes is not a whole number of {self.dtype} samples')
+        self.file.write(view)
+        self.samples += view.nbytes // self.dtype.itemsize
+        return self.samples
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class LazyVolts:
+    """Volts view of capture codes, scaled only for the samples indexed"""
+
+    def __init__(self, codes, preamble: WaveformPreamble, dtype=np.float64):
+        self.codes = codes
+        self.preamble = preamble
+        self.dtype = dtype
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, key):
+        return self.preamble.to_volts(self.codes[key], dtype=self.dtype)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.preamble.to_volts(self.codes, dtype=dtype or self.dtype)
+
+
+class CaptureFile:
+    """Read-only memory-mapped view of a capture file
+
+    codes has shape (records, points) and is never loaded as a whole; volts
+    scales only the part that is indexed, e.g. capture.volts[0, :1000].
+    """
+
+    def __init__(self, path: str, dtype=np.float64):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f'{path} is not a capture file')
+            version = int.from_bytes(f.read(2), 'little')
+            if version > VERSION:
+                raise ValueError(f'Unsupported capture file version {version}')
+            length = int.from_bytes(f.read(4), 'little')
+            self.header = json.loads(f.read(length).decode('utf-8'))
+        self.offset = len(MAGIC) + 6 + length
+        self.offset += -self.offset % ALIGNMENT
+        self.preamble = WaveformPreamble(**self.header['preamble'])
+        self.source = self.header.get('source')
+        self.settings = self.header.get('settings', {})
+        self.dtype = _dtype(self.preamble.format)
+        self.points = self.preamble.points
+        # Ignore a partially written trailing sample
+        self.samples = max(os.path.getsize(path) - self.offset, 0) // self.dtype.itemsize
+        records = self.samples // self.points if self.points else 0
+        if records:
+            self.codes = np.memmap(path, self.dtype, 'r', self.offset, (records, self.points))
+        else:
+            self.codes = np.empty((0, self.points), dtype=self.dtype)
+        self.volts = LazyVolts(self.codes, self.preamble, dtype)
+
+    @property
+    def records(self):
+        """Number of complete records"""
+        return self.codes.shape[0]
+
+    def time_axis(self, dtype=np.float64):
+        """Sample times of one record in seconds"""
+        return self.preamble.time_axis(dtype=dtype)
+
+    def __repr__(self):
+        return (f'CaptureFile({self.path!r}, source={self.source!r}, records={self.records}, '
+                f'points={self.points}, format={self.preamble.format!r})')
+
+
+def record_capture(scope, path: str, source: str = 'CHANnel1', format: str = 'BYTE', append: bool = False,
+                   chunk_size: int = None):
+    """Stream the full acquisition memory of a source into a capture file
+
+    Each chunk is written from the receive buffer as it arrives, so memory
+    use stays at one chunk regardless of the memory depth.
+
+    Returns:
+        CaptureFile: The file reopened for memory-mapped access
+    """
+    waveform = scope.waveform
+    points = waveform.prepare_raw(source, format)
+    preamble = waveform.get_parsed_preamble()
+    replies = scope.query_many(SETTINGS_QUERIES)
+    settings = dict(zip(SETTINGS_QUERIES, replies))
+    with CaptureWriter(path, preamble, source, settings, append) as writer:
+        for _, chunk in waveform.iter_chunks(points, format, chunk_size):
+            writer.write(chunk)
+    return CaptureFile(path)
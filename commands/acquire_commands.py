@@ -17,6 +17,18 @@ class AcquireCommands:
             raise ValueError(f'Invalid depth. Must be one of {valid_depths}')
         self.device.send_command(f':ACQuire:MDEPth {depth}')
 
+    def get_memory_depth(self):
+        """Get current memory depth in points
+
+        Returns:
+            int or None: None when the depth is AUTO (the RAW preamble then
+            holds the point count) or the query failed
+        """
+        depth = self.device.query(':ACQuire:MDEPth?')
+        if not depth or depth.upper() == 'AUTO':
+            return None
+        return int(float(depth))
+
     def set_type(self, type: str):
         """Set acquisition type"""
         valid_types = ['NORMal', 'AVERages', 'PEAK', 'HRESolution']
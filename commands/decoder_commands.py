@@ -7,10 +7,14 @@ class DecoderCommands:
     def set_mode(self, decoder: int, mode: str):
         """Set decoder mode"""
         valid_modes = ['PARallel', 'RS232', 'IIC', 'SPI']
-        if mode.upper() not in valid_modes:
+        if mode.upper() not in [m.upper() for m in valid_modes]:
             raise ValueError(f'Invalid mode. Must be one of {valid_modes}')
         self.device.send_command(f':DECoder{decoder}:MODE {mode}')
 
+    def get_mode(self, decoder: int):
+        """Get decoder mode (PAR|RS232|IIC|SPI)"""
+        return self.device.query(f':DECoder{decoder}:MODE?')
+
     def set_display(self, decoder: int, enabled: bool):
         """Set decoder display"""
         self.device.send_command(f':DECoder{decoder}:DISPlay {1 if enabled else 0}')
@@ -18,10 +22,14 @@ class DecoderCommands:
     def set_format(self, decoder: int, format: str):
         """Set decoder format"""
         valid_formats = ['HEX', 'ASCii', 'DEC', 'BIN']
-        if format.upper() not in valid_formats:
+        if format.upper() not in [f.upper() for f in valid_formats]:
             raise ValueError(f'Invalid format. Must be one of {valid_formats}')
         self.device.send_command(f':DECoder{decoder}:FORMat {format}')
 
+    def get_format(self, decoder: int):
+        """Get decoder format (HEX|ASC|DEC|BIN)"""
+        return self.device.query(f':DECoder{decoder}:FORMat?')
+
     def set_position(self, decoder: int, position: int):
         """Set decoder position"""
         self.device.send_command(f':DECoder{decoder}:POSition {position}')
@@ -1,16 +1,62 @@
 """Display commands for Rigol oscilloscope"""
 
+SCREENSHOT_FORMATS = ['BMP24', 'BMP8', 'PNG', 'JPEG', 'TIFF']
+# Receive buffer size, larger than an uncompressed 800x480 24-bit screenshot
+SCREENSHOT_BUFFER_SIZE = 2 * 1024 * 1024
+
 class DisplayCommands:
     def __init__(self, device):
         self.device = device
+        self._screenshot_buffer = None
 
     def clear(self):
         """Clear display"""
         self.device.send_command(':DISPlay:CLEar')
 
     def get_data(self):
-        """Get display data"""
-        return self.device.query(':DISPlay:DATA?')
+        """Get display data (image block as bytes)"""
+        return self.get_screenshot()
+
+    def get_screenshot(self, format: str = None, color: bool = True, invert: bool = False):
+        """Get a screenshot as the raw image bytes of the :DISPlay:DATA? block
+
+        Args:
+            format: Image format (BMP24|BMP8|PNG|JPEG|TIFF), default uses the
+                scope's current setting
+            color: Color or grayscale image (only sent with format)
+            invert: Invert colors (only sent with format)
+
+        Returns:
+            bytes: Image file contents, empty on failure
+        """
+        return bytes(self._read_screenshot(format, color, invert))
+
+    def save_screenshot(self, file, format: str = None, color: bool = True, invert: bool = False):
+        """Write a screenshot straight from the receive buffer to a path or binary file object
+
+        Returns:
+            int: Number of bytes written (0 on failure)
+        """
+        data = self._read_screenshot(format, color, invert)
+        if not len(data):
+            return 0
+        if hasattr(file, 'write'):
+            file.write(data)
+        else:
+            with open(file, 'wb') as f:
+                f.write(data)
+        return len(data)
+
+    def _read_screenshot(self, format: str, color: bool, invert: bool):
+        """Receive the :DISPlay:DATA? block into the reusable buffer"""
+        command = ':DISPlay:DATA?'
+        if format:
+            if format.upper() not in SCREENSHOT_FORMATS:
+                raise ValueError(f'Invalid format. Must be one of {SCREENSHOT_FORMATS}')
+            command += f' {"ON" if color else "OFF"},{"ON" if invert else "OFF"},{format.upper()}'
+        if self._screenshot_buffer is None:
+            self._screenshot_buffer = bytearray(SCREENSHOT_BUFFER_SIZE)
+        return memoryview(self.device.query_binary(command, self._screenshot_buffer))
 
     def set_type(self, type: str):
         """Set display type"""
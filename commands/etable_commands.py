@@ -1,8 +1,88 @@
 """Event Table commands for Rigol oscilloscope"""
 
+import numpy as np
+
+# Data columns after the row number and time, per decoder mode
+ETABLE_COLUMNS = {
+    'PARALLEL': ['data'],
+    'RS232': ['tx', 'rx'],
+    'IIC': ['address', 'data'],
+    'SPI': ['mosi', 'miso'],
+}
+MODE_NAMES = {'PAR': 'PARALLEL', 'PARALLEL': 'PARALLEL', 'RS232': 'RS232', 'UART': 'RS232',
+              'IIC': 'IIC', 'I2C': 'IIC', 'SPI': 'SPI'}
+
+def etable_dtype(mode: str):
+    """Structured dtype of parsed event table rows for a decoder mode
+
+    Values are -1 where a cell is empty; error is set when any cell of the
+    row is flagged as an error. IIC rows also carry the read/write bit.
+    """
+    fields = [('row', 'i8'), ('time', 'f8')] + [(column, 'i8') for column in ETABLE_COLUMNS[mode]]
+    if mode == 'IIC':
+        fields.append(('read', '?'))
+    return np.dtype(fields + [('error', '?')])
+
+def parse_value(token: str, format: str):
+    """Parse one event table cell in the decoder format, returning (value, error)"""
+    text = token.strip()
+    error = 'ERR' in text.upper() or '?' in text
+    digits = text.upper().replace('ERR', '').strip('()[]? ')
+    if not digits:
+        return -1, error
+    try:
+        if format.startswith('HEX'):
+            return int(digits[2:] if digits.startswith('0X') else digits, 16), error
+        if format.startswith('BIN'):
+            return int(digits[2:] if digits.startswith('0B') else digits, 2), error
+        if format.startswith('ASC') and len(text) == 1:
+            return ord(text), error
+        # DEC values may be zero-padded ('012'), so never read a base prefix
+        return int(digits, 10), error
+    except ValueError:
+        return -1, True
+
+def parse_etable(text: str, mode: str, format: str = 'HEX'):
+    """Parse event table CSV text into a structured array (header rows are skipped)"""
+    mode = MODE_NAMES[mode.upper()]
+    format = format.upper()
+    columns = len(ETABLE_COLUMNS[mode])
+    rows = []
+    for line in text.splitlines():
+        fields = line.split(',')
+        if len(fields) < 2 or not fields[0].strip().isdigit():
+            continue
+        try:
+            time = float(fields[1])
+        except ValueError:
+            continue
+        values = []
+        error = False
+        for token in (fields[2:2 + columns] + [''] * columns)[:columns]:
+            value, flagged = parse_value(token, format)
+            values.append(value)
+            error = error or flagged
+        row = [int(fields[0]), time] + values
+        if mode == 'IIC':
+            row.append(any(token.strip().upper() in ('R', 'READ') for token in fields[2:]))
+        rows.append(tuple(row) + (error,))
+    return np.array(rows, dtype=etable_dtype(mode))
+
+def _row_key(line: str) -> str:
+    """Identity of an event table row: its time and values without the row number"""
+    return line.partition(',')[2].strip()
+
+def _row_time(line: str) -> float:
+    try:
+        return float(line.split(',')[1])
+    except (IndexError, ValueError):
+        return float('-inf')
+
+
 class ETableCommands:
     def __init__(self, device):
         self.device = device
+        self._polls = {}  # table -> (newest row returned, see _row_key; mode; format)
 
     def set_display(self, table: int, enabled: bool):
         """Set event table display"""
@@ -29,5 +109,61 @@ class ETableCommands:
         self.device.send_command(f':ETABle{table}:SORT {sort}')
 
     def get_data(self, table: int):
-        """Get event table data"""
-        return self.device.query(f':ETABle{table}:DATA?')
\ No newline at end of file
+        """Get event table data
+
+        The table is returned as a binary block, so it is read with
+        query_binary to keep multi-line tables intact.
+        """
+        return bytes(self.device.query_binary(f':ETABle{table}:DATA?')).decode('ascii', errors='replace')
+
+    def get_data_array(self, table: int, mode: str = None, format: str = None):
+        """Get event table data as a structured array
+
+        Args:
+            table: Event table / decoder number (1|2)
+            mode: Decoder mode (PARallel|RS232|IIC|SPI), queried if omitted
+            format: Decoder format (HEX|ASCii|DEC|BIN), queried if omitted
+
+        Returns:
+            numpy.ndarray: One row per event, fields as in etable_dtype(mode)
+        """
+        mode = mode or self.device.decoder.get_mode(table)
+        format = format or self.device.decoder.get_format(table)
+        return parse_etable(self.get_data(table), mode, format)
+
+    def poll(self, table: int, mode: str = None, format: str = None):
+        """Get only the event table rows added since the previous poll
+
+        The newest row returned so far is looked up in the new table (by time
+        and values, since row numbers shift when the table wraps) and only
+        the rows after it are parsed. Ascending and descending tables both
+        work. If that row is gone (table cleared or restarted) all rows are
+        returned again; a failed read or empty table returns no rows and
+        keeps the poll position.
+
+        Returns:
+            numpy.ndarray: New rows, oldest first, fields as in etable_dtype(mode)
+        """
+        newest, poll_mode, poll_format = self._polls.get(table, (None, None, None))
+        mode = mode or poll_mode or self.device.decoder.get_mode(table)
+        format = format or poll_format or self.device.decoder.get_format(table)
+        lines = [line for line in self.get_data(table).splitlines() if line.split(',', 1)[0].strip().isdigit()]
+        if not lines:
+            return parse_etable('', mode, format)
+        if len(lines) > 1 and _row_time(lines[0]) > _row_time(lines[-1]):
+            lines.reverse()  # Descending sort: newest row first
+        start = 0
+        if (mode, format) == (poll_mode, poll_format) and newest is not None:
+            for index in range(len(lines) - 1, -1, -1):
+                if _row_key(lines[index]) == newest:
+                    start = index + 1
+                    break
+        self._polls[table] = (_row_key(lines[-1]), mode, format)
+        return parse_etable('\n'.join(lines[start:]), mode, format)
+
+    def reset_poll(self, table: int = None):
+        """Forget poll positions so the next poll returns the whole table"""
+        if table is None:
+            self._polls = {}
+        else:
+            self._polls.pop(table, None)
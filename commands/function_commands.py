@@ -8,6 +8,10 @@ class FunctionCommands:
         """Set waveform record end frame"""
         self.device.send_command(f':FUNCtion:WRECord:FEND {frame}')
 
+    def get_record_end(self):
+        """Get waveform record end frame"""
+        return int(self.device.query(':FUNCtion:WRECord:FEND?'))
+
     def get_record_max(self):
         """Get maximum number of frames"""
         return int(self.device.query(':FUNCtion:WRECord:FMAX?'))
@@ -16,6 +20,10 @@ class FunctionCommands:
         """Set waveform record interval"""
         self.device.send_command(f':FUNCtion:WRECord:FINTerval {interval}')
 
+    def get_record_interval(self):
+        """Get waveform record interval in seconds"""
+        return float(self.device.query(':FUNCtion:WRECord:FINTerval?'))
+
     def set_record_prompt(self, enabled: bool):
         """Enable/disable record prompt"""
         self.device.send_command(f':FUNCtion:WRECord:PROMpt {1 if enabled else 0}')
@@ -58,4 +66,8 @@ class FunctionCommands:
 
     def get_replay_current(self):
         """Get current frame"""
-        return int(self.device.query(':FUNCtion:WREPlay:FCURrent?'))
\ No newline at end of file
+        return int(self.device.query(':FUNCtion:WREPlay:FCURrent?'))
+
+    def set_replay_current(self, frame: int):
+        """Set current frame"""
+        self.device.send_command(f':FUNCtion:WREPlay:FCURrent {frame}')
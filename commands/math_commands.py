@@ -47,7 +47,7 @@ class MathCommands:
     def set_fft_window(self, window: str):
         """Set FFT window"""
         valid_windows = ['RECTangle', 'HANNing', 'HAMMing', 'BLACkman', 'FLATtop']
-        if window.upper() not in valid_windows:
+        if window.upper() not in [w.upper() for w in valid_windows]:
             raise ValueError(f'Invalid window. Must be one of {valid_windows}')
         self.device.send_command(f':MATH:FFT:WINDow {window}')
 
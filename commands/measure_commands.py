@@ -1,5 +1,30 @@
 """Measure commands for Rigol oscilloscope"""
 
+import numpy as np
+
+VALID_ITEMS = ['VMAX', 'VMIN', 'VPP', 'VTOP', 'VBASe', 'VAMP', 'VAVG', 'VRMS',
+               'OVERshoot', 'PREShoot', 'MARea', 'MPARea', 'PERiod', 'FREQuency',
+               'RTIMe', 'FTIMe', 'PWIDth', 'NWIDth', 'PDUTy', 'NDUTy', 'RDELay',
+               'FDELay', 'RPHase', 'FPHase', 'TVMAX', 'TVMIN', 'PSLEWrate',
+               'NSLEWrate', 'VUPper', 'VMID', 'VLOWer', 'VARIance', 'PVRMS',
+               'PPULses', 'NPULses', 'PEDGes', 'NEDGes']
+
+STATISTIC_TYPES = ['MAXimum', 'MINimum', 'CURRent', 'AVERages', 'DEViation']
+
+# The scope reports invalid measurements as 9.9E37
+INVALID_VALUE = 9.9e37
+
+def to_float_array(values):
+    """Convert measurement replies to a float64 array, mapping 9.9E37 and failures to NaN"""
+    result = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        try:
+            result[i] = float(value)
+        except (TypeError, ValueError):
+            pass
+    result[result >= INVALID_VALUE] = np.nan
+    return result
+
 class MeasureCommands:
     def __init__(self, device):
         self.device = device
@@ -60,24 +85,14 @@ class MeasureCommands:
 
     def set_statistic_item(self, item: str, value: str):
         """Set statistics item"""
-        valid_items = ['VMAX', 'VMIN', 'VPP', 'VTOP', 'VBASe', 'VAMP', 'VAVG', 'VRMS', 
-                      'OVERshoot', 'PREShoot', 'MARea', 'MPARea', 'PERiod', 'FREQuency', 
-                      'RTIMe', 'FTIMe', 'PWIDth', 'NWIDth', 'PDUTy', 'NDUTy', 'RDELay', 
-                      'FDELay', 'RPHase', 'FPHase', 'TVMAX', 'TVMIN', 'PSLEWrate', 
-                      'NSLEWrate', 'VUPper', 'VMID', 'VLOWer', 'VARIance', 'PVRMS', 
-                      'PPULses', 'NPULses', 'PEDGes', 'NEDGes']
+        valid_items = VALID_ITEMS
         if item.upper() not in [i.upper() for i in valid_items]:
             raise ValueError(f'Invalid item. Must be one of {valid_items}')
         self.device.send_command(f':MEASure:STATistic:ITEM {item},{value}')
 
     def set_item(self, item: str, source: str):
         """Set measurement item"""
-        valid_items = ['VMAX', 'VMIN', 'VPP', 'VTOP', 'VBASe', 'VAMP', 'VAVG', 'VRMS', 
-                      'OVERshoot', 'PREShoot', 'MARea', 'MPARea', 'PERiod', 'FREQuency', 
-                      'RTIMe', 'FTIMe', 'PWIDth', 'NWIDth', 'PDUTy', 'NDUTy', 'RDELay', 
-                      'FDELay', 'RPHase', 'FPHase', 'TVMAX', 'TVMIN', 'PSLEWrate', 
-                      'NSLEWrate', 'VUPper', 'VMID', 'VLOWer', 'VARIance', 'PVRMS', 
-                      'PPULses', 'NPULses', 'PEDGes', 'NEDGes']
+        valid_items = VALID_ITEMS
         if item.upper() not in [i.upper() for i in valid_items]:
             raise ValueError(f'Invalid item. Must be one of {valid_items}')
         self.device.send_command(f':MEASure:ITEM {item},{source}')
@@ -109,12 +124,7 @@ class MeasureCommands:
         Returns:
             float: Measured value
         """
-        valid_items = ['VMAX', 'VMIN', 'VPP', 'VTOP', 'VBASe', 'VAMP', 'VAVG', 'VRMS', 
-                      'OVERshoot', 'PREShoot', 'MARea', 'MPARea', 'PERiod', 'FREQuency', 
-                      'RTIMe', 'FTIMe', 'PWIDth', 'NWIDth', 'PDUTy', 'NDUTy', 'RDELay', 
-                      'FDELay', 'RPHase', 'FPHase', 'TVMAX', 'TVMIN', 'PSLEWrate', 
-                      'NSLEWrate', 'VUPper', 'VMID', 'VLOWer', 'VARIance', 'PVRMS', 
-                      'PPULses', 'NPULses', 'PEDGes', 'NEDGes']
+        valid_items = VALID_ITEMS
         if item.upper() not in [i.upper() for i in valid_items]:
             raise ValueError(f'Invalid item. Must be one of {valid_items}')
         
@@ -123,6 +133,60 @@ class MeasureCommands:
             command += f',{source}'
         return float(self.device.query(command))
 
+    def get_measurements(self, items, sources):
+        """Get several measurement items for several sources in one round-trip
+
+        All item/source queries are pipelined as compound messages.
+
+        Args:
+            items: Measurement items (e.g., ['VPP', 'VRMS', 'PERiod'])
+            sources: Source channels (e.g., ['CHANnel1', 'CHANnel2'])
+
+        Returns:
+            numpy.ndarray: Structured array with one row per source, a 'source'
+            field and one float field per item (NaN where invalid)
+        """
+        items = [items] if isinstance(items, str) else list(items)
+        sources = [sources] if isinstance(sources, str) else list(sources)
+        for item in items:
+            if item.upper() not in [i.upper() for i in VALID_ITEMS]:
+                raise ValueError(f'Invalid item. Must be one of {VALID_ITEMS}')
+        commands = [f':MEASure:ITEM? {item},{source}' for source in sources for item in items]
+        values = to_float_array(self.device.query_many(commands)).reshape(len(sources), len(items))
+        width = max((len(source) for source in sources), default=1)
+        result = np.zeros(len(sources), dtype=[('source', f'U{width}')] + [(item, 'f8') for item in items])
+        result['source'] = sources
+        for column, item in enumerate(items):
+            result[item] = values[:, column]
+        return result
+
+    def get_statistics(self, items, source: str = None, types=None):
+        """Get measurement statistics for several items in one round-trip
+
+        Args:
+            items: Measurement items (e.g., ['VPP', 'FREQuency'])
+            source: Source channel (e.g., CHANnel1)
+            types: Statistic types, defaults to all of STATISTIC_TYPES
+
+        Returns:
+            numpy.ndarray: Structured array with one row per item, an 'item'
+            field and one float field per statistic type (NaN where invalid)
+        """
+        items = [items] if isinstance(items, str) else list(items)
+        types = list(types or STATISTIC_TYPES)
+        for type in types:
+            if type.upper() not in [t.upper() for t in STATISTIC_TYPES]:
+                raise ValueError(f'Invalid type. Must be one of {STATISTIC_TYPES}')
+        suffix = f',{source}' if source else ''
+        commands = [f':MEASure:STATistic:ITEM? {type},{item}{suffix}' for item in items for type in types]
+        values = to_float_array(self.device.query_many(commands)).reshape(len(items), len(types))
+        width = max((len(item) for item in items), default=1)
+        result = np.zeros(len(items), dtype=[('item', f'U{width}')] + [(type, 'f8') for type in types])
+        result['item'] = items
+        for column, type in enumerate(types):
+            result[type] = values[:, column]
+        return result
+
     def get_all_measurements(self):
         """Get all measurement values
         
@@ -131,6 +195,11 @@ class MeasureCommands:
         """
         return self.device.query(':MEASure:ITEM:ALL?')
 
+    def get_all_measurements_array(self):
+        """Get all measurement values as a float array (NaN where invalid)"""
+        reply = self.get_all_measurements()
+        return to_float_array(reply.split(',') if reply else [])
+
     def get_frequency(self, source: str = None):
         """Get frequency measurement
         
@@ -11,13 +11,25 @@ class StorageCommands:
             raise ValueError(f'Invalid type. Must be one of {valid_types}')
         self.device.send_command(f':STORage:IMAGe:TYPE {type}')
 
+    def get_image_type(self):
+        """Get image type"""
+        return self.device.query(':STORage:IMAGe:TYPE?')
+
     def set_image_invert(self, enabled: bool):
         """Set image invert"""
         self.device.send_command(f':STORage:IMAGe:INVERT {1 if enabled else 0}')
 
+    def get_image_invert(self):
+        """Get image invert"""
+        return self.device.query(':STORage:IMAGe:INVERT?') in ['1', 'ON']
+
     def set_image_color(self, color: str):
         """Set image color"""
         valid_colors = ['COLor', 'GRAYscale']
-        if color.upper() not in valid_colors:
+        if color.upper() not in [c.upper() for c in valid_colors]:
             raise ValueError(f'Invalid color. Must be one of {valid_colors}')
-        self.device.send_command(f':STORage:IMAGe:COLor {color}')
\ No newline at end of file
+        self.device.send_command(f':STORage:IMAGe:COLor {color}')
+
+    def get_image_color(self):
+        """Get image color"""
+        return self.device.query(':STORage:IMAGe:COLor?')
@@ -14,7 +14,7 @@ class SystemCommands:
 
     def get_error(self):
         """Get next error from error queue"""
-        return self.device.query(':SYSTem:ERRor[:NEXT]?')
+        return self.device.query(':SYSTem:ERRor:NEXT?')
 
     def get_gam(self):
         """Get grid amplitude measurement"""
@@ -1,5 +1,36 @@
 """Trace commands for Rigol oscilloscope"""
 
+import numpy as np
+
+DAC_MAX = 16383  # 14-bit arbitrary waveform DAC
+PACKET_POINTS = 16384  # Maximum points per :TRACe:DATA:DAC16 block
+
+def quantize_dac(data, low: float = None, high: float = None):
+    """Map samples to DAC codes (0-16383) as little-endian 16-bit words
+
+    Integer arrays without low/high are taken as DAC codes already. Other
+    data is scaled so that low maps to 0 and high to DAC_MAX (default: the
+    data's own minimum and maximum), rounded and clipped.
+    """
+    data = np.asarray(data)
+    if data.ndim != 1 or not len(data):
+        raise ValueError('Waveform data must be a non-empty 1D array')
+    if np.issubdtype(data.dtype, np.integer) and low is None and high is None:
+        if data.min() < 0 or data.max() > DAC_MAX:
+            raise ValueError(f'DAC codes must be within 0-{DAC_MAX}')
+        return data.astype('<u2')
+    low = float(data.min()) if low is None else low
+    high = float(data.max()) if high is None else high
+    if high <= low:
+        # Constant waveform: hold mid-scale
+        return np.full(len(data), (DAC_MAX + 1) // 2, dtype='<u2')
+    scaled = np.subtract(data, low, dtype=np.float64)
+    scaled *= DAC_MAX / (high - low)
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, 0, DAC_MAX, out=scaled)
+    return scaled.astype('<u2')
+
+
 class TraceCommands:
     def __init__(self, device):
         self.device = device
@@ -30,4 +61,39 @@ class TraceCommands:
 
     def set_data_value(self, trace: int, volatile: bool, points: int, data: str):
         """Set trace data value"""
-        self.device.send_command(f':TRACe{trace}:DATA:VALue {1 if volatile else 0},{points},{data}')
\ No newline at end of file
+        self.device.send_command(f':TRACe{trace}:DATA:VALue {1 if volatile else 0},{points},{data}')
+
+    def upload(self, trace: int, data, low: float = None, high: float = None, verify: bool = True):
+        """Upload an arbitrary waveform to volatile memory as binary DAC16 blocks
+
+        The samples are quantized in one vectorized pass and sent as blocks
+        of at most PACKET_POINTS points (CON for all but the last, END for
+        the last), with no text formatting.
+
+        Args:
+            trace: Generator trace (1|2)
+            data: NumPy array of samples or DAC codes (see quantize_dac)
+            low: Sample value mapped to DAC code 0
+            high: Sample value mapped to DAC code 16383
+            verify: Check that :TRACe:DATA:LOAD? reports every packet loaded
+
+        Returns:
+            bool: True if all packets were sent (and verified)
+        """
+        codes = quantize_dac(data, low, high)
+        packets = -(-len(codes) // PACKET_POINTS)
+        for packet in range(packets):
+            flag = 'END' if packet == packets - 1 else 'CON'
+            chunk = codes[packet * PACKET_POINTS:(packet + 1) * PACKET_POINTS]
+            if not self.device.send_binary(f':TRACe{trace}:DATA:DAC16 VOLATILE,{flag},', chunk):
+                return False
+        if not verify:
+            return True
+        loaded = self.get_data_load(trace)
+        try:
+            if int(float(loaded)) == packets:
+                return True
+        except ValueError:
+            pass
+        print(f"Failed to upload trace: {packets} packets sent, load reports {loaded!r}")
+        return False
@@ -26,7 +26,7 @@ class TriggerCommands:
     def set_sweep(self, sweep: str):
         """Set trigger sweep mode"""
         valid_sweeps = ['AUTO', 'NORMal', 'SINGle']
-        if sweep.upper() not in valid_sweeps:
+        if sweep.upper() not in [s.upper() for s in valid_sweeps]:
             raise ValueError(f'Invalid sweep. Must be one of {valid_sweeps}')
         self.device.send_command(f':TRIGger:SWEep {sweep}')
 
@@ -1,34 +1,309 @@
 """Waveform commands for Rigol oscilloscope"""
 
+import numpy as np
+
+# NumPy dtypes for the binary :WAVeform:DATA? formats
+FORMAT_DTYPES = {
+    'BYTE': np.dtype(np.uint8),
+    'WORD': np.dtype('<u2'),
+}
+
+# Maximum number of points per :WAVeform:DATA? read in RAW mode
+MAX_CHUNK_POINTS = {
+    'BYTE': 250000,
+    'WORD': 125000,
+    'ASCII': 15625,
+}
+
+class WaveformPreamble:
+    """Parsed :WAVeform:PREamble? reply with vectorized scaling helpers"""
+
+    FORMATS = ['WORD', 'BYTE', 'ASCII']
+    TYPES = ['NORMAL', 'MAXIMUM', 'RAW']
+
+    def __init__(self, format: str, type: str, points: int, count: int,
+                 x_increment: float, x_origin: float, x_reference: float,
+                 y_increment: float, y_origin: float, y_reference: float):
+        self.format = format
+        self.type = type
+        self.points = points
+        self.count = count
+        self.x_increment = x_increment
+        self.x_origin = x_origin
+        self.x_reference = x_reference
+        self.y_increment = y_increment
+        self.y_origin = y_origin
+        self.y_reference = y_reference
+
+    @classmethod
+    def from_string(cls, preamble: str):
+        """Parse the 10 comma-separated preamble fields"""
+        fields = preamble.strip().split(',')
+        if len(fields) != 10:
+            raise ValueError(f'Invalid preamble: {preamble!r}')
+        return cls(cls.FORMATS[int(fields[0])], cls.TYPES[int(fields[1])],
+                   int(fields[2]), int(fields[3]), *(float(f) for f in fields[4:]))
+
+    def to_volts(self, codes, dtype=np.float64, out=None):
+        """Convert raw sample codes to volts in one vectorized pass
+
+        Args:
+            codes: uint8/uint16 sample codes (ASCii data is already in volts)
+            dtype: Output dtype, np.float32 halves memory
+            out: Optional preallocated output array
+
+        Returns:
+            numpy.ndarray: Voltages
+        """
+        codes = np.asarray(codes)
+        if codes.dtype.kind == 'f':
+            if out is None:
+                return codes.astype(dtype, copy=False)
+            out[...] = codes
+            return out
+        dtype = np.dtype(dtype if out is None else out.dtype)
+        out = np.multiply(codes, dtype.type(self.y_increment), out=out, dtype=dtype)
+        out -= dtype.type((self.y_origin + self.y_reference) * self.y_increment)
+        return out
+
+    def time_axis(self, points: int = None, start: int = 0, dtype=np.float64):
+        """Get sample times in seconds for points starting at index start"""
+        points = self.points if points is None else points
+        t = np.arange(start, start + points, dtype=dtype)
+        t -= self.x_reference
+        t *= self.x_increment
+        t += self.x_origin
+        return t
+
+    def __repr__(self):
+        return (f'WaveformPreamble(format={self.format!r}, type={self.type!r}, points={self.points}, '
+                f'x_increment={self.x_increment}, y_increment={self.y_increment})')
+
+
+class WaveformCapture:
+    """Samples of several sources from the same acquisition
+
+    data holds one row per source (channels x samples) of raw codes, or volts
+    for ASCii. All rows share the time axis of the first source.
+    """
+
+    def __init__(self, sources, data, preambles):
+        self.sources = list(sources)
+        self.data = data
+        self.preambles = preambles
+        self.y_increment = np.array([p.y_increment for p in preambles])
+        self.y_origin = np.array([p.y_origin for p in preambles])
+        self.y_reference = np.array([p.y_reference for p in preambles])
+
+    @property
+    def time(self):
+        """Shared sample times in seconds"""
+        return self.preambles[0].time_axis(self.data.shape[1])
+
+    def to_volts(self, dtype=np.float64, out=None):
+        """Scale all rows to volts in one broadcast pass"""
+        if self.data.dtype.kind == 'f':
+            return self.preambles[0].to_volts(self.data, dtype=dtype, out=out)
+        dtype = np.dtype(dtype if out is None else out.dtype)
+        out = np.multiply(self.data, self.y_increment.astype(dtype)[:, None], out=out, dtype=dtype)
+        out -= ((self.y_origin + self.y_reference) * self.y_increment).astype(dtype)[:, None]
+        return out
+
+    def __getitem__(self, source: str):
+        """Row of one source, e.g. capture['CHANnel2']"""
+        sources = [s.upper() for s in self.sources]
+        return self.data[sources.index(source.upper())]
+
+    def __repr__(self):
+        return f'WaveformCapture(sources={self.sources}, points={self.data.shape[1]})'
+
+
 class WaveformCommands:
     def __init__(self, device):
         self.device = device
+        self._preamble = None
+        self._preamble_generation = None
 
     def set_source(self, source: str):
         """Set waveform source (CHANnel1|CHANnel2|CHANnel3|CHANnel4|MATH|FFT|LA)"""
         valid_sources = ['CHANnel1', 'CHANnel2', 'CHANnel3', 'CHANnel4', 'MATH', 'FFT', 'LA']
-        if source.upper() not in valid_sources:
+        if source.upper() not in [s.upper() for s in valid_sources]:
             raise ValueError(f'Invalid source. Must be one of {valid_sources}')
         self.device.send_command(f':WAVeform:SOURce {source}')
 
     def set_mode(self, mode: str):
         """Set waveform mode (NORMal|MAXimum|RAW)"""
         valid_modes = ['NORMal', 'MAXimum', 'RAW']
-        if mode.upper() not in valid_modes:
+        if mode.upper() not in [m.upper() for m in valid_modes]:
             raise ValueError(f'Invalid mode. Must be one of {valid_modes}')
         self.device.send_command(f':WAVeform:MODE {mode}')
 
     def set_format(self, format: str):
         """Set waveform format (WORD|BYTE|ASCii)"""
         valid_formats = ['WORD', 'BYTE', 'ASCii']
-        if format.upper() not in valid_formats:
+        if format.upper() not in [f.upper() for f in valid_formats]:
             raise ValueError(f'Invalid format. Must be one of {valid_formats}')
         self.device.send_command(f':WAVeform:FORMat {format}')
 
+    def get_format(self):
+        """Get waveform format (WORD|BYTE|ASC)"""
+        return self.device.query(':WAVeform:FORMat?').upper()
+
     def get_data(self):
         """Get waveform data"""
         return self.device.query(':WAVeform:DATA?')
 
+    def get_data_array(self):
+        """Get waveform data as a NumPy array
+
+        BYTE and WORD data is read as a binary block and wrapped with
+        np.frombuffer without any text decoding or copying. The format comes
+        from the cached preamble, so it follows *RST and setup recalls.
+
+        Returns:
+            numpy.ndarray: uint8 (BYTE), uint16 (WORD) or float64 (ASCii) samples
+        """
+        format = self.get_parsed_preamble().format
+        data = self.device.query_binary(':WAVeform:DATA?')
+        return self._to_array(data, format)
+
+    def get_volts(self, dtype=np.float64):
+        """Get screen waveform data scaled to volts
+
+        Uses the cached preamble, so only the data block is transferred while
+        the scope settings are unchanged.
+
+        Args:
+            dtype: Output dtype, np.float32 halves memory
+
+        Returns:
+            numpy.ndarray: Voltages
+        """
+        codes = self.get_data_array()
+        return self.get_parsed_preamble().to_volts(codes, dtype=dtype)
+
+    def read_raw(self, source: str, format: str = 'BYTE', out=None):
+        """Read the full acquisition memory of a source
+
+        Stops acquisition, switches to RAW mode and walks the whole memory in
+        the largest chunk the format allows, filling one preallocated array.
+
+        Args:
+            source: Waveform source (e.g., CHANnel1)
+            format: Waveform format (BYTE|WORD|ASCii)
+            out: Optional preallocated array with at least as many points as memory
+
+        Returns:
+            numpy.ndarray: Raw sample codes (BYTE/WORD) or volts (ASCii)
+        """
+        points = self.prepare_raw(source, format)
+        if out is None:
+            out = np.empty(points, dtype=FORMAT_DTYPES.get(format.upper(), np.float64))
+        elif len(out) < points:
+            raise ValueError(f'Output array too small for {points} points')
+        # Binary chunks are received straight into out when the dtype matches
+        direct = out.dtype == FORMAT_DTYPES.get(format.upper(), object) and out.flags.c_contiguous
+        for start, chunk in self.iter_chunks(points, format, out=out if direct else None):
+            if not direct:
+                out[start:start + len(chunk)] = chunk
+        return out[:points]
+
+    def capture(self, sources, format: str = 'BYTE', mode: str = 'RAW', out=None):
+        """Read several sources from one frozen acquisition
+
+        Acquisition is stopped once and mode/format are set once, so the
+        only per-source command is :WAVeform:SOURce. Each source is read
+        straight into its row of a single 2D array.
+
+        Args:
+            sources: Waveform sources (e.g., ['CHANnel1', 'CHANnel2'])
+            format: Waveform format (BYTE|WORD|ASCii)
+            mode: Waveform mode (NORMal for the screen, RAW for the full memory)
+            out: Optional preallocated (sources x points) array
+
+        Returns:
+            WaveformCapture: 2D data, shared time axis and per-source scaling
+        """
+        sources = list(sources)
+        if not sources:
+            raise ValueError('At least one source is required')
+        self.device.stop()
+        self.set_mode(mode)
+        self.set_format(format)
+        dtype = FORMAT_DTYPES.get(format.upper(), np.float64)
+        preambles = []
+        for row, source in enumerate(sources):
+            self.set_source(source)
+            preamble = self.get_parsed_preamble()
+            if out is None:
+                out = np.empty((len(sources), preamble.points), dtype=dtype)
+            elif out.shape[0] < len(sources) or out.shape[1] < preamble.points:
+                raise ValueError(f'Output array too small for {len(sources)} x {preamble.points} points')
+            if preambles and preamble.points != preambles[0].points:
+                raise ValueError(f'{source} has {preamble.points} points, '
+                                 f'{sources[0]} has {preambles[0].points}')
+            preambles.append(preamble)
+            target = out[row, :preamble.points]
+            direct = target.dtype == FORMAT_DTYPES.get(format.upper(), object) and target.flags.c_contiguous
+            for start, chunk in self.iter_chunks(preamble.points, format, out=target if direct else None):
+                if not direct:
+                    target[start:start + len(chunk)] = chunk
+        return WaveformCapture(sources, out[:len(sources), :preambles[0].points], preambles)
+
+    def iter_raw(self, source: str, format: str = 'BYTE', chunk_size: int = None):
+        """Read the full acquisition memory of a source chunk by chunk
+
+        Generator version of read_raw that yields each chunk as soon as it
+        arrives, keeping memory bounded to one chunk.
+
+        Yields:
+            tuple: (start index, numpy.ndarray chunk)
+        """
+        points = self.prepare_raw(source, format)
+        yield from self.iter_chunks(points, format, chunk_size)
+
+    def prepare_raw(self, source: str, format: str):
+        """Freeze acquisition and configure a RAW read of a source
+
+        Returns:
+            int: Points in the acquisition memory, to pass to iter_chunks
+        """
+        self.device.stop()
+        self.set_source(source)
+        self.set_mode('RAW')
+        self.set_format(format)
+        return self.get_parsed_preamble().points
+
+    def iter_chunks(self, points: int, format: str, chunk_size: int = None, out=None):
+        """Read [0, points) of the configured source in chunks of at most the format's maximum size
+
+        Call prepare_raw first (iter_raw does both). If out is given each
+        chunk is received into out[start:stop].
+
+        Yields:
+            tuple: (start index, numpy.ndarray chunk)
+        """
+        max_chunk = MAX_CHUNK_POINTS[format.upper()]
+        chunk_size = min(chunk_size or max_chunk, max_chunk)
+        for start in range(0, points, chunk_size):
+            stop = min(start + chunk_size, points)
+            self.set_start(start + 1)
+            self.set_stop(stop)
+            target = out[start:stop] if out is not None else None
+            chunk = self._to_array(self.device.query_binary(':WAVeform:DATA?', target), format)
+            if len(chunk) != stop - start:
+                raise ConnectionError(f'Incomplete waveform data at point {start + 1}: '
+                                      f'expected {stop - start}, got {len(chunk)}')
+            yield start, chunk
+
+    @staticmethod
+    def _to_array(data, format: str):
+        """Convert a :WAVeform:DATA? block payload to a NumPy array"""
+        dtype = FORMAT_DTYPES.get(format.upper())
+        if dtype is None:
+            return np.fromstring(bytes(data).decode('ascii'), sep=',')
+        return np.frombuffer(data, dtype=dtype, count=memoryview(data).nbytes // dtype.itemsize)
+
     def get_x_increment(self):
         """Get X increment between data points"""
         return float(self.device.query(':WAVeform:XINCrement?'))
@@ -63,4 +338,16 @@ class WaveformCommands:
 
     def get_preamble(self):
         """Get waveform preamble information"""
-        return self.device.query(':WAVeform:PREamble?')
\ No newline at end of file
+        return self.device.query(':WAVeform:PREamble?')
+
+    def get_parsed_preamble(self, refresh: bool = False):
+        """Get waveform preamble as a WaveformPreamble
+
+        The parsed preamble is cached and reused until a setting is changed
+        through this interface. Use refresh after front-panel changes.
+        """
+        generation = self.device.settings_generation
+        if refresh or self._preamble is None or self._preamble_generation != generation:
+            self._preamble = WaveformPreamble.from_string(self.get_preamble())
+            self._preamble_generation = generation
+        return self._preamble
\ No newline at end of file
@@ -0,0 +1,183 @@
+# Host-side FFT engine with the scope's FFT window and unit options
+
+from collections import OrderedDict
+import numpy as np
+
+# Window names as used by MathCommands.set_fft_window and their cosine-sum coefficients
+WINDOWS = {
+    'RECTANGLE': (1.0,),
+    'HANNING': (0.5, 0.5),
+    'HAMMING': (0.54, 0.46),
+    'BLACKMAN': (0.42, 0.5, 0.08),
+    'FLATTOP': (0.21557895, 0.41663158, 0.277263158, 0.083578947, 0.006947368),
+}
+WINDOW_NAMES = ['RECTangle', 'HANNing', 'HAMMing', 'BLACkman', 'FLATtop']
+
+# Units as used by MathCommands.set_fft_unit
+UNITS = ['VRMS', 'DB']
+
+def window_key(window: str) -> str:
+    """Match a full or short window name (e.g. 'HANN', 'hanning') to a WINDOWS key"""
+    name = window.upper()
+    for key, short in zip(WINDOWS, WINDOW_NAMES):
+        if name in (key, ''.join(c for c in short if c.isupper())):
+            return key
+    raise ValueError(f'Invalid window. Must be one of {WINDOW_NAMES}')
+
+
+class Spectrum:
+    """Single-sided amplitude spectrum, one row per frame for batches"""
+
+    def __init__(self, frequency, values, unit: str, window: str, averages: int = 1):
+        self.frequency = frequency
+        self.values = values
+        self.unit = unit
+        self.window = window
+        self.averages = averages
+
+    def peak(self, min_frequency: float = 0.0):
+        """(frequency, value) of the largest bin at or above min_frequency (per row for batches)"""
+        start = int(np.searchsorted(self.frequency, min_frequency))
+        index = np.argmax(self.values[..., start:], axis=-1) + start
+        return self.frequency[index], np.take_along_axis(
+            self.values, np.expand_dims(index, -1), axis=-1).squeeze(-1)
+
+    def __repr__(self):
+        return (f'Spectrum(bins={self.values.shape[-1]}, unit={self.unit!r}, '
+                f'window={self.window!r}, averages={self.averages})')
+
+
+class FFTEngine:
+    """Vectorized amplitude spectra of waveform arrays
+
+    Window coefficients are computed once per length and reused. A 2D input
+    (frames x samples) is transformed in a single call.
+
+    Args:
+        window: Window name (RECTangle|HANNing|HAMMing|BLACkman|FLATtop)
+        unit: Output unit (VRMS|DB), DB is dBV rms
+        cache_size: Number of window lengths kept in the cache
+    """
+
+    def __init__(self, window: str = 'HANNing', unit: str = 'DB', cache_size: int = 4):
+        self.window = window_key(window)
+        if unit.upper() not in UNITS:
+            raise ValueError(f'Invalid unit. Must be one of {UNITS}')
+        self.unit = unit.upper()
+        self.cache_size = cache_size
+        self._windows = OrderedDict()
+        self._power_sum = None
+        self._power_count = 0
+        self._sample_interval = None
+        self._points = None
+
+    def get_window(self, points: int, window: str = None):
+        """Get (coefficients, coherent gain) of a window, cached per length"""
+        key = (window_key(window) if window else self.window, points)
+        cached = self._windows.get(key)
+        if cached is not None:
+            self._windows.move_to_end(key)
+            return cached
+        coefficients = WINDOWS[key[0]]
+        if len(coefficients) == 1:
+            w = np.ones(points)
+        else:
+            # Periodic window, the usual choice for spectral analysis
+            phase = np.arange(points) * (2 * np.pi / points)
+            w = np.full(points, coefficients[0])
+            for k, a in enumerate(coefficients[1:], start=1):
+                w += (-1) ** k * a * np.cos(k * phase)
+        cached = self._windows[key] = (w, w.sum() / points)
+        while len(self._windows) > self.cache_size:
+            self._windows.popitem(last=False)
+        return cached
+
+    def frequencies(self, points: int, sample_interval: float):
+        """Bin frequencies in Hz of a points-long record"""
+        return np.fft.rfftfreq(points, sample_interval)
+
+    def power(self, data, window: str = None, overwrite: bool = False):
+        """Single-sided rms power (V^2) per bin of a 1D record or each row of a 2D stack
+
+        Args:
+            data: Volts, shape (samples,) or (frames, samples)
+            window: Override the engine's window
+            overwrite: Apply the window in place when data is a float64 array
+        """
+        data = np.asarray(data)
+        points = data.shape[-1]
+        w, gain = self.get_window(points, window)
+        if overwrite and data.dtype == np.float64:
+            data *= w
+            windowed = data
+        else:
+            windowed = np.multiply(data, w, dtype=np.float64)
+        spectrum = np.fft.rfft(windowed, axis=-1)
+        del windowed
+        power = spectrum.real ** 2
+        power += spectrum.imag ** 2
+        del spectrum
+        # Peak amplitude 2|X|/(N*gain) -> rms amplitude squared is 2|X|^2/(N*gain)^2
+        power *= 2.0 / (points * gain) ** 2
+        power[..., 0] /= 2  # DC has no rms factor
+        if points % 2 == 0:
+            power[..., -1] /= 2  # Neither does the Nyquist bin
+        return power
+
+    def spectrum(self, data, sample_interval: float, window: str = None, average: bool = False,
+                 overwrite: bool = False):
+        """Amplitude spectrum of a record or a stack of frames
+
+        Args:
+            data: Volts, shape (samples,) or (frames, samples)
+            sample_interval: Seconds between samples (WaveformPreamble.x_increment)
+            window: Override the engine's window
+            average: Power-average the frames of a 2D input into one spectrum
+            overwrite: Apply the window in place when data is a float64 array
+
+        Returns:
+            Spectrum: One row per frame, or a single row when averaged
+        """
+        points = np.shape(data)[-1]
+        power = self.power(data, window, overwrite)
+        averages = 1
+        if average and power.ndim == 2:
+            averages = power.shape[0]
+            power = power.mean(axis=0)
+        return self._to_spectrum(power, points, sample_interval, window, averages)
+
+    def accumulate(self, data, sample_interval: float, window: str = None):
+        """Add frames (1D or 2D) to the running power average"""
+        self._points = np.shape(data)[-1]
+        power = self.power(data, window)
+        frames = power.shape[0] if power.ndim == 2 else 1
+        power = power.sum(axis=0) if power.ndim == 2 else power
+        if self._power_sum is None or self._power_sum.shape != power.shape:
+            self._power_sum = np.zeros_like(power)
+            self._power_count = 0
+        self._power_sum += power
+        self._power_count += frames
+        self._sample_interval = sample_interval
+        return self._power_count
+
+    def averaged(self):
+        """Spectrum of the frames added with accumulate()"""
+        if not self._power_count:
+            raise ValueError('No frames accumulated')
+        return self._to_spectrum(self._power_sum / self._power_count, self._points,
+                                 self._sample_interval, None, self._power_count)
+
+    def reset(self):
+        """Clear the running average"""
+        self._power_sum = None
+        self._power_count = 0
+
+    def _to_spectrum(self, power, points: int, sample_interval: float, window: str, averages: int):
+        frequency = self.frequencies(points, sample_interval)
+        if self.unit == 'DB':
+            np.maximum(power, 1e-30, out=power)
+            values = np.log10(power, out=power)
+            values *= 10.0
+        else:
+            values = np.sqrt(power, out=power)
+        return Spectrum(frequency, values, self.unit, window_key(window) if window else self.window, averages)
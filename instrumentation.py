@@ -0,0 +1,171 @@
+"""Per-command timing instrumentation for Rigol oscilloscope transports"""
+
+import bisect
+import json
+import threading
+import time
+
+# Upper bounds of the latency histogram buckets in seconds (10 us .. ~10 s, doubling)
+BUCKETS = [1e-5 * 2 ** i for i in range(21)]
+
+def command_header(command: str) -> str:
+    """Header used to group statistics, e.g. ':MEASure:ITEM? VPP,CHANnel1' -> ':MEASure:ITEM?'
+
+    Compound messages are grouped by their sorted set of headers, e.g.
+    ':TIMebase:SCALe 0.001;:CHANnel1:SCALe 1' -> ':CHANnel1:SCALe;:TIMebase:SCALe'.
+    """
+    headers = {part.strip().partition(' ')[0] for part in command.split(';') if part.strip()}
+    return ';'.join(sorted(headers))
+
+
+class CommandStats:
+    """Latency histogram and counters for one SCPI header"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.histogram = [0] * (len(BUCKETS) + 1)  # Last bucket counts overflow
+
+    def add(self, seconds: float, bytes_out: int, bytes_in: int):
+        self.count += 1
+        self.bytes_out += bytes_out
+        self.bytes_in += bytes_in
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.histogram[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def percentile(self, fraction: float):
+        """Approximate latency percentile (upper bound of its bucket, capped at the maximum)"""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target:
+                return min(BUCKETS[index], self.max) if index < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'retries': self.retries,
+            'bytes_out': self.bytes_out,
+            'bytes_in': self.bytes_in,
+            'total_s': self.total,
+            'mean_s': self.total / self.count if self.count else None,
+            'min_s': self.min,
+            'p50_s': self.percentile(0.5),
+            'p95_s': self.percentile(0.95),
+            'max_s': self.max,
+            'histogram': {f'{bound:.6g}': count
+                          for bound, count in zip(BUCKETS + [float('inf')], self.histogram) if count},
+        }
+
+
+class Instrumentation:
+    """Collects per-header latency histograms, byte counts, timeouts and retries
+
+    Install on a scope with RigolScope.enable_instrumentation(). Any object
+    with the same record/record_error/record_retry methods can be used instead.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.started = time.time()
+        self._export_thread = None
+        self._export_stop = None
+
+    def record(self, command: str, seconds: float, bytes_out: int, bytes_in: int = 0):
+        """Record a completed transfer"""
+        with self.lock:
+            self._stats(command).add(seconds, bytes_out, bytes_in)
+
+    def record_error(self, command: str, error: Exception):
+        """Record a failed transfer, counting timeouts separately"""
+        with self.lock:
+            stats = self._stats(command)
+            stats.errors += 1
+            if isinstance(error, TimeoutError) or 'timeout' in str(error).lower():
+                stats.timeouts += 1
+
+    def record_retry(self, command: str):
+        """Record a reconnect or retry after a failed transfer"""
+        with self.lock:
+            self._stats(command).retries += 1
+
+    def reset(self):
+        """Forget all statistics"""
+        with self.lock:
+            self.stats = {}
+            self.started = time.time()
+
+    def snapshot(self):
+        """Get statistics per header as plain dictionaries"""
+        with self.lock:
+            return {
+                'started': self.started,
+                'elapsed_s': time.time() - self.started,
+                'commands': {header: stats.to_dict() for header, stats in sorted(self.stats.items())},
+            }
+
+    def to_text(self):
+        """Format the snapshot as a table, slowest total time first"""
+        snapshot = self.snapshot()
+        lines = [f"{'header':32s} {'count':>7s} {'mean ms':>9s} {'p95 ms':>9s} {'max ms':>9s} "
+                 f"{'out B':>10s} {'in B':>12s} {'err':>4s} {'tmo':>4s}"]
+        rows = sorted(snapshot['commands'].items(), key=lambda item: item[1]['total_s'], reverse=True)
+        for header, stats in rows:
+            mean = (stats['mean_s'] or 0) * 1e3
+            p95 = (stats['p95_s'] or 0) * 1e3
+            lines.append(f"{header[:32]:32s} {stats['count']:7d} {mean:9.3f} {p95:9.3f} "
+                         f"{stats['max_s'] * 1e3:9.3f} {stats['bytes_out']:10d} {stats['bytes_in']:12d} "
+                         f"{stats['errors']:4d} {stats['timeouts']:4d}")
+        return '\n'.join(lines)
+
+    def export(self, path: str, format: str = 'json'):
+        """Write the current snapshot to a file (json|text)"""
+        if format.lower() not in ['json', 'text']:
+            raise ValueError("Invalid format. Must be one of ['json', 'text']")
+        content = json.dumps(self.snapshot(), indent=2) if format.lower() == 'json' else self.to_text()
+        with open(path, 'w') as f:
+            f.write(content + '\n')
+
+    def start_export(self, path: str, interval: float = 60.0, format: str = 'json'):
+        """Export the snapshot to path every interval seconds from a background thread"""
+        self.stop_export()
+        self._export_stop = threading.Event()
+
+        def run(stop):
+            while not stop.wait(interval):
+                try:
+                    self.export(path, format)
+                except OSError as e:
+                    print(f"Failed to export instrumentation: {str(e)}")
+        self._export_thread = threading.Thread(target=run, args=(self._export_stop,), daemon=True)
+        self._export_thread.start()
+
+    def stop_export(self):
+        """Stop periodic export"""
+        if self._export_thread:
+            self._export_stop.set()
+            self._export_thread.join()
+            self._export_thread = None
+
+    def _stats(self, command: str):
+        header = command_header(command)
+        stats = self.stats.get(header)
+        if stats is None:
+            stats = self.stats[header] = CommandStats()
+        return stats
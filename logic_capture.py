@@ -0,0 +1,227 @@
+# Bit-packed logic analyzer (LA) captures with transition indexing
+
+import numpy as np
+
+BLOCK_SAMPLES = 1 << 20  # Samples unpacked at a time, keeps temporaries to a few MB
+LEVELS = {'H': 1, '1': 1, 'L': 0, '0': 0}
+
+def channel_index(channel) -> int:
+    """LA line number from 3, 'D3' or 'd3'"""
+    if isinstance(channel, str):
+        channel = channel.upper().lstrip('D')
+    return int(channel)
+
+def parse_pattern(pattern, channels: int = 16):
+    """Parse a pattern into {channel: level}
+
+    Args:
+        pattern: String of H/L/X (or 1/0/X) per line starting at D0, as in
+            :TRIGger:PATTern, e.g. 'HLXXH' for D0=1, D1=0, D4=1; or a dict
+            such as {'D3': 1, 5: 0}
+
+    Returns:
+        dict: Line number -> required level (0|1); X lines are omitted
+    """
+    if isinstance(pattern, dict):
+        levels = {channel_index(channel): int(bool(level)) for channel, level in pattern.items()}
+    else:
+        levels = {}
+        for channel, symbol in enumerate(pattern.replace(',', '').upper()):
+            if symbol in LEVELS:
+                levels[channel] = LEVELS[symbol]
+            elif symbol != 'X':
+                raise ValueError(f"Invalid pattern level {symbol!r}. Must be one of ['H', 'L', 'X', '1', '0']")
+    for channel in levels:
+        if not 0 <= channel < channels:
+            raise ValueError(f'Invalid channel D{channel}. Must be D0-D{channels - 1}')
+    return levels
+
+
+class LogicCapture:
+    """LA samples stored as one bit-packed row per line
+
+    bits has shape (channels, ceil(samples / 8)) with sample i of line n at
+    bit 7 - i % 8 of bits[n, i // 8] (np.packbits order). For 16 lines this is
+    exactly the size of the raw WORD data. Transitions of each line are
+    computed from the packed bytes the first time they are needed and cached
+    as int32 sample positions (int64 above 2**31 samples).
+
+    Args:
+        samples: Number of samples
+        channels: Number of lines (8 for BYTE data, 16 for WORD)
+        sample_interval: Seconds per sample
+        x_origin: Time of the first sample
+    """
+
+    def __init__(self, samples: int, channels: int = 16, sample_interval: float = 1.0, x_origin: float = 0.0):
+        self.samples = samples
+        self.channels = channels
+        self.sample_interval = sample_interval
+        self.x_origin = x_origin
+        self.bits = np.zeros((channels, (samples + 7) // 8), dtype=np.uint8)
+        self.index_dtype = np.int32 if samples < 2 ** 31 else np.int64
+        self._filled = 0
+        self._pending = np.zeros(0, dtype=np.uint16)
+        self._transitions = {}
+
+    @classmethod
+    def from_codes(cls, codes, channels: int = None, sample_interval: float = 1.0, x_origin: float = 0.0):
+        """Pack an array of LA codes (uint8 for D0-D7, uint16 for D0-D15)"""
+        codes = np.asarray(codes)
+        capture = cls(len(codes), channels or min(codes.dtype.itemsize * 8, 16), sample_interval, x_origin)
+        for start in range(0, len(codes), BLOCK_SAMPLES):
+            capture.append(codes[start:start + BLOCK_SAMPLES])
+        return capture.finish()
+
+    def append(self, codes):
+        """Pack the next chunk of LA codes; chunks may be any length"""
+        codes = np.asarray(codes)
+        if self._filled * 8 + len(self._pending) + len(codes) > self.samples:
+            raise ValueError(f'More than {self.samples} samples appended')
+        if len(self._pending):
+            codes = np.concatenate([self._pending.astype(codes.dtype), codes])
+        whole = len(codes) // 8 * 8
+        for start in range(0, whole, BLOCK_SAMPLES):
+            block = codes[start:min(start + BLOCK_SAMPLES, whole)]
+            self._pack(block, self._filled)
+            self._filled += len(block) // 8
+        self._pending = codes[whole:].copy()
+        return self
+
+    def finish(self):
+        """Pack the last partial byte after the final append"""
+        if len(self._pending):
+            self._pack(self._pending, self._filled)
+            self._filled += 1
+            self._pending = self._pending[:0]
+        self._transitions = {}
+        return self
+
+    def _pack(self, codes, byte_offset: int):
+        """Split codes into lines and pack each line's bits from byte_offset"""
+        codes = np.ascontiguousarray(codes, dtype=codes.dtype.newbyteorder('<'))
+        # Little bit order makes column n of the unpacked bytes line Dn
+        lines = np.unpackbits(codes.view(np.uint8).reshape(len(codes), -1), axis=1, bitorder='little')
+        packed = np.packbits(lines[:, :self.channels], axis=0).T
+        self.bits[:, byte_offset:byte_offset + packed.shape[1]] = packed
+
+    @property
+    def nbytes(self):
+        """Memory used by the packed bits and the cached transition index"""
+        return self.bits.nbytes + sum(t.nbytes for t in self._transitions.values())
+
+    def channel(self, channel, start: int = 0, stop: int = None):
+        """Levels of one line as a bool array (expands to a byte per sample, so slice deep captures)"""
+        stop = self.samples if stop is None else min(stop, self.samples)
+        row = self.bits[channel_index(channel), start // 8:(stop + 7) // 8]
+        offset = start % 8
+        return np.unpackbits(row, count=stop - start + offset)[offset:].astype(bool)
+
+    def level(self, channel, index):
+        """Level of a line at one or more sample indexes"""
+        index = np.asarray(index)
+        return (self.bits[channel_index(channel), index >> 3] >> (7 - (index & 7))) & 1
+
+    def transitions(self, channel):
+        """Sample indexes where a line changes level (first sample of the new level)"""
+        channel = channel_index(channel)
+        if channel not in self._transitions:
+            self._transitions[channel] = self._changes(self.bits[channel])
+        return self._transitions[channel]
+
+    def edges(self, channel, rising: bool = None):
+        """Transitions of a line, optionally only rising (True) or falling (False)"""
+        changes = self.transitions(channel)
+        if rising is None:
+            return changes
+        return changes[self.level(channel, changes) == rising]
+
+    def match(self, pattern):
+        """Bit-packed mask (np.packbits order) of the samples matching a pattern"""
+        levels = parse_pattern(pattern, self.channels)
+        mask = np.full(self.bits.shape[1], 0xff, dtype=np.uint8)
+        for channel, level in levels.items():
+            mask &= self.bits[channel] if level else ~self.bits[channel]
+        return mask
+
+    def find_pattern(self, pattern, entries: bool = True):
+        """Sample indexes matching a pattern across lines (see parse_pattern)
+
+        Args:
+            entries: Only the first sample of each matching run (like a pattern
+                trigger); False returns every matching sample
+
+        Returns:
+            numpy.ndarray: Sample indexes
+        """
+        mask = self.match(pattern)
+        if not entries:
+            return self._set_bits(mask)
+        changes = self._changes(mask)
+        starts = changes[self._bit(mask, changes) == 1]
+        if self.samples and self._bit(mask, 0):
+            starts = np.r_[np.zeros(1, self.index_dtype), starts]
+        return starts
+
+    def count_pattern(self, pattern):
+        """Number of samples matching a pattern, counted on the packed bytes"""
+        mask = self.match(pattern)
+        if self.samples % 8:
+            mask[-1] &= 0xff << (8 - self.samples % 8) & 0xff
+        return int(np.unpackbits(mask).sum())
+
+    def times(self, index):
+        """Times in seconds of sample indexes"""
+        return self.x_origin + np.asarray(index, dtype=np.float64) * self.sample_interval
+
+    @staticmethod
+    def _bit(row, index):
+        return (row[np.asarray(index) >> 3] >> (7 - (np.asarray(index) & 7))) & 1
+
+    def _set_bits(self, row):
+        """Indexes of set bits, unpacking only the nonzero bytes"""
+        found = []
+        for start in range(0, len(row), BLOCK_SAMPLES // 8):
+            block = row[start:start + BLOCK_SAMPLES // 8]
+            nonzero = np.flatnonzero(block)
+            byte, bit = np.nonzero(np.unpackbits(block[nonzero]).reshape(-1, 8))
+            found.append(((nonzero[byte] + start) * 8 + bit).astype(self.index_dtype))
+        found = np.concatenate(found) if found else np.zeros(0, self.index_dtype)
+        return found[found < self.samples]
+
+    def _changes(self, row):
+        """Indexes where a packed bit row differs from the previous sample"""
+        if not len(row):
+            return np.zeros(0, self.index_dtype)
+        # Bit i of diff is sample i XOR sample i + 1 (the next byte's MSB follows each LSB)
+        carry = np.zeros_like(row)
+        carry[:-1] = row[1:] >> 7
+        diff = row ^ ((row << 1) | carry)
+        changes = self._set_bits(diff) + 1
+        return changes[changes < self.samples]
+
+    def __repr__(self):
+        return f'LogicCapture(samples={self.samples}, channels={self.channels}, nbytes={self.nbytes})'
+
+
+def read_logic(scope, format: str = 'WORD', chunk_size: int = None):
+    """Read the full LA memory into a LogicCapture
+
+    Each RAW chunk is packed as it arrives, so the raw codes are never held
+    in memory as a whole.
+
+    Args:
+        scope: Connected RigolScope with the LA enabled
+        format: BYTE for D0-D7, WORD for D0-D15
+    """
+    if format.upper() not in ['BYTE', 'WORD']:
+        raise ValueError("Invalid format. Must be one of ['BYTE', 'WORD']")
+    chunks = scope.waveform.iter_raw('LA', format, chunk_size)
+    start, chunk = next(chunks)
+    preamble = scope.waveform.get_parsed_preamble()
+    capture = LogicCapture(preamble.points, 16 if format.upper() == 'WORD' else 8,
+                           preamble.x_increment, preamble.x_origin)
+    capture.append(chunk)
+    for _, chunk in chunks:
+        capture.append(chunk)
+    return capture.finish()
@@ -1,7 +1,6 @@
 """Main script for measuring 1kHz 3.3Vpp signal on Rigol oscilloscope"""
 
 from rigol_scope import RigolScope
-import time
 
 def main():
     # Create oscilloscope instance and connect via LAN
@@ -19,55 +18,55 @@ def main():
         idn = scope.ieee.get_identification()
         print(f"Device identification: {idn}")
 
-        # Wait for connection to stabilize
-        time.sleep(2)  # Increased wait time
+        # Wait until the scope has processed everything sent so far
+        scope.wait_complete()
 
-        # Basic channel setup
-        scope.channel.set_display(1, True)
-        scope.channel.set_coupling(1, "DC")
-        scope.channel.set_scale(1, 2)
-        
-        # Basic timebase setup
-        scope.timebase.set_main_scale(0.0002)
-        
-        # Basic trigger setup
-        scope.trigger.set_mode("EDGE")
-        scope.trigger.set_edge_source("CHANnel1")
-        scope.trigger.set_edge_slope("POSitive")
-        scope.trigger.set_sweep("AUTO")
-        scope.trigger.set_edge_level(1.0)
+        # Send the whole setup as one batch followed by a single *OPC?
+        with scope.batch():
+            # Basic channel setup
+            scope.channel.set_display(1, True)
+            scope.channel.set_coupling(1, "DC")
+            scope.channel.set_scale(1, 2)
+
+            # Basic timebase setup
+            scope.timebase.set_main_scale(0.0002)
 
-        # Wait for signal to stabilize
-        time.sleep(2)
+            # Basic trigger setup
+            scope.trigger.set_mode("EDGE")
+            scope.trigger.set_edge_source("CHANnel1")
+            scope.trigger.set_edge_slope("POSitive")
+            scope.trigger.set_sweep("AUTO")
+            scope.trigger.set_edge_level(1.0)
+
+        # Wait for a trigger and for the measurements to settle
+        scope.wait_triggered()
+        result = scope.wait_stable_measurement(["VPP", "VRMS", "PERiod"], "CHANnel1")
 
         # Measure frequency
         freq = scope.measure.get_frequency("CHANnel1")
         print(f"Frequency: {freq:.2f} Hz")
 
-        # Measure Vpp
-        vpp = scope.measure.get_measurement("VPP", "CHANnel1")
-        print(f"Vpp: {vpp:.3f} V")
-
-        # Additional measurements
-        vrms = scope.measure.get_measurement("VRMS", "CHANnel1")
-        period = scope.measure.get_measurement("PERiod", "CHANnel1")
-        print(f"Vrms: {vrms:.3f} V")
-        print(f"Period: {period*1000:.3f} ms")
+        # Measure Vpp, Vrms and period in one round-trip if they did not settle
+        if result is None:
+            result = scope.measure.get_measurements(["VPP", "VRMS", "PERiod"], ["CHANnel1"])
+        print(f"Vpp: {result['VPP'][0]:.3f} V")
+        print(f"Vrms: {result['VRMS'][0]:.3f} V")
+        print(f"Period: {result['PERiod'][0]*1000:.3f} ms")
 
 
         # Enable autoscale
         scope.system.set_autoscale(1)
 
-        # Wait for measurements to stabilize
-        time.sleep(1)
+        # Wait for autoscale to finish and the measurements to settle
+        scope.wait_complete()
+        result = scope.wait_stable_measurement(["VPP", "VRMS", "PERiod"], "CHANnel1")
 
         # Additional measurements
-        vpp = scope.measure.get_measurement("VPP", "CHANnel1")
-        print(f"Vpp: {vpp:.3f} V")
-        vrms = scope.measure.get_measurement("VRMS", "CHANnel1")
-        period = scope.measure.get_measurement("PERiod", "CHANnel1")
-        print(f"Vrms: {vrms:.3f} V")
-        print(f"Period: {period*1000:.3f} ms")
+        if result is None:
+            result = scope.measure.get_measurements(["VPP", "VRMS", "PERiod"], ["CHANnel1"])
+        print(f"Vpp: {result['VPP'][0]:.3f} V")
+        print(f"Vrms: {result['VRMS'][0]:.3f} V")
+        print(f"Period: {result['PERiod'][0]*1000:.3f} ms")
 
 
     except Exception as e:
@@ -0,0 +1,380 @@
+# Host-side NumPy implementation of the scope's MEASure items
+
+from functools import cached_property
+import numpy as np
+from commands.measure_commands import VALID_ITEMS
+
+# Default :MEASure:SETup:MAX/MID/MIN thresholds in percent of the amplitude
+DEFAULT_THRESHOLDS = (90.0, 50.0, 10.0)
+
+# Items that need a second source (:MEASure:SETup:DSB / PSB)
+REFERENCE_ITEMS = ['RDELAY', 'FDELAY', 'RPHASE', 'FPHASE']
+
+def canonical_item(item: str) -> str:
+    """Upper-case full item name, e.g. 'vbas' -> 'VBASE', 'PERiod' -> 'PERIOD'"""
+    name = item.upper()
+    for valid in VALID_ITEMS:
+        short = ''.join(c for c in valid if not c.islower())
+        if name in (valid.upper(), short):
+            return valid.upper()
+    raise ValueError(f'Invalid item. Must be one of {VALID_ITEMS}')
+
+
+class MeasurementEngine:
+    """Computes MEASure items over full-memory records or stacks of frames
+
+    Levels follow the scope: top/base come from the voltage histogram and the
+    upper/middle/lower thresholds are the set_setup_max/mid/min percentages of
+    the amplitude above base. An edge must cross from the lower to the upper
+    threshold (or back) to count, and times are taken at interpolated
+    threshold crossings. Period/width items are averaged over every complete
+    cycle in the record rather than the first one on screen.
+
+    Args:
+        sample_interval: Seconds between samples (WaveformPreamble.x_increment)
+        x_origin: Time of the first sample (WaveformPreamble.x_origin)
+        max, mid, min: Threshold percentages as in set_setup_max/mid/min
+        histogram_bins: Bins of the histogram used for top/base
+    """
+
+    def __init__(self, sample_interval: float, x_origin: float = 0.0, max: float = DEFAULT_THRESHOLDS[0],
+                 mid: float = DEFAULT_THRESHOLDS[1], min: float = DEFAULT_THRESHOLDS[2],
+                 histogram_bins: int = 256):
+        self.sample_interval = sample_interval
+        self.x_origin = x_origin
+        self.histogram_bins = histogram_bins
+        self.set_thresholds(max, mid, min)
+
+    @classmethod
+    def from_preamble(cls, preamble, **kwargs):
+        """Engine using the time base of a WaveformPreamble"""
+        x_origin = preamble.x_origin - preamble.x_reference * preamble.x_increment
+        return cls(preamble.x_increment, x_origin, **kwargs)
+
+    def set_thresholds(self, max: float, mid: float, min: float):
+        """Set upper/middle/lower thresholds in percent (scope ranges 7-95, 6-94, 5-93)"""
+        if not (7 <= max <= 95 and 6 <= mid <= 94 and 5 <= min <= 93):
+            raise ValueError('Thresholds out of range (max 7-95, mid 6-94, min 5-93)')
+        if not max > mid > min:
+            raise ValueError('Thresholds must satisfy max > mid > min')
+        self.thresholds = (max, mid, min)
+
+    def compute(self, items, data, reference=None):
+        """Compute measurement items in one pass over the data
+
+        Intermediate results (histogram levels, edge crossings, periods) are
+        computed once and shared by all items that need them.
+
+        Args:
+            items: Measurement items (e.g., ['VPP', 'RTIMe', 'PDUTy'])
+            data: Volts, shape (samples,) or (frames, samples)
+            reference: Second source for RDELay/FDELay/RPHase/FPHase, same shape
+
+        Returns:
+            numpy.ndarray: Structured array with one row per frame and one
+            float field per item (NaN where the item cannot be measured)
+        """
+        items = [items] if isinstance(items, str) else list(items)
+        names = [canonical_item(item) for item in items]
+        analysis = _Analysis(self, data)
+        reference_analysis = _Analysis(self, reference) if reference is not None else None
+        result = np.zeros(analysis.frames, dtype=[(item, 'f8') for item in items])
+        for item, name in zip(items, names):
+            if name in REFERENCE_ITEMS:
+                if reference_analysis is None:
+                    result[item] = np.nan
+                    continue
+                result[item] = analysis.delay(reference_analysis, name)
+            else:
+                result[item] = getattr(analysis, name.lower())
+        return result
+
+
+class _Analysis:
+    """Lazily computed intermediate results of one compute() call"""
+
+    def __init__(self, engine, data):
+        data = np.asarray(data)
+        self.data = data.reshape(1, -1) if data.ndim == 1 else data
+        self.frames, self.points = self.data.shape
+        self.dt = engine.sample_interval
+        self.x_origin = engine.x_origin
+        self.percent = np.array(engine.thresholds) / 100.0
+        self.bins = engine.histogram_bins
+        self.index = np.arange(self.points, dtype=np.int32 if self.points < 2 ** 31 else np.int64)
+
+    # Amplitude items
+
+    @cached_property
+    def vmax(self):
+        return self.data.max(axis=1).astype(np.float64)
+
+    @cached_property
+    def vmin(self):
+        return self.data.min(axis=1).astype(np.float64)
+
+    @cached_property
+    def vpp(self):
+        return self.vmax - self.vmin
+
+    @cached_property
+    def vavg(self):
+        return self.data.mean(axis=1, dtype=np.float64)
+
+    @cached_property
+    def vrms(self):
+        return np.sqrt(np.einsum('ij,ij->i', self.data, self.data, dtype=np.float64) / self.points)
+
+    @cached_property
+    def variance(self):
+        return np.maximum(self.vrms ** 2 - self.vavg ** 2, 0.0)
+
+    @cached_property
+    def _levels(self):
+        """(top, base) as the most frequent level in the upper and lower half of the range"""
+        bins = self.bins
+        span = np.where(self.vpp > 0, self.vpp, 1.0)
+        scale = (bins - 1) / span
+        index = ((self.data - self.vmin[:, None]) * scale[:, None]).astype(np.int64)
+        index += (np.arange(self.frames) * bins)[:, None]
+        counts = np.bincount(index.ravel(), minlength=self.frames * bins).reshape(self.frames, bins)
+        half = bins // 2
+        top_bin = half + np.argmax(counts[:, half:], axis=1)
+        base_bin = np.argmax(counts[:, :half], axis=1)
+        width = span / (bins - 1)
+        top = np.minimum(self.vmin + top_bin * width, self.vmax)
+        base = np.maximum(self.vmin + base_bin * width, self.vmin)
+        flat = self.vpp == 0
+        top[flat], base[flat] = self.vmax[flat], self.vmin[flat]
+        return top, base
+
+    @cached_property
+    def vtop(self):
+        return self._levels[0]
+
+    @cached_property
+    def vbase(self):
+        return self._levels[1]
+
+    @cached_property
+    def vamp(self):
+        return self.vtop - self.vbase
+
+    @cached_property
+    def vupper(self):
+        return self.vbase + self.percent[0] * self.vamp
+
+    @cached_property
+    def vmid(self):
+        return self.vbase + self.percent[1] * self.vamp
+
+    @cached_property
+    def vlower(self):
+        return self.vbase + self.percent[2] * self.vamp
+
+    @cached_property
+    def overshoot(self):
+        return self._ratio(self.vmax - self.vtop, self.vamp) * 100
+
+    @cached_property
+    def preshoot(self):
+        return self._ratio(self.vbase - self.vmin, self.vamp) * 100
+
+    @cached_property
+    def tvmax(self):
+        return self.x_origin + np.argmax(self.data, axis=1) * self.dt
+
+    @cached_property
+    def tvmin(self):
+        return self.x_origin + np.argmin(self.data, axis=1) * self.dt
+
+    @cached_property
+    def marea(self):
+        return self.data.sum(axis=1, dtype=np.float64) * self.dt
+
+    # Edges
+
+    def _last_index(self, mask):
+        """Per sample, index of the latest sample (inclusive) where mask holds, -1 if none"""
+        return np.maximum.accumulate(np.where(mask, self.index, -1), axis=1)
+
+    @cached_property
+    def _last_below(self):
+        return self._last_index(self.data <= self.vlower[:, None])
+
+    @cached_property
+    def _last_above(self):
+        return self._last_index(self.data >= self.vupper[:, None])
+
+    def _cross(self, rows, start, level):
+        """Fractional sample index where the signal crosses level between start and start + 1"""
+        x0 = self.data[rows, start].astype(np.float64)
+        x1 = self.data[rows, start + 1].astype(np.float64)
+        return start + (level[rows] - x0) / (x1 - x0)
+
+    def _edges(self, rising: bool):
+        """(rows, lower/upper-threshold crossings, mid crossing) of qualified edges"""
+        below, above = self._last_below, self._last_above
+        if rising:
+            mask = (above[:, 1:] == self.index[1:]) & (below[:, :-1] > above[:, :-1])
+        else:
+            mask = (below[:, 1:] == self.index[1:]) & (above[:, :-1] > below[:, :-1])
+        rows, columns = np.nonzero(mask)
+        if rising:
+            start = self._cross(rows, below[rows, columns], self.vlower)
+            end = self._cross(rows, columns, self.vupper)
+            mid_mask = self.data < self.vmid[:, None]
+        else:
+            start = self._cross(rows, above[rows, columns], self.vupper)
+            end = self._cross(rows, columns, self.vlower)
+            mid_mask = self.data > self.vmid[:, None]
+        mid_index = self._last_index(mid_mask)[rows, columns]
+        mid = self._cross(rows, mid_index, self.vmid)
+        return rows, start, end, mid
+
+    @cached_property
+    def _rising(self):
+        return self._edges(True)
+
+    @cached_property
+    def _falling(self):
+        return self._edges(False)
+
+    @cached_property
+    def pedges(self):
+        return np.bincount(self._rising[0], minlength=self.frames).astype(np.float64)
+
+    @cached_property
+    def nedges(self):
+        return np.bincount(self._falling[0], minlength=self.frames).astype(np.float64)
+
+    @cached_property
+    def rtime(self):
+        rows, start, end, _ = self._rising
+        return self._row_mean(rows, end - start) * self.dt
+
+    @cached_property
+    def ftime(self):
+        rows, start, end, _ = self._falling
+        return self._row_mean(rows, end - start) * self.dt
+
+    @cached_property
+    def pslewrate(self):
+        return self._ratio(self.vupper - self.vlower, self.rtime)
+
+    @cached_property
+    def nslewrate(self):
+        return self._ratio(self.vlower - self.vupper, self.ftime)
+
+    @cached_property
+    def _cycles(self):
+        """(rows, start, stop) in samples of each complete rising-to-rising cycle"""
+        rows, _, _, mid = self._rising
+        same = rows[1:] == rows[:-1]
+        return rows[1:][same], mid[:-1][same], mid[1:][same]
+
+    @cached_property
+    def period(self):
+        rows, start, stop = self._cycles
+        return self._row_mean(rows, stop - start) * self.dt
+
+    @cached_property
+    def frequency(self):
+        return self._ratio(np.ones(self.frames), self.period)
+
+    def _pulses(self, first, second):
+        """(rows, widths in samples) from each mid crossing of first to the next of second"""
+        rows, mid = first[0], first[3]
+        keys = second[0] * float(self.points) + second[3]
+        following = np.searchsorted(keys, rows * float(self.points) + mid, side='right')
+        valid = following < len(keys)
+        valid[valid] = second[0][following[valid]] == rows[valid]
+        return rows[valid], second[3][following[valid]] - mid[valid]
+
+    @cached_property
+    def _positive_pulses(self):
+        return self._pulses(self._rising, self._falling)
+
+    @cached_property
+    def _negative_pulses(self):
+        return self._pulses(self._falling, self._rising)
+
+    @cached_property
+    def pwidth(self):
+        rows, widths = self._positive_pulses
+        return self._row_mean(rows, widths) * self.dt
+
+    @cached_property
+    def nwidth(self):
+        rows, widths = self._negative_pulses
+        return self._row_mean(rows, widths) * self.dt
+
+    @cached_property
+    def ppulses(self):
+        return np.bincount(self._positive_pulses[0], minlength=self.frames).astype(np.float64)
+
+    @cached_property
+    def npulses(self):
+        return np.bincount(self._negative_pulses[0], minlength=self.frames).astype(np.float64)
+
+    @cached_property
+    def pduty(self):
+        return self._ratio(self.pwidth, self.period) * 100
+
+    @cached_property
+    def nduty(self):
+        return self._ratio(self.nwidth, self.period) * 100
+
+    # First-period items
+
+    @cached_property
+    def _first_cycle(self):
+        """Per frame, sample slice of the first complete cycle (None if there is none)"""
+        rows, start, stop = self._cycles
+        cycles = [None] * self.frames
+        first_rows, first = np.unique(rows, return_index=True)
+        for row, i in zip(first_rows, first):
+            cycles[row] = slice(int(np.ceil(start[i])), int(np.ceil(stop[i])))
+        return cycles
+
+    @cached_property
+    def mparea(self):
+        return np.array([self.data[row, cycle].sum(dtype=np.float64) * self.dt if cycle else np.nan
+                         for row, cycle in enumerate(self._first_cycle)])
+
+    @cached_property
+    def pvrms(self):
+        return np.array([np.sqrt(np.mean(np.square(self.data[row, cycle], dtype=np.float64)))
+                         if cycle else np.nan for row, cycle in enumerate(self._first_cycle)])
+
+    # Two-source items
+
+    def delay(self, reference, item: str):
+        """RDELay/FDELay (seconds) or RPHase/FPHase (degrees) from this source to reference"""
+        rising = item in ['RDELAY', 'RPHASE']
+        a = self._first_time(self._rising if rising else self._falling)
+        b = reference._first_time(reference._rising if rising else reference._falling)
+        delay = (b - a) * self.dt
+        if item.endswith('PHASE'):
+            return self._ratio(delay, self.period) * 360
+        return delay
+
+    def _first_time(self, edges):
+        rows, _, _, mid = edges
+        result = np.full(self.frames, np.nan)
+        first_rows, first = np.unique(rows, return_index=True)
+        result[first_rows] = mid[first]
+        return result
+
+    # Helpers
+
+    def _row_mean(self, rows, values):
+        counts = np.bincount(rows, minlength=self.frames)
+        sums = np.bincount(rows, weights=values, minlength=self.frames)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+    @staticmethod
+    def _ratio(numerator, denominator):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(denominator != 0, numerator / np.where(denominator != 0, denominator, 1), np.nan)
@@ -0,0 +1,154 @@
+# Bulk download of recorded (segmented) frames into memory-mapped files
+
+import json
+import os
+import time
+import numpy as np
+from commands.waveform_commands import FORMAT_DTYPES, WaveformPreamble
+
+# Per-frame record stored next to the samples; downloaded is NaN until the frame is complete
+FRAME_DTYPE = np.dtype([('frame', '<i4'), ('offset', '<f8'), ('downloaded', '<f8')])
+
+def frame_paths(path: str):
+    """Sample, frame table and metadata file names for a download path"""
+    base = path[:-4] if path.endswith('.npy') else path
+    return f'{base}.npy', f'{base}.frames.npy', f'{base}.json'
+
+
+class RecordedFrames:
+    """Frames downloaded by download_frames(), backed by .npy memory maps
+
+    data is a (frames x samples) array of raw codes. frames holds the frame
+    number, the nominal time offset from the first frame (frame index times
+    the record interval) and the host time when the frame was saved.
+    """
+
+    def __init__(self, data, frames, preamble: WaveformPreamble, metadata: dict):
+        self.data = data
+        self.frames = frames
+        self.preamble = preamble
+        self.metadata = metadata
+
+    @classmethod
+    def open(cls, path: str, mode: str = 'r'):
+        """Open a (possibly partial) download without loading it into memory"""
+        data_path, frames_path, metadata_path = frame_paths(path)
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+        return cls(np.load(data_path, mmap_mode=mode), np.load(frames_path, mmap_mode=mode),
+                   WaveformPreamble.from_string(metadata['preamble']), metadata)
+
+    @property
+    def pending(self):
+        """Indexes of frames not downloaded yet"""
+        return np.flatnonzero(np.isnan(self.frames['downloaded']))
+
+    @property
+    def complete(self):
+        return not len(self.pending)
+
+    def to_volts(self, index, dtype=np.float64):
+        """Scale one frame (or a slice of frames) to volts"""
+        return self.preamble.to_volts(self.data[index], dtype=dtype)
+
+    def flush(self):
+        """Write pending changes to disk"""
+        self.data.flush()
+        self.frames.flush()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __repr__(self):
+        return (f'RecordedFrames(frames={len(self)}, points={self.data.shape[1]}, '
+                f'pending={len(self.pending)})')
+
+
+def download_frames(scope, path: str, source: str = 'CHANnel1', format: str = 'BYTE', mode: str = 'RAW',
+                    start: int = 1, end: int = None, flush_every: int = 100, progress=None):
+    """Download recorded frames into a disk-backed (frames x samples) array
+
+    Each frame is selected with :FUNCtion:WREPlay:FCURrent and read through
+    the binary waveform path straight into its row of the memory map. If the
+    files already exist from an interrupted run with the same parameters,
+    only the frames not downloaded yet are read.
+
+    Args:
+        scope: Connected RigolScope with a finished recording
+        path: Output path; writes <path>.npy, <path>.frames.npy and <path>.json
+        source: Waveform source (e.g., CHANnel1)
+        format: Waveform format (BYTE|WORD)
+        mode: Waveform mode (NORMal for the screen, RAW for the frame memory)
+        start: First frame
+        end: Last frame (default: :FUNCtion:WREPlay:FMAX?)
+        flush_every: Frames between flushes to disk
+        progress: Optional progress(done, total) callback
+
+    Returns:
+        RecordedFrames: Memory-mapped frames and per-frame timestamps
+    """
+    if format.upper() not in FORMAT_DTYPES:
+        raise ValueError(f'Invalid format. Must be one of {list(FORMAT_DTYPES)}')
+    data_path, frames_path, metadata_path = frame_paths(path)
+    end = end or scope.function.get_replay_max()
+    if end < start:
+        raise ValueError(f'Invalid frame range {start}-{end}')
+
+    waveform = scope.waveform
+    scope.stop()
+    waveform.set_source(source)
+    waveform.set_mode(mode)
+    waveform.set_format(format)
+    scope.function.set_replay_current(start)
+    preamble = waveform.get_parsed_preamble(refresh=True)
+    metadata = {
+        'source': source.upper(),
+        'format': format.upper(),
+        'mode': mode.upper(),
+        'start': start,
+        'end': end,
+        'points': preamble.points,
+        'preamble': waveform.get_preamble(),
+        'record_interval': scope.function.get_record_interval(),
+    }
+    count = end - start + 1
+    shape = (count, preamble.points)
+
+    if os.path.exists(metadata_path) and os.path.exists(data_path) and os.path.exists(frames_path):
+        with open(metadata_path) as f:
+            previous = json.load(f)
+        for key in ['source', 'format', 'mode', 'start', 'end', 'points']:
+            if previous.get(key) != metadata[key]:
+                raise ValueError(f'Existing download at {path} has {key}={previous.get(key)!r}, '
+                                 f'not {metadata[key]!r}')
+        recorded = RecordedFrames.open(path, 'r+')
+        recorded.metadata = previous
+    else:
+        data = np.lib.format.open_memmap(data_path, 'w+', FORMAT_DTYPES[format.upper()], shape)
+        frames = np.lib.format.open_memmap(frames_path, 'w+', FRAME_DTYPE, (count,))
+        frames['frame'] = np.arange(start, end + 1)
+        frames['offset'] = np.arange(count) * metadata['record_interval']
+        frames['downloaded'] = np.nan
+        frames.flush()
+        with open(metadata_path, 'w') as f:
+            json.dump(metadata, f, indent=2)
+        recorded = RecordedFrames(data, frames, preamble, metadata)
+
+    pending = recorded.pending
+    done = count - len(pending)
+    try:
+        for n, index in enumerate(pending, start=1):
+            scope.function.set_replay_current(start + int(index))
+            scope.query('*OPC?')
+            row = recorded.data[index]
+            for _ in waveform.iter_chunks(preamble.points, format, out=row):
+                pass
+            recorded.frames['downloaded'][index] = time.time()
+            done += 1
+            if n % flush_every == 0:
+                recorded.flush()
+            if progress:
+                progress(done, count)
+    finally:
+        recorded.flush()
+    return recorded
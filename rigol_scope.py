@@ -1,7 +1,14 @@
 # Main Rigol oscilloscope interface
 
 import socket
+import time
+from contextlib import contextmanager
+import numpy as np
 import pyvisa as visa
+from instrumentation import Instrumentation
+from scpi_block import encode_block, parse_block_header
+from socket_transport import SocketTransport
+from state_cache import StateCache
 from commands.acquire_commands import AcquireCommands
 from commands.calibrate_commands import CalibrateCommands
 from commands.channel_commands import ChannelCommands
@@ -24,11 +31,36 @@ from commands.trace_commands import TraceCommands
 from commands.trigger_commands import TriggerCommands
 from commands.waveform_commands import WaveformCommands
 
+class CommandBatch:
+    """Commands collected by RigolScope.batch() and the errors reported after sending"""
+
+    def __init__(self):
+        self.commands = []
+        self.errors = []
+        self.messages_sent = 0
+
+    def messages(self, max_length: int):
+        """Join commands with ';' into messages of at most max_length characters"""
+        messages = []
+        current = ''
+        for command in self.commands:
+            if current and len(current) + 1 + len(command) > max_length:
+                messages.append(current)
+                current = ''
+            current = f'{current};{command}' if current else command
+        if current:
+            messages.append(current)
+        return messages
+
+
 class RigolScope:
     DEFAULT_USB_RESOURCE = 'ASRL/dev/ttyUSB0::INSTR'
     DEFAULT_IP = '192.168.0.5'  # Default IP for LAN connection
     DEFAULT_PORT = 5555  # Default port for LAN connection (set to match VISA resource)
     VISA_RESOURCE = 'TCPIP0::192.168.0.5::INSTR'  # Correct VISA resource for the scope
+    # Commands that only select the waveform read window and leave settings untouched
+    READ_WINDOW_COMMANDS = (':WAVEFORM:STAR', ':WAVEFORM:STOP')
+    BATCH_MAX_LENGTH = 1024  # Maximum characters per ;-joined batch message
 
     def __init__(self):
         self.visa_rm = None
@@ -36,6 +68,12 @@ class RigolScope:
         self.socket = None
         self.connected = False
         self.connection_type = None
+        self.settings_generation = 0  # Bumped whenever a command may change settings
+        self.failures = 0  # Sends and queries that failed (and returned False, "" or b"")
+        self.last_error = None
+        self._batch = None
+        self.cache = None  # StateCache when enabled with enable_cache()
+        self.instrumentation = None  # Instrumentation when enabled with enable_instrumentation()
 
         # Initialize all command groups
         self.acquire = AcquireCommands(self)
@@ -80,7 +118,8 @@ class RigolScope:
         port = port or self.DEFAULT_PORT
         try:
             self.visa_rm = visa.ResourceManager('@py')
-            self.device = self.visa_rm.open_resource(self.VISA_RESOURCE)
+            resource = self.VISA_RESOURCE if ip_address == self.DEFAULT_IP else f'TCPIP0::{ip_address}::INSTR'
+            self.device = self.visa_rm.open_resource(resource)
             self.device.timeout = 5000  # Set timeout for LAN communication
             self.connection_type = 'LAN'
             self.connected = True
@@ -89,6 +128,21 @@ class RigolScope:
             print(f"Failed to connect via LAN: {str(e)}")
             return False
 
+    def connect_socket(self, ip_address: str = None, port: int = None, timeout: float = 5.0):
+        """Connect to oscilloscope via a raw SCPI socket (bypasses VISA)"""
+        ip_address = ip_address or self.DEFAULT_IP
+        port = port or self.DEFAULT_PORT
+        try:
+            self.socket = SocketTransport(ip_address, port, timeout)
+            self.socket.connect()
+            self.connection_type = 'SOCKET'
+            self.connected = True
+            return True
+        except Exception as e:
+            print(f"Failed to connect via socket: {str(e)}")
+            self.socket = None
+            return False
+
     def disconnect(self):
         """Disconnect from oscilloscope"""
         try:
@@ -98,10 +152,14 @@ class RigolScope:
             elif self.connection_type == 'LAN' and self.device:
                 self.device.close()
                 self.visa_rm.close()
+            elif self.connection_type == 'SOCKET' and self.socket:
+                self.socket.close()
             
             self.device = None
             self.visa_rm = None
             self.socket = None
+            if self.cache is not None:
+                self.cache.clear()
             self.connected = False
             self.connection_type = None
             return True
@@ -114,26 +172,390 @@ class RigolScope:
         if not self.connected:
             raise ConnectionError("Not connected to oscilloscope")
         
+        if self.cache is not None:
+            if self.cache.is_redundant(command):
+                return True
+            self.cache.record_write(command)
+        if not command.upper().startswith(self.READ_WINDOW_COMMANDS):
+            self.settings_generation += 1
+        if self._batch is not None:
+            self._batch.commands.append(command)
+            return True
+        start = time.perf_counter() if self.instrumentation is not None else 0.0
         try:
-            if self.connection_type in ['USB', 'LAN']:
-                self.device.write(command)
+            self._write(command)
+            if self.instrumentation is not None:
+                self.instrumentation.record(command, time.perf_counter() - start, len(command) + 1)
             return True
         except Exception as e:
             print(f"Failed to send command: {str(e)}")
+            self.failures += 1
+            self.last_error = e
+            if self.instrumentation is not None:
+                self.instrumentation.record_error(command, e)
+            if self.cache is not None:
+                self.cache.discard(command)
             return False
 
+    def send_binary(self, command: str, payload):
+        """Send a command followed by payload as an IEEE 488.2 block
+
+        The payload (bytes or a NumPy array) is sent as-is in one message,
+        with no text conversion. Batched commands are sent first, since a
+        block cannot be joined into a ';' message.
+
+        Args:
+            command: Command text up to and including the separator before
+                the block, e.g. ':TRACe1:DATA:DAC16 VOLATILE,END,'
+            payload: Block contents
+        """
+        if not self.connected:
+            raise ConnectionError("Not connected to oscilloscope")
+
+        self._flush_batch()
+        self.settings_generation += 1
+        message = command.encode('ascii') + encode_block(memoryview(payload).cast('B')) + b'\n'
+        start = time.perf_counter() if self.instrumentation is not None else 0.0
+        try:
+            if self.connection_type in ['USB', 'LAN']:
+                self.device.write_raw(message)
+            elif self.connection_type == 'SOCKET':
+                self.socket.write_raw(message)
+            if self.instrumentation is not None:
+                self.instrumentation.record(command, time.perf_counter() - start, len(message))
+            return True
+        except Exception as e:
+            print(f"Failed to send binary data: {str(e)}")
+            self.failures += 1
+            self.last_error = e
+            if self.instrumentation is not None:
+                self.instrumentation.record_error(command, e)
+            return False
+
+    def _write(self, command: str):
+        """Write a message on the active transport"""
+        if self.connection_type in ['USB', 'LAN']:
+            self.device.write(command)
+        elif self.connection_type == 'SOCKET':
+            self.socket.send_command(command)
+
     def query(self, command: str) -> str:
         """Query oscilloscope and return response"""
         if not self.connected:
             raise ConnectionError("Not connected to oscilloscope")
         
+        if self.cache is not None:
+            cached = self.cache.get_query(command)
+            if cached is not None:
+                return cached
+        self._flush_batch()
+        start = time.perf_counter() if self.instrumentation is not None else 0.0
         try:
             if self.connection_type in ['USB', 'LAN']:
-                return self.device.query(command).strip()
+                response = self.device.query(command)
+            elif self.connection_type == 'SOCKET':
+                response = self.socket.query(command)
+            if self.instrumentation is not None:
+                self.instrumentation.record(command, time.perf_counter() - start,
+                                            len(command) + 1, len(response) + 1)
+            response = response.strip()
+            if self.cache is not None:
+                self.cache.record_query(command, response)
+            return response
         except Exception as e:
             print(f"Failed to query: {str(e)}")
+            self.failures += 1
+            self.last_error = e
+            if self.instrumentation is not None:
+                self.instrumentation.record_error(command, e)
+            self._resync(command)
             return ""
 
+    def query_many(self, commands) -> list:
+        """Send queries as ';'-joined compound messages in as few round-trips as possible
+
+        Returns:
+            list: One response per query. Every query of a message whose reply
+            is missing or has the wrong number of fields gets None, so a
+            response is never paired with the wrong query.
+        """
+        batch = CommandBatch()
+        batch.commands = list(commands)
+        responses = []
+        for message in batch.messages(self.BATCH_MAX_LENGTH):
+            responses.extend(self._split_replies(message, self.query(message)))
+        return responses
+
+    @staticmethod
+    def _split_replies(message: str, reply: str) -> list:
+        """Split the reply to a compound query, or None per query if it doesn't match"""
+        expected = message.count(';') + 1
+        replies = reply.split(';') if reply else []
+        if len(replies) != expected:
+            if reply:
+                print(f"Failed to query: expected {expected} responses, got {len(replies)}")
+            return [None] * expected
+        return [response.strip() for response in replies]
+
+    def query_binary(self, command: str, out=None):
+        """Query oscilloscope and return the payload of an IEEE 488.2 block response
+
+        The reply is never decoded as text, so BYTE/WORD waveform data and
+        screenshots come back intact. If out is given (bytearray or NumPy
+        array) the payload is written into it; the socket transport receives
+        straight into it without an intermediate copy.
+        """
+        if not self.connected:
+            raise ConnectionError("Not connected to oscilloscope")
+
+        self._flush_batch()
+        start = time.perf_counter() if self.instrumentation is not None else 0.0
+        try:
+            if self.connection_type in ['USB', 'LAN']:
+                self.device.write(command)
+                header = self.device.read_bytes(2)
+                if header[0:1] != b'#':
+                    raise ValueError(f'Invalid block header: {header!r}')
+                header += self.device.read_bytes(int(header[1:2]))
+                _, length = parse_block_header(header)
+                data = self.device.read_bytes(length) if length else b''
+                self.device.read_bytes(1)  # Trailing newline
+                if out is not None:
+                    target = memoryview(out).cast('B')[:length]
+                    target[:] = data
+                    data = target
+            elif self.connection_type == 'SOCKET':
+                data = self.socket.query_binary(command, out)
+            if self.instrumentation is not None:
+                self.instrumentation.record(command, time.perf_counter() - start,
+                                            len(command) + 1, memoryview(data).nbytes)
+            return data
+        except Exception as e:
+            print(f"Failed to query binary: {str(e)}")
+            self.failures += 1
+            self.last_error = e
+            if self.instrumentation is not None:
+                self.instrumentation.record_error(command, e)
+            self._resync(command)
+            return b""
+
+    def _resync(self, command: str):
+        """Discard what is left of a failed reply so the next query reads its own
+
+        The socket transport reconnects; VISA devices get a device clear.
+        Counted as a retry of command by the instrumentation.
+        """
+        if self.instrumentation is not None:
+            self.instrumentation.record_retry(command)
+        try:
+            if self.connection_type == 'SOCKET':
+                self.socket.reconnect()
+            elif self.device is not None:
+                self.device.clear()
+        except Exception as e:
+            print(f"Failed to resynchronize: {str(e)}")
+
+    def enable_cache(self, enabled: bool = True):
+        """Enable/disable the shadow-state cache
+
+        When enabled, writes of unchanged values are dropped and static
+        queries (e.g. *IDN?, :ACQuire:SRATe?) are served from cache until a
+        dependent setting changes. *RST, autoscale and setup restore flush it.
+        """
+        self.cache = StateCache() if enabled else None
+
+    def enable_instrumentation(self, instrumentation=None):
+        """Record per-command latency, byte counts and failures
+
+        Args:
+            instrumentation: Collector to install (default: a new
+                Instrumentation). Pass False to turn instrumentation off.
+
+        Returns:
+            The installed collector, or None when turned off
+        """
+        if instrumentation is False:
+            self.instrumentation = None
+        else:
+            self.instrumentation = instrumentation or Instrumentation()
+        return self.instrumentation
+
+    @contextmanager
+    def batch(self, max_length: int = None):
+        """Collect commands from all command groups and send them together
+
+        Setter calls inside the block are sent on exit as ';'-joined messages,
+        followed by a single *OPC? and one check of the error queue. The first
+        message starts with *CLS so only errors of the batch are reported.
+        Queries inside the block first send the commands collected so far.
+
+        Yields:
+            CommandBatch: Collected commands; errors holds the error queue
+            entries reported after sending, failed sends and a missing *OPC?
+            reply
+        """
+        if self._batch is not None:
+            yield self._batch
+            return
+        self._batch = CommandBatch()
+        batch = self._batch
+        try:
+            yield batch
+        finally:
+            self._flush_batch(max_length)
+            self._batch = None
+            if batch.messages_sent:
+                if self.query('*OPC?') != '1':
+                    batch.errors.append('No *OPC? reply after the batch')
+                batch.errors.extend(self._read_errors())
+            for error in batch.errors:
+                print(f"Batch command error: {error}")
+
+    def _flush_batch(self, max_length: int = None):
+        """Send pending batched commands"""
+        batch = self._batch
+        if batch is None or not batch.commands:
+            return
+        if not batch.messages_sent:
+            batch.commands.insert(0, '*CLS')  # Drop errors queued before the batch
+        messages = batch.messages(max_length or self.BATCH_MAX_LENGTH)
+        batch.commands = []
+        for message in messages:
+            start = time.perf_counter() if self.instrumentation is not None else 0.0
+            try:
+                self._write(message)
+                batch.messages_sent += 1
+                if self.instrumentation is not None:
+                    self.instrumentation.record(message, time.perf_counter() - start, len(message) + 1)
+            except Exception as e:
+                print(f"Failed to send command: {str(e)}")
+                batch.errors.append(f'Failed to send command: {str(e)}')
+                self.failures += 1
+                self.last_error = e
+                if self.instrumentation is not None:
+                    self.instrumentation.record_error(message, e)
+                if self.cache is not None:
+                    # Settings of the unsent commands were already recorded
+                    self.cache.clear()
+
+    def _read_errors(self, limit: int = 32):
+        """Drain the error queue, returning non-zero entries"""
+        errors = []
+        for _ in range(limit):
+            error = self.system.get_error()
+            if not error:
+                errors.append('No reply to :SYSTem:ERRor?')
+                break
+            if int(error.split(',')[0]) == 0:
+                break
+            errors.append(error)
+        return errors
+
+    def run(self):
+        """Start acquisition"""
+        return self.send_command(':RUN')
+
+    def stop(self):
+        """Stop acquisition"""
+        return self.send_command(':STOP')
+
+    def single(self):
+        """Arm a single trigger acquisition"""
+        return self.send_command(':SINGle')
+
+    def force_trigger(self):
+        """Force a trigger"""
+        return self.send_command(':TFORce')
+
+    @staticmethod
+    def _backoff(timeout: float, initial: float, maximum: float, factor: float = 2.0):
+        """Yield once per poll until timeout, sleeping initial, initial * factor, ... (at most maximum) between"""
+        deadline = time.monotonic() + timeout
+        delay = initial
+        while True:
+            yield
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(delay, remaining))
+            delay = min(delay * factor, maximum)
+
+    def wait_complete(self, timeout: float = 10.0):
+        """Wait until the scope has finished all pending commands
+
+        *OPC? normally answers as soon as the commands before it are done.
+        If it fails (e.g. an operation outlasts the transport timeout), *OPC
+        is set and bit 0 of *ESR? is polled with exponential backoff. The
+        transport is resynchronized first, so a late "1" can never be read as
+        the *ESR? reply.
+
+        Returns:
+            bool: True when complete, False on timeout
+        """
+        reply = self.query('*OPC?')
+        if reply == '1':
+            return True
+        if reply:
+            self._resync('*OPC?')  # query() only resynchronizes after a failure, not a wrong reply
+        try:
+            self.ieee.get_event_status()  # Clear a completion bit left by an earlier *OPC
+        except ValueError:
+            pass
+        self.ieee.operation_complete()
+        for _ in self._backoff(timeout, 0.01, 0.5):
+            try:
+                if self.ieee.get_event_status() & 1:
+                    return True
+            except ValueError:
+                pass
+        print(f"Failed to wait for operation complete: no completion within {timeout} s")
+        return False
+
+    def wait_triggered(self, timeout: float = 10.0, statuses=('TD', 'STOP')):
+        """Poll :TRIGger:STATus? with exponential backoff until it reports one of statuses
+
+        Returns:
+            str: The status reached, or "" on timeout
+        """
+        status = ''
+        for _ in self._backoff(timeout, 0.001, 0.1):
+            status = self.trigger.get_status().upper()
+            if status in statuses:
+                return status
+        print(f"Failed to wait for trigger: status {status!r} after {timeout} s")
+        return ""
+
+    def wait_stable_measurement(self, items, source: str = 'CHANnel1', tolerance: float = 0.01,
+                                readings: int = 3, timeout: float = 10.0):
+        """Wait until measurements stop changing
+
+        The items are read together with measure.get_measurements() at
+        exponentially growing intervals. They count as stable once the last
+        readings are all valid and each item stays within tolerance (relative
+        to its mean) across them.
+
+        Args:
+            items: Measurement items (e.g., ['VPP', 'PERiod'])
+            source: Source channel
+            tolerance: Maximum relative spread of the last readings
+            readings: Number of consecutive readings that must agree
+
+        Returns:
+            numpy.ndarray: The last get_measurements() result, or None on timeout
+        """
+        items = [items] if isinstance(items, str) else list(items)
+        history = []
+        for _ in self._backoff(timeout, 0.02, 0.5):
+            result = self.measure.get_measurements(items, [source])
+            history = (history + [[result[item][0] for item in items]])[-readings:]
+            values = np.array(history)
+            if len(history) == readings and np.isfinite(values).all():
+                spread = values.max(axis=0) - values.min(axis=0)
+                if (spread <= tolerance * np.abs(values.mean(axis=0))).all():
+                    return result
+        print(f"Failed to wait for stable measurement: {items} on {source} not stable after {timeout} s")
+        return None
+
     def get_sources(self):
         """Get available sources for waveform"""
         return ['CHANnel1', 'CHANnel2', 'CHANnel3', 'CHANnel4', 'MATH', 'FFT', 'LA']
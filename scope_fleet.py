@@ -0,0 +1,141 @@
+# Multi-scope fleet manager for Rigol oscilloscopes
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from rigol_scope import RigolScope
+
+class FleetResult:
+    """Outcome of one operation run on every scope of a fleet"""
+
+    def __init__(self):
+        self.results = {}  # address -> return value
+        self.errors = {}  # address -> exception
+        self.timings = {}  # address -> seconds spent on that scope
+        self.elapsed = 0.0  # Wall-clock seconds for the whole fleet
+
+    @property
+    def ok(self):
+        """True if no scope failed"""
+        return not self.errors
+
+    @property
+    def slowest(self):
+        """(address, seconds) of the slowest scope, or None"""
+        if not self.timings:
+            return None
+        address = max(self.timings, key=self.timings.get)
+        return address, self.timings[address]
+
+    def __repr__(self):
+        return (f'FleetResult(ok={len(self.results)}, failed={len(self.errors)}, '
+                f'elapsed={self.elapsed:.3f}s, slowest={self.slowest})')
+
+
+class ScopeFleet:
+    """Rack of scopes driven concurrently through a worker pool
+
+    Each operation runs on every connected scope in parallel. An exception on
+    one scope is recorded in the FleetResult and never affects the others, so
+    the fleet takes about as long as its slowest scope. RigolScope reports a
+    failed send or query by returning False, "" or NaN rather than raising,
+    so an operation during which the scope counted a failure is recorded as
+    an error too.
+    """
+
+    def __init__(self, addresses, port: int = None, connection: str = 'SOCKET', max_workers: int = None):
+        if connection.upper() not in ['SOCKET', 'LAN']:
+            raise ValueError("Invalid connection. Must be one of ['SOCKET', 'LAN']")
+        self.port = port
+        self.connection = connection.upper()
+        self.scopes = {address: RigolScope() for address in addresses}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or max(len(self.scopes), 1))
+
+    def connect(self):
+        """Connect all scopes in parallel"""
+        def connect(scope, address):
+            if self.connection == 'SOCKET':
+                connected = scope.connect_socket(address, self.port)
+            else:
+                connected = scope.connect_lan(address, self.port)
+            if not connected:
+                raise ConnectionError(f"Failed to connect to {address}")
+            return True
+        return self._run(list(self.scopes), connect, pass_address=True)
+
+    def disconnect(self):
+        """Disconnect all scopes and stop the worker pool"""
+        result = self._run(self.connected, lambda scope: scope.disconnect())
+        self.executor.shutdown(wait=True)
+        return result
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disconnect()
+
+    @property
+    def connected(self):
+        """Addresses of the scopes currently connected"""
+        return [address for address, scope in self.scopes.items() if scope.connected]
+
+    def map(self, function, *args, **kwargs):
+        """Run function(scope, *args, **kwargs) on every connected scope concurrently"""
+        return self._run(self.connected, function, *args, **kwargs)
+
+    def broadcast(self, configure):
+        """Apply the same configuration to every scope
+
+        configure(scope) is called inside scope.batch(), so each scope gets its
+        setup as one batch with a single *OPC? and error check. Scope errors,
+        failed sends and a missing *OPC? reply all make the scope fail.
+        """
+        def apply(scope):
+            with scope.batch() as batch:
+                configure(scope)
+            if batch.errors:
+                raise RuntimeError(f"Configuration errors: {batch.errors}")
+            return True
+        return self.map(apply)
+
+    def single(self):
+        """Arm a single acquisition on every scope"""
+        return self.map(lambda scope: scope.single())
+
+    def read_raw(self, source: str, format: str = 'BYTE'):
+        """Download the full memory of a source from every scope"""
+        return self.map(lambda scope: scope.waveform.read_raw(source, format))
+
+    def get_measurements(self, items, sources):
+        """Collect measurement tables from every scope"""
+        return self.map(lambda scope: scope.measure.get_measurements(items, sources))
+
+    def _run(self, addresses, function, *args, pass_address: bool = False, **kwargs):
+        result = FleetResult()
+
+        def task(address):
+            start = time.perf_counter()
+            try:
+                scope = self.scopes[address]
+                failures = scope.failures
+                if pass_address:
+                    value = function(scope, address, *args, **kwargs)
+                else:
+                    value = function(scope, *args, **kwargs)
+                if scope.failures != failures:
+                    raise ConnectionError(f"{scope.failures - failures} failed transfer(s), "
+                                          f"last: {scope.last_error}")
+                return value
+            finally:
+                result.timings[address] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        futures = {address: self.executor.submit(task, address) for address in addresses}
+        for address, future in futures.items():
+            try:
+                result.results[address] = future.result()
+            except Exception as e:
+                result.errors[address] = e
+        result.elapsed = time.perf_counter() - start
+        return result
@@ -0,0 +1,600 @@
+"""Local DS1104Z SCPI simulator for offline testing and benchmarking
+
+Run a stand-in scope on port 5555:
+    python scope_simulator.py --port 5555 --latency 0.0005 --bandwidth 5e6
+
+then connect with RigolScope().connect_socket('127.0.0.1').
+"""
+
+import argparse
+import socketserver
+import threading
+import time
+import numpy as np
+from commands.measure_commands import VALID_ITEMS
+from measure_engine import MeasurementEngine
+from scpi_block import encode_block, parse_block_header
+
+# Long-form keywords; the upper-case letters are the short form
+KEYWORDS = ['ACQuire', 'ASCii', 'AUToscale', 'AVERages', 'CHANnel', 'CLEar', 'COLor', 'CONFig',
+            'COUNter', 'COUPling', 'CREate', 'DATA', 'DECoder', 'DIRection', 'DISPlay', 'EDGe',
+            'ENABle', 'ERRor', 'ETABle', 'FAILed', 'FCURrent', 'FINTerval', 'FORMat', 'FREQuency',
+            'FSTart', 'FUNCtion', 'IMAGe', 'ITEM', 'LEVel', 'MAXimum', 'MDEPth', 'MEASure',
+            'MINimum', 'MODE', 'NDUTy', 'NEXT', 'NORMal', 'NWIDth', 'OFFSet', 'OPERate', 'PASSed',
+            'PDUTy', 'PERiod', 'POSition', 'PREamble', 'PROBe', 'PROMpt', 'PWIDth', 'RANGe',
+            'RESet', 'SCALe', 'SETup', 'SINGle', 'SLOPe', 'SOURce', 'SRATe', 'STARt', 'STATistic',
+            'STATus', 'STOP', 'STORage', 'SWEep', 'SYSTem', 'TFORce', 'TIMebase', 'TOTal', 'TRACe',
+            'TRIGger', 'TYPE', 'VALue', 'VARIance', 'VBASe', 'WAVeform', 'WRECord', 'WREPlay',
+            'XINCrement', 'XORigin', 'XREFerence', 'YINCrement', 'YORigin', 'YREFerence']
+SHORT_FORMS = {}
+for _keyword in KEYWORDS:
+    _short = ''.join(c for c in _keyword if c.isupper())
+    SHORT_FORMS[_keyword.upper()] = _short
+    SHORT_FORMS[_short] = _short
+
+IDENTIFICATION = 'RIGOL TECHNOLOGIES,DS1104Z Plus,DS1ZS000000000,00.04.04.SP4'
+INVALID_VALUE = '9.9E37'
+SCREEN_POINTS = 1200
+HORIZONTAL_DIVISIONS = 12
+CODES_PER_DIVISION = 25
+Y_REFERENCE = 127
+# Maximum points per :WAVeform:DATA? read by format
+MAX_CHUNK_POINTS = {'BYTE': 250000, 'WORD': 125000, 'ASC': 15625}
+# Memory depths (points) allowed per number of enabled channels
+MEMORY_DEPTHS = {1: [12000, 120000, 1200000, 12000000, 24000000],
+                 2: [6000, 60000, 600000, 6000000, 12000000],
+                 4: [3000, 30000, 300000, 3000000, 6000000]}
+MAX_SAMPLE_RATE = {1: 1e9, 2: 5e8, 4: 2.5e8}
+# Synthetic signal per channel: (shape, frequency, low, high)
+SIGNALS = {
+    'CHAN1': ('SQUare', 1e3, 0.0, 3.3),
+    'CHAN2': ('SINusoid', 1e3, -0.5, 0.5),
+    'CHAN3': ('RAMP', 1e4, -1.0, 1.0),
+    'CHAN4': ('SINusoid', 1e5, -0.2, 0.2),
+}
+DEFAULT_SETTINGS = {
+    ':ACQ:MDEP': 'AUTO',
+    ':ACQ:TYPE': 'NORM',
+    ':TIM:SCAL': '1.000000e-03',
+    ':TIM:OFFS': '0.000000e+00',
+    ':TRIG:SWE': 'AUTO',
+    ':TRIG:MODE': 'EDGE',
+    ':TRIG:EDG:SOUR': 'CHAN1',
+    ':TRIG:EDG:LEV': '0.000000e+00',
+    ':WAV:SOUR': 'CHAN1',
+    ':WAV:MODE': 'NORM',
+    ':WAV:FORM': 'BYTE',
+    ':WAV:STAR': '1',
+    ':WAV:STOP': '1200',
+    ':MEAS:SET:MAX': '90',
+    ':MEAS:SET:MID': '50',
+    ':MEAS:SET:MIN': '10',
+    ':FUNC:WREC:FEND': '1000',
+    ':FUNC:WREC:FINT': '1.000000e-06',
+    ':FUNC:WREP:FCUR': '1',
+    ':STOR:IMAG:TYPE': 'PNG',
+    ':STOR:IMAG:INVERT': '0',
+    ':STOR:IMAG:COL': 'COL',
+    ':MASK:ENAB': '0',
+}
+for _channel in range(1, 5):
+    DEFAULT_SETTINGS[f':CHAN{_channel}:DISP'] = '1' if _channel == 1 else '0'
+    DEFAULT_SETTINGS[f':CHAN{_channel}:SCAL'] = '1.000000e+00'
+    DEFAULT_SETTINGS[f':CHAN{_channel}:OFFS'] = '0.000000e+00'
+    DEFAULT_SETTINGS[f':CHAN{_channel}:COUP'] = 'DC'
+    DEFAULT_SETTINGS[f':CHAN{_channel}:PROB'] = '1.000000e+00'
+for _decoder in range(1, 3):
+    DEFAULT_SETTINGS[f':DEC{_decoder}:MODE'] = 'PAR'
+    DEFAULT_SETTINGS[f':DEC{_decoder}:FORM'] = 'HEX'
+# Event table rows generated per acquisition
+ETABLE_ROWS = 8
+ETABLE_HEADERS = {'PAR': 'PARALLEL', 'RS232': 'TX,RX', 'UART': 'TX,RX', 'IIC': 'ADDRESS,DATA',
+                  'I2C': 'ADDRESS,DATA', 'SPI': 'MOSI,MISO'}
+
+def canonical_header(header: str) -> str:
+    """Reduce a command header to upper-case short form, e.g. ':WAVeform:DATA?' -> ':WAV:DATA?'"""
+    query = header.endswith('?')
+    nodes = []
+    for node in header.rstrip('?').upper().split(':'):
+        digits = ''
+        while node and node[-1].isdigit() and not node.isdigit():
+            digits = node[-1] + digits
+            node = node[:-1]
+        nodes.append(SHORT_FORMS.get(node, node) + digits)
+    return ':'.join(nodes) + ('?' if query else '')
+
+
+class ScopeSimulator:
+    """SCPI state machine of a simulated DS1104Z
+
+    Keeps settings written by commands, answers setting queries, *IDN?,
+    :MEASure:*, :WAVeform:PREamble?, decoder, event table and mask queries
+    and returns synthetic waveform data as IEEE 488.2 blocks with the real
+    chunk limits and memory depths.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Restore default settings"""
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.errors = []
+        self.event_status = 0  # *ESR? register; *OPC sets bit 0
+        self.running = True
+        self.armed = False
+        self.armed_at = 0.0
+        self.trigger_delay = 0.01  # Seconds between :SINGle and the simulated trigger
+        self.acquisition = 0
+        self._record = None
+        self._record_key = None
+        self.traces = {}  # Generator trace -> (uploaded DAC16 packets, upload complete)
+        self.mask_counts = [0, 0]  # Frames passed and failed since :MASK:RESet
+
+    def handle(self, message: str):
+        """Execute a ';'-separated message and return a list of response parts (str or bytes)"""
+        responses = []
+        with self.lock:
+            for command in message.strip().split(';'):
+                command = command.strip()
+                if not command:
+                    continue
+                header, _, value = command.partition(' ')
+                try:
+                    response = self.execute(canonical_header(header), value.strip())
+                except (ValueError, IndexError, KeyError):
+                    self.errors.append('-224,"Illegal parameter value"')
+                    continue
+                if response is not None:
+                    responses.append(response)
+        return responses
+
+    def handle_block(self, command: str, payload: bytes):
+        """Execute a command carrying a binary block (only :TRACe<n>:DATA:DAC16 is supported)"""
+        header, _, value = command.partition(' ')
+        header = canonical_header(header)
+        with self.lock:
+            if not (header.startswith(':TRAC') and header.endswith(':DATA:DAC16')):
+                self.errors.append('-113,"Undefined header"')
+                return []
+            flag = value.split(',')[1].strip().upper() if ',' in value else 'END'
+            codes = np.frombuffer(payload, dtype='<u2', count=len(payload) // 2)
+            if len(payload) % 2 or not 0 < len(codes) <= 16384 or codes.max() > 16383:
+                self.errors.append('-222,"Data out of range"')
+                return []
+            trace = header[len(':TRAC'):header.index(':DATA')] or '1'
+            packets, complete = self.traces.get(trace, ([], True))
+            if complete:
+                packets = []
+            packets.append(codes.copy())
+            self.traces[trace] = (packets, flag.startswith('END'))
+        return []
+
+    def execute(self, header: str, value: str):
+        """Execute one canonical command, returning its response or None"""
+        if header.endswith('?'):
+            return self.query(header, value)
+        if header == '*RST':
+            self.reset()
+        elif header in ('*CLS',):
+            self.errors.clear()
+            self.event_status = 0
+        elif header == '*OPC':
+            self.event_status |= 1
+        elif header == ':RUN':
+            self.running, self.armed = True, False
+        elif header == ':STOP':
+            self.running, self.armed = False, False
+        elif header == ':SING':
+            self.running, self.armed, self.armed_at = False, True, time.monotonic()
+        elif header == ':TFOR':
+            self._trigger()
+        elif header in (':AUT', ':SYST:AUT'):
+            self.settings[':TIM:SCAL'] = '2.000000e-04'
+            self.settings[':CHAN1:SCAL'] = '1.000000e+00'
+            self.running = True
+        elif header in (':CLE', '*WAI', ':MEAS:CLE', ':MEAS:STAT:RES', ':MASK:CRE'):
+            pass
+        elif header == ':MASK:RES':
+            self.mask_counts = [0, 0]
+        elif value:
+            if header == ':ACQ:MDEP':
+                self._check_memory_depth(value)
+            if header == ':FUNC:WREP:FCUR':
+                self.acquisition = int(value)  # Replayed frame n shows acquisition n
+            self.settings[header] = value
+            if header.startswith((':ACQ:', ':TIM:')) or header in (':WAV:SOUR', ':WAV:MODE'):
+                # The read window starts over, as StateCache.COUPLED_SETTINGS assumes
+                self.settings[':WAV:STAR'] = DEFAULT_SETTINGS[':WAV:STAR']
+                self.settings[':WAV:STOP'] = DEFAULT_SETTINGS[':WAV:STOP']
+            if self.running:
+                self.acquisition += 1
+        else:
+            self.errors.append('-113,"Undefined header"')
+        return None
+
+    def query(self, header: str, value: str):
+        """Answer a query"""
+        if header == '*IDN?':
+            return IDENTIFICATION
+        if header == '*OPC?':
+            return '1'
+        if header == '*ESR?':
+            status, self.event_status = self.event_status, 0
+            return str(status)
+        if header in ('*STB?', '*TST?'):
+            return '0'
+        if header in (':SYST:ERR?', ':SYST:ERR:NEXT?'):
+            return self.errors.pop(0) if self.errors else '0,"No error"'
+        if header == ':TRIG:STAT?':
+            return self._trigger_status()
+        if header == ':ACQ:SRAT?':
+            return f'{self.sample_rate():.6e}'
+        if header == ':ACQ:MDEP?':
+            # Like the scope, AUTO is reported as such rather than as points
+            if self.settings[':ACQ:MDEP'].upper() == 'AUTO':
+                return 'AUTO'
+            return str(self.memory_depth())
+        if header in (':FUNC:WREC:FMAX?', ':FUNC:WREP:FMAX?'):
+            return self.settings[':FUNC:WREC:FEND']
+        if header == ':WAV:PRE?':
+            return self.preamble()
+        if header in (':WAV:XINC?', ':WAV:XOR?', ':WAV:XREF?', ':WAV:YINC?', ':WAV:YOR?', ':WAV:YREF?'):
+            fields = self.preamble().split(',')
+            index = [':WAV:XINC?', ':WAV:XOR?', ':WAV:XREF?', ':WAV:YINC?', ':WAV:YOR?', ':WAV:YREF?'].index(header)
+            return fields[4 + index]
+        if header == ':WAV:DATA?':
+            return self.waveform_data()
+        if header == ':DISP:DATA?':
+            return encode_block(self.screenshot())
+        if header == ':MEAS:ITEM?':
+            item, _, source = value.partition(',')
+            return self.measure(item, source or self.settings.get(':MEAS:SOUR', 'CHAN1'))
+        if header == ':MEAS:STAT:ITEM?':
+            _, item, source = (value.split(',') + ['', ''])[:3]
+            return self.measure(item, source or 'CHAN1')
+        if header == ':MEAS:FREQ?':
+            return self.measure('FREQ', value or 'CHAN1')
+        if header.startswith(':TRAC') and header.endswith(':DATA:LOAD?'):
+            trace = header[len(':TRAC'):header.index(':DATA')] or '1'
+            return str(len(self.traces.get(trace, ([], True))[0]))
+        if header == ':MEAS:COUN:VAL?':
+            return '0.000000e+00'
+        if header == ':MEAS:ITEM:ALL?':
+            return self.measure_all(value or self.settings.get(':MEAS:SOUR', 'CHAN1'))
+        if header.startswith(':ETAB') and header.endswith(':DATA?'):
+            decoder = header[len(':ETAB'):header.index(':DATA')] or '1'
+            return encode_block(self.etable(decoder).encode('ascii'))
+        if header.startswith(':DEC') and header.endswith(':CONF:SRAT?'):
+            return f'{self.sample_rate():.6e}'
+        if header in (':MASK:PASS?', ':MASK:FAIL?', ':MASK:TOT?'):
+            passed, failed = self.mask_counts
+            return str({':MASK:PASS?': passed, ':MASK:FAIL?': failed}.get(header, passed + failed))
+        if header == ':TRIG:POS?':
+            # -2 while not triggered, else the trigger's index in the record
+            return '-2' if self.armed else str(self._record_points() // 2)
+        if header == ':SYST:RAM?':
+            return '4'
+        if header == ':SYST:GAM?':
+            return str(HORIZONTAL_DIVISIONS)
+        setting = header.rstrip('?')
+        if setting in self.settings:
+            return self.settings[setting]
+        self.errors.append('-113,"Undefined header"')
+        return None
+
+    def enabled_channels(self):
+        """Number of enabled analog channels rounded up to 1, 2 or 4"""
+        count = sum(self.settings[f':CHAN{c}:DISP'] in ('1', 'ON') for c in range(1, 5))
+        return 1 if count <= 1 else 2 if count == 2 else 4
+
+    def memory_depth(self):
+        """Current memory depth in points"""
+        depth = self.settings[':ACQ:MDEP']
+        if depth.upper() == 'AUTO':
+            return MEMORY_DEPTHS[self.enabled_channels()][0]
+        return int(float(depth.upper().replace('K', 'e3').replace('M', 'e6')))
+
+    def sample_rate(self):
+        """Sample rate in Sa/s for the current memory depth and timebase"""
+        window = float(self.settings[':TIM:SCAL']) * HORIZONTAL_DIVISIONS
+        return min(self.memory_depth() / window, MAX_SAMPLE_RATE[self.enabled_channels()])
+
+    def preamble(self):
+        """Build the :WAVeform:PREamble? reply"""
+        mode = self._waveform_mode()
+        source = self._source()
+        points = self._record_points()
+        if mode == 'RAW':
+            x_increment = 1 / self.sample_rate()
+        else:
+            x_increment = float(self.settings[':TIM:SCAL']) * HORIZONTAL_DIVISIONS / SCREEN_POINTS
+        x_origin = float(self.settings[':TIM:OFFS']) - points * x_increment / 2
+        y_increment, y_origin = self._y_scaling(source)
+        format = ['WORD', 'BYTE', 'ASC'].index(self._waveform_format())
+        type = ['NORM', 'MAX', 'RAW'].index(mode)
+        return (f'{format},{type},{points},1,{x_increment:.6e},{x_origin:.6e},0,'
+                f'{y_increment:.6e},{y_origin},{Y_REFERENCE}')
+
+    def waveform_data(self):
+        """Build the :WAVeform:DATA? block for the current read window"""
+        format = self._waveform_format()
+        points = self._record_points()
+        start = max(int(self.settings[':WAV:STAR']), 1)
+        stop = min(int(self.settings[':WAV:STOP']), points)
+        if stop < start or stop - start + 1 > MAX_CHUNK_POINTS[format]:
+            self.errors.append('-222,"Data out of range"')
+            return encode_block(b'')
+        if self.running:
+            self.acquisition += 1
+            self._mask_count()
+        source = self._source()
+        if source == 'LA':
+            codes = self._la_codes(start - 1, stop)
+            return encode_block(codes.astype('<u2' if format == 'WORD' else np.uint8).tobytes())
+        if format == 'ASC':
+            volts = self._volts(source, start - 1, stop)
+            return encode_block(','.join(f'{v:.6e}' for v in volts).encode('ascii'))
+        codes = self._codes(source, start - 1, stop)
+        return encode_block(codes.astype('<u2' if format == 'WORD' else np.uint8).tobytes())
+
+    def measure(self, item: str, source: str):
+        """Answer a :MEASure:ITEM? from one screen of the simulated signal"""
+        source, _, reference = source.partition(',')
+        source = canonical_header(source)
+        reference = canonical_header(reference) if reference else None
+        if source not in SIGNALS:
+            return INVALID_VALUE
+        volts = self._volts(source, 0, SCREEN_POINTS, SCREEN_POINTS)
+        reference_volts = self._volts(reference, 0, SCREEN_POINTS, SCREEN_POINTS) if reference in SIGNALS else None
+        try:
+            engine = MeasurementEngine(float(self.settings[':TIM:SCAL']) * HORIZONTAL_DIVISIONS / SCREEN_POINTS,
+                                       max=float(self.settings[':MEAS:SET:MAX']),
+                                       mid=float(self.settings[':MEAS:SET:MID']),
+                                       min=float(self.settings[':MEAS:SET:MIN']))
+            value = engine.compute([item], volts, reference_volts)[0][0]
+        except ValueError:
+            return INVALID_VALUE
+        return INVALID_VALUE if np.isnan(value) else f'{value:.6e}'
+
+    def screenshot(self):
+        """Uncompressed 800x480 24-bit BMP of a blank screen"""
+        width, height = 800, 480
+        pixels = width * height * 3
+        header = (b'BM' + (54 + pixels).to_bytes(4, 'little') + bytes(4) + (54).to_bytes(4, 'little')
+                  + (40).to_bytes(4, 'little') + width.to_bytes(4, 'little') + height.to_bytes(4, 'little')
+                  + (1).to_bytes(2, 'little') + (24).to_bytes(2, 'little') + bytes(4)
+                  + pixels.to_bytes(4, 'little') + bytes(16))
+        return header + bytes(pixels)
+
+    def measure_all(self, source: str):
+        """Answer :MEASure:ITEM:ALL? with every item of VALID_ITEMS, comma-separated"""
+        return ','.join(self.measure(item, source) for item in VALID_ITEMS)
+
+    def etable(self, decoder: str):
+        """CSV event table of the last acquisition in the decoder's mode and format"""
+        mode = canonical_header(self.settings[f':DEC{decoder}:MODE'])
+        format = canonical_header(self.settings[f':DEC{decoder}:FORM'])
+        header = ETABLE_HEADERS.get(mode, ETABLE_HEADERS['PAR'])
+        columns = header.count(',') + 1
+        window = float(self.settings[':TIM:SCAL']) * HORIZONTAL_DIVISIONS
+        lines = [f'NO,TIME,{header}']
+        for row in range(ETABLE_ROWS):
+            time = (row + 0.5) * window / ETABLE_ROWS - window / 2
+            values = [(self.acquisition + row * columns + column) % 26 + 65 for column in range(columns)]
+            lines.append(f'{row + 1},{time:.6e},' + ','.join(self._etable_value(v, format) for v in values))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _etable_value(value: int, format: str):
+        if format == 'ASC':
+            return chr(value)
+        if format == 'DEC':
+            return str(value)
+        if format == 'BIN':
+            return f'{value:08b}'
+        return f'0x{value:02X}'
+
+    def _trigger(self):
+        if self.armed:
+            self.armed = False
+            self.acquisition += 1
+            self._mask_count()
+
+    def _mask_count(self):
+        # The synthetic signals never leave a mask, so every tested frame passes
+        if self.settings[':MASK:ENAB'] in ('1', 'ON'):
+            self.mask_counts[0] += 1
+
+    def _trigger_status(self):
+        if self.armed and time.monotonic() - self.armed_at >= self.trigger_delay:
+            self._trigger()
+        if self.armed:
+            return 'WAIT'
+        if not self.running:
+            return 'STOP'
+        if self._level_crossed():
+            return 'TD'
+        return 'AUTO' if self.settings[':TRIG:SWE'].upper().startswith('AUTO') else 'WAIT'
+
+    def _level_crossed(self):
+        """Whether the edge trigger source swings across the trigger level"""
+        source = canonical_header(self.settings[':TRIG:EDG:SOUR'])
+        if source not in SIGNALS:
+            return False
+        _, _, low, high = SIGNALS[source]
+        return low < float(self.settings[':TRIG:EDG:LEV']) < high
+
+    def _source(self):
+        return canonical_header(self.settings[':WAV:SOUR'])
+
+    def _waveform_mode(self):
+        return canonical_header(self.settings[':WAV:MODE'])
+
+    def _waveform_format(self):
+        return canonical_header(self.settings[':WAV:FORM'])
+
+    def _record_points(self):
+        if self._waveform_mode() == 'RAW' or (self._waveform_mode() == 'MAX' and not self.running):
+            return self.memory_depth()
+        return SCREEN_POINTS
+
+    def _y_scaling(self, source: str):
+        if source not in SIGNALS:
+            return 1.0, 0
+        scale = float(self.settings[f':{source}:SCAL'])
+        offset = float(self.settings[f':{source}:OFFS'])
+        y_increment = scale / CODES_PER_DIVISION
+        return y_increment, int(round(offset / y_increment))
+
+    def _codes(self, source: str, start: int, stop: int):
+        """Sample codes for [start, stop); a stopped record is generated once and reused"""
+        y_increment, y_origin = self._y_scaling(source)
+        if self.running:
+            volts = self._volts(source, start, stop)
+            return np.clip(np.rint(volts / y_increment + y_origin + Y_REFERENCE), 0, 255).astype(np.uint8)
+        key = (source, self.acquisition, self._record_points(), y_increment, y_origin, self.settings[':TIM:SCAL'])
+        if self._record_key != key:
+            volts = self._volts(source, 0, self._record_points())
+            self._record = np.clip(np.rint(volts / y_increment + y_origin + Y_REFERENCE), 0, 255).astype(np.uint8)
+            self._record_key = key
+        return self._record[start:stop]
+
+    def _volts(self, source: str, start: int, stop: int, points: int = None):
+        """Synthetic signal in volts for sample indices [start, stop) of the current record"""
+        points = points or self._record_points()
+        shape, frequency, low, high = SIGNALS.get(source, SIGNALS['CHAN1'])
+        window = float(self.settings[':TIM:SCAL']) * HORIZONTAL_DIVISIONS
+        index = np.arange(start, stop, dtype=np.float64)
+        phase = (index * (window / points) + self.acquisition * 1.7e-5) * frequency % 1.0
+        if shape == 'SQUare':
+            unit = (phase < 0.5).astype(np.float64)
+        elif shape == 'RAMP':
+            unit = phase
+        else:
+            unit = 0.5 + 0.5 * np.sin(2 * np.pi * phase)
+        noise = ((index.astype(np.int64) * 2654435761 + self.acquisition) >> 7 & 0xff) / 255.0 - 0.5
+        return low + (high - low) * unit + 0.01 * (high - low) * noise
+
+    def _la_codes(self, start: int, stop: int):
+        """D0-D15 as a binary counter, bit n toggling every 2**n samples"""
+        return np.arange(start, stop, dtype=np.int64) & 0xffff
+
+    def _check_memory_depth(self, value: str):
+        if value.upper() == 'AUTO':
+            return
+        depth = int(float(value.upper().replace('K', 'e3').replace('M', 'e6')))
+        if depth not in MEMORY_DEPTHS[self.enabled_channels()]:
+            raise ValueError(f'Memory depth {value} not available')
+
+
+class _SimulatorHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        server = self.server
+        for line in self.rfile:
+            block = self._block_start(line)
+            if block is not None:
+                index, header_length, length = block
+                # The payload may contain newlines, so read the rest of the block
+                end = index + header_length + length + 1
+                if len(line) < end:
+                    line += self.rfile.read(end - len(line))
+                command = line[:index].decode('ascii', errors='replace')
+                payload = line[index + header_length:index + header_length + length]
+                responses = server.simulator.handle_block(command, payload)
+            else:
+                responses = server.simulator.handle(line.decode('ascii', errors='replace'))
+            if not responses:
+                continue
+            if server.latency:
+                time.sleep(server.latency)
+            if all(isinstance(r, str) for r in responses):
+                self._send(';'.join(responses).encode('ascii') + b'\n')
+            else:
+                for response in responses:
+                    self._send((response if isinstance(response, bytes) else response.encode('ascii')) + b'\n')
+
+    @staticmethod
+    def _block_start(line: bytes):
+        """(offset, header length, payload length) of a definite-length block in a command, or None"""
+        index = line.find(b'#')
+        if index < 0 or line[index + 1:index + 2] in (b'', b'0') or not line[index + 1:index + 2].isdigit():
+            return None
+        try:
+            header_length, length = parse_block_header(line[index:index + 11])
+        except ValueError:
+            return None
+        return index, header_length, length
+
+    def _send(self, data: bytes):
+        bandwidth = self.server.bandwidth
+        if not bandwidth:
+            self.wfile.write(data)
+            return
+        chunk = 65536
+        for offset in range(0, len(data), chunk):
+            piece = data[offset:offset + chunk]
+            self.wfile.write(piece)
+            time.sleep(len(piece) / bandwidth)
+
+
+class ScopeSimulatorServer(socketserver.ThreadingTCPServer):
+    """TCP stand-in for a DS1104Z on port 5555
+
+    Args:
+        host: Address to bind
+        port: Port to bind (0 picks a free port, see server_address)
+        latency: Seconds added before every response
+        bandwidth: Response throughput limit in bytes/s (0 for unlimited)
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 5555, latency: float = 0.0, bandwidth: float = 0.0):
+        super().__init__((host, port), _SimulatorHandler)
+        self.simulator = ScopeSimulator()
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self._thread = None
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket"""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DS1104Z SCPI simulator')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind')
+    parser.add_argument('--port', type=int, default=5555, help='Port to bind')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added before every response')
+    parser.add_argument('--bandwidth', type=float, default=0.0, help='Response bytes/s limit (0 = unlimited)')
+    args = parser.parse_args()
+
+    server = ScopeSimulatorServer(args.host, args.port, args.latency, args.bandwidth)
+    print(f"Simulating DS1104Z on {args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""IEEE 488.2 definite-length block helpers for Rigol oscilloscope"""
+
+
+def parse_block_header(data: bytes):
+    """Parse a definite-length block header (e.g. b'#9000250000')
+
+    Args:
+        data: Bytes starting with the block header
+
+    Returns:
+        tuple: (header length, payload length) in bytes
+    """
+    if len(data) < 2 or data[0:1] != b'#':
+        raise ValueError(f'Invalid block header: {bytes(data[:11])!r}')
+    digits = int(data[1:2])
+    if digits == 0:
+        raise ValueError('Indefinite-length blocks are not supported')
+    if len(data) < 2 + digits:
+        raise ValueError(f'Truncated block header: {bytes(data[:11])!r}')
+    return 2 + digits, int(data[2:2 + digits])
+
+
+def encode_block(payload: bytes) -> bytes:
+    """Encode payload as a definite-length block"""
+    length = str(len(payload))
+    return f'#{len(length)}{length}'.encode('ascii') + payload
@@ -0,0 +1,167 @@
+# Screenshot objects and periodic screenshot capture for Rigol oscilloscopes
+
+import io
+import queue
+import threading
+import time
+import numpy as np
+
+# Leading bytes of the image formats :DISPlay:DATA? can return
+SIGNATURES = [
+    (b'BM', 'BMP'),
+    (b'\x89PNG', 'PNG'),
+    (b'\xff\xd8', 'JPEG'),
+    (b'II*\x00', 'TIFF'),
+    (b'MM\x00*', 'TIFF'),
+]
+
+def image_format(data) -> str:
+    """Image format of screenshot bytes from their signature"""
+    head = bytes(data[:4])
+    for signature, name in SIGNATURES:
+        if head.startswith(signature):
+            return name
+    return 'UNKNOWN'
+
+def decode_bmp(data):
+    """Decode an uncompressed 24-bit or 8-bit palette BMP into an (height, width, 3) RGB array"""
+    data = memoryview(data)
+    offset = int.from_bytes(data[10:14], 'little')
+    width = int.from_bytes(data[18:22], 'little', signed=True)
+    height = int.from_bytes(data[22:26], 'little', signed=True)
+    bits = int.from_bytes(data[28:30], 'little')
+    compression = int.from_bytes(data[30:34], 'little')
+    if compression != 0 or bits not in (8, 24):
+        raise ValueError(f'Unsupported BMP: {bits} bits, compression {compression}')
+    rows = abs(height)
+    stride = (width * bits // 8 + 3) & ~3
+    pixels = np.frombuffer(data, np.uint8, rows * stride, offset).reshape(rows, stride)
+    if bits == 24:
+        image = pixels[:, :width * 3].reshape(rows, width, 3)[..., ::-1]  # BGR -> RGB
+    else:
+        header_size = int.from_bytes(data[14:18], 'little')
+        colors = int.from_bytes(data[46:50], 'little') or 256
+        palette = np.frombuffer(data, np.uint8, colors * 4, 14 + header_size).reshape(colors, 4)[:, 2::-1]
+        image = palette[pixels[:, :width]]
+    return image[::-1] if height > 0 else image  # Positive height means bottom-up rows
+
+
+class Screenshot:
+    """Undecoded screenshot bytes with the time they were captured"""
+
+    def __init__(self, data: bytes, timestamp: float = None):
+        self.data = data
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    @property
+    def format(self):
+        return image_format(self.data)
+
+    def save(self, path: str):
+        """Write the image file unchanged"""
+        with open(path, 'wb') as f:
+            f.write(self.data)
+
+    def to_array(self):
+        """Decode to an (height, width, 3) RGB array
+
+        BMP is decoded with NumPy; other formats need Pillow (installed with
+        Matplotlib).
+        """
+        if self.format == 'BMP':
+            return decode_bmp(self.data)
+        from PIL import Image
+        return np.asarray(Image.open(io.BytesIO(self.data)).convert('RGB'))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f'Screenshot(format={self.format!r}, bytes={len(self.data)}, timestamp={self.timestamp:.3f})'
+
+
+class ScreenshotRecorder:
+    """Captures screenshots at a fixed rate on a background thread
+
+    Screenshots go into a bounded queue. When the consumer falls behind, the
+    oldest screenshot is discarded and counted in dropped. With a directory,
+    every screenshot is written there instead of being queued.
+
+    The scope must not be used from other threads while recording.
+    """
+
+    def __init__(self, scope, interval: float = 1.0, queue_size: int = 8, format: str = None,
+                 directory: str = None):
+        self.scope = scope
+        self.interval = interval
+        self.format = format
+        self.directory = directory
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.captured = 0
+        self.dropped = 0
+        self.late = 0  # Captures that started after their slot had passed
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def get(self, timeout: float = None):
+        """Get the oldest queued screenshot, or None on timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _run(self):
+        next_time = time.monotonic()
+        while not self._stop.is_set():
+            timestamp = time.time()
+            data = self.scope.display.get_screenshot(self.format)
+            if data:
+                self._publish(Screenshot(data, timestamp))
+            else:
+                self.errors += 1
+            next_time += self.interval
+            delay = next_time - time.monotonic()
+            if delay < 0:
+                # Skip the slots already missed instead of bursting to catch up
+                self.late += 1
+                next_time = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    def _publish(self, screenshot: Screenshot):
+        self.captured += 1
+        if self.directory:
+            stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(screenshot.timestamp))
+            extension = screenshot.format.lower().replace('jpeg', 'jpg')
+            screenshot.save(f'{self.directory}/screenshot_{stamp}_{self.captured:06d}.{extension}')
+            return
+        while True:
+            try:
+                self.queue.put_nowait(screenshot)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
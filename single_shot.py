@@ -0,0 +1,282 @@
+# Back-to-back single-shot trigger capture with dead-time metrics
+
+import threading
+import time
+from collections import deque
+import numpy as np
+from commands.waveform_commands import FORMAT_DTYPES, MAX_CHUNK_POINTS, WaveformCapture
+from waveform_stream import WaveformFrame, WaveformStream
+
+# Statuses of :TRIGger:STATus? after a single acquisition has completed
+TRIGGERED_STATUSES = ('TD', 'STOP')
+
+# Per-cycle record kept by SingleShotCapture (perf_counter seconds)
+CYCLE_DTYPE = np.dtype([
+    ('sequence', 'i8'),
+    ('armed', 'f8'),  # :SINGle sent
+    ('triggered', 'f8'),  # Completed acquisition detected
+    ('read', 'f8'),  # Data of every source received
+    ('dead_time', 'f8'),  # Detection until the next :SINGle
+    ('detection_latency', 'f8'),  # Upper bound on trigger-to-detection time (last poll interval)
+    ('polls', 'i4'),
+])
+
+
+class TriggeredFrame(WaveformFrame):
+    """One single-shot acquisition; data has one row per source"""
+
+    def to_volts(self, dtype=np.float64, out=None):
+        return self.capture().to_volts(dtype=dtype, out=out)
+
+    def capture(self):
+        """The frame as a WaveformCapture (per-source scaling and time axis)"""
+        return WaveformCapture(self.stream.sources, self.data, self.stream.preambles)
+
+    def __repr__(self):
+        return f'TriggeredFrame(sequence={self.sequence}, sources={len(self.data)}, points={self.data.shape[1]})'
+
+
+class SingleShotCapture(WaveformStream):
+    """Arms single acquisitions back to back and hands the data to another thread
+
+    The I/O thread sends :SINGle, confirms it with *OPC?, polls :TRIGger:STATus? until the
+    acquisition has completed, reads each source with :WAVeform:DATA?
+    straight into a preallocated frame and re-arms at once. Polling starts
+    at min_poll and backs off geometrically to max_poll, so short waits are
+    caught quickly without flooding the scope during long ones. Frames are
+    consumed like a WaveformStream (get(), iteration or callback on a
+    dispatcher thread), with the same ring policies.
+
+    Dead time is measured from detecting a completed acquisition to sending
+    the next :SINGle; the scope is also blind for up to one poll interval
+    before detection (detection_latency).
+
+    Args:
+        scope: Connected RigolScope
+        sources: Waveform sources read per acquisition
+        format: Waveform format (BYTE|WORD)
+        mode: Waveform mode (NORMal for the screen, RAW for the memory)
+        window: (start, stop) points to read, 1-based inclusive (default: all)
+        count: Stop after this many captures (default: run until stop())
+        timeout: Seconds to wait for a trigger before re-arming
+        history: Number of recent cycles kept for cycles()
+        max_errors, error_backoff: Error handling as in WaveformStream
+    """
+
+    frame_class = TriggeredFrame
+
+    def __init__(self, scope, sources=('CHANnel1',), format: str = 'BYTE', mode: str = 'NORMal',
+                 window: tuple = None, frames: int = 16, policy: str = 'block', callback=None,
+                 count: int = None, timeout: float = None, min_poll: float = 0.0, max_poll: float = 0.01,
+                 backoff: float = 2.0, history: int = 1024, max_errors: int = 10, error_backoff: float = 0.01):
+        sources = [sources] if isinstance(sources, str) else list(sources)
+        if not sources:
+            raise ValueError('At least one source is required')
+        super().__init__(scope, sources[0], format, frames, policy, callback, max_errors, error_backoff)
+        self.sources = sources
+        self.mode = mode
+        self.window = window
+        self.count = count
+        self.timeout = timeout
+        self.min_poll = min_poll
+        self.max_poll = max_poll
+        self.backoff = backoff
+        self.preambles = []
+        self.timeouts = 0
+        self._history = deque(maxlen=history)
+        self._cycles_closed = 0
+        self._dead_time_total = 0.0
+        self._dead_time_max = 0.0
+        self._pending_cycle = None  # Last cycle, completed when the next :SINGle is sent
+        self._chunks = []  # (start, stop, offset) per :WAVeform:DATA? read, planned in start()
+
+    def start(self):
+        """Configure single sweep and the read window, allocate frames and start the I/O thread"""
+        if self._running:
+            return self
+        scope = self.scope
+        waveform = scope.waveform
+        scope.stop()
+        scope.trigger.set_sweep('SINGle')
+        waveform.set_mode(self.mode)
+        waveform.set_format(self.format)
+        self.preambles = []
+        for source in self.sources:
+            waveform.set_source(source)
+            self.preambles.append(waveform.get_parsed_preamble(refresh=True))
+        start, stop = self.window or (1, self.preambles[0].points)
+        self._chunks = self._plan_chunks(start, stop)
+        if len(self._chunks) == 1:
+            # One chunk of one source: set the window once instead of every cycle
+            waveform.set_start(start)
+            waveform.set_stop(stop)
+        dtype = FORMAT_DTYPES[self.format.upper()]
+        points = stop - start + 1
+        self.buffer = np.empty((self.frames, len(self.sources), points), dtype=dtype)
+        self._scratch = np.empty((len(self.sources), points), dtype=dtype)
+        self._free = deque(range(self.frames))
+        self._ready.clear()
+        self._held = None
+        self.frames_read = self.frames_delivered = self.dropped = self.errors = self.timeouts = 0
+        self._consecutive_errors = 0
+        self._rate_window.clear()
+        self._history.clear()
+        self._cycles_closed = 0
+        self._dead_time_total = self._dead_time_max = 0.0
+        self._pending_cycle = None
+        self._started = time.perf_counter()
+        self._running = True
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+        if self.callback is not None:
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+            self._dispatcher.start()
+        return self
+
+    def wait(self, timeout: float = None):
+        """Wait for the I/O thread to finish (after count captures or stop())"""
+        if self._reader is not None:
+            self._reader.join(timeout)
+        return not self._running
+
+    def cycles(self):
+        """Recent cycles as a structured array (fields as in CYCLE_DTYPE)"""
+        return np.array(list(self._history), dtype=CYCLE_DTYPE)
+
+    def stats(self):
+        """Counters of the stream plus trigger and dead-time metrics"""
+        stats = super().stats()
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        closed = self._cycles_closed
+        recent = self.cycles()
+        stats.update({
+            'captures': self.frames_read,
+            'timeouts': self.timeouts,
+            'captures_per_second': self.frames_read / elapsed if elapsed else 0.0,
+            'dead_time_mean': self._dead_time_total / closed if closed else 0.0,
+            'dead_time_max': self._dead_time_max,
+            'detection_latency_mean': float(recent['detection_latency'].mean()) if len(recent) else 0.0,
+            'polls_mean': float(recent['polls'].mean()) if len(recent) else 0.0,
+            'live_fraction': 1.0 - self._dead_time_total / elapsed if elapsed else 0.0,
+        })
+        return stats
+
+    def _plan_chunks(self, start: int, stop: int):
+        """(start, stop, offset in frame) of each :WAVeform:DATA? read"""
+        max_chunk = MAX_CHUNK_POINTS[self.format.upper()] if self.mode.upper().startswith('RAW') else stop
+        return [(first, min(first + max_chunk - 1, stop), first - start)
+                for first in range(start, stop + 1, max_chunk)]
+
+    def _arm(self):
+        """Send :SINGle, closing the dead time of the previous cycle
+
+        *OPC? returns once the scope has processed :SINGle, so any STOP
+        status read afterwards belongs to the new acquisition.
+        """
+        self.scope.single()
+        armed = time.perf_counter()
+        self._close_cycle(armed)
+        if self.scope.query('*OPC?') != '1':
+            raise ConnectionError('No *OPC? reply after :SINGle')
+        return armed
+
+    def _close_cycle(self, end: float):
+        """Record the pending cycle with its dead time ending at end"""
+        cycle = self._pending_cycle
+        if cycle is None:
+            return
+        cycle['dead_time'] = end - cycle['triggered']
+        self._cycles_closed += 1
+        self._dead_time_total += cycle['dead_time']
+        self._dead_time_max = max(self._dead_time_max, cycle['dead_time'])
+        self._history.append(tuple(cycle[name] for name in CYCLE_DTYPE.names))
+        self._pending_cycle = None
+
+    def _wait_trigger(self, armed: float):
+        """Poll the trigger status with backoff until the acquisition completes
+
+        Returns:
+            tuple: (detection time, last poll interval, polls) or None on timeout/stop
+        """
+        interval = self.min_poll
+        polls = 0
+        last_poll = armed
+        while self._running:
+            status = self.scope.trigger.get_status().upper()
+            now = time.perf_counter()
+            polls += 1
+            if status in TRIGGERED_STATUSES:
+                return now, now - last_poll, polls
+            last_poll = now
+            if self.timeout is not None and now - armed > self.timeout:
+                return None
+            if interval:
+                time.sleep(interval)
+            interval = min(max(interval * self.backoff, 1e-4), self.max_poll)
+        return None
+
+    def _read_frame(self, target):
+        """Read every source of the completed acquisition into target rows"""
+        waveform = self.scope.waveform
+        for row, source in enumerate(self.sources):
+            if len(self.sources) > 1:
+                waveform.set_source(source)
+            for start, stop, offset in self._chunks:
+                # Changing the source resets the window, so it is set again
+                if len(self._chunks) > 1 or len(self.sources) > 1:
+                    waveform.set_start(start)
+                    waveform.set_stop(stop)
+                chunk = target[row, offset:offset + stop - start + 1]
+                data = self.scope.query_binary(':WAVeform:DATA?', chunk)
+                received = memoryview(data).nbytes // chunk.itemsize
+                if received != len(chunk):
+                    raise ConnectionError(f'Incomplete {source} data: expected {len(chunk)} points, '
+                                          f'got {received}')
+
+    def _read_loop(self):
+        while self._running and (self.count is None or self.frames_read < self.count):
+            try:
+                armed = self._arm()
+                detected = self._wait_trigger(armed)
+                if detected is None:
+                    if self._running:
+                        self.timeouts += 1
+                    continue
+                triggered, latency, polls = detected
+                slot = self._acquire_slot()
+                if not self._running:
+                    if slot is not None:
+                        with self._condition:
+                            self._free.append(slot)
+                    break
+                target = self.buffer[slot] if slot is not None else self._scratch
+                try:
+                    self._read_frame(target)
+                except Exception:
+                    if slot is not None:
+                        with self._condition:
+                            self._free.append(slot)
+                    raise
+            except Exception as e:
+                if not self._handle_error(e):
+                    break
+                continue
+            self._consecutive_errors = 0
+            read = time.perf_counter()
+            self._pending_cycle = {'sequence': self.frames_read, 'armed': armed, 'triggered': triggered,
+                                   'read': read, 'dead_time': 0.0, 'detection_latency': latency,
+                                   'polls': polls}
+            with self._condition:
+                self._rate_window.append(read)
+                self.frames_read += 1
+                if slot is None:
+                    self.dropped += 1
+                else:
+                    self._ready.append((slot, self.frames_read - 1, time.time()))
+                    self._condition.notify_all()
+        if self._pending_cycle is not None:
+            # No re-arm follows the last capture; its dead time ends when its data is read
+            self._close_cycle(self._pending_cycle['read'])
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
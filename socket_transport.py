@@ -0,0 +1,133 @@
+"""Raw-socket SCPI transport for Rigol oscilloscope (LAN port 5555)"""
+
+import socket
+from scpi_block import parse_block_header
+
+class SocketTransport:
+    """Persistent TCP connection reading into reusable preallocated buffers"""
+
+    def __init__(self, host: str, port: int = 5555, timeout: float = 5.0, buffer_size: int = 65536):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sock = None
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._start = 0  # First unread byte in the receive buffer
+        self._end = 0  # One past the last received byte
+
+    def connect(self):
+        """Open the connection with Nagle's algorithm disabled"""
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._start = self._end = 0
+
+    def close(self):
+        """Close the connection"""
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def reconnect(self):
+        """Drop the connection with any unread reply and open a new one
+
+        If the new connection fails it is retried on the next send.
+        """
+        self.close()
+        self._start = self._end = 0
+        self.connect()
+
+    def send_command(self, command: str):
+        """Send a command terminated with a newline"""
+        self.write_raw(command.encode('ascii') + b'\n')
+
+    def write_raw(self, data: bytes):
+        """Send a complete message (e.g. one carrying a binary block) unchanged"""
+        if self.sock is None:
+            self.connect()
+        self.sock.sendall(data)
+
+    def query(self, command: str) -> str:
+        """Send a query and return the response line"""
+        self.send_command(command)
+        return self.read_line().decode('ascii')
+
+    def query_binary(self, command: str, out=None):
+        """Send a query and return the payload of its IEEE 488.2 block response
+
+        Args:
+            command: Query returning a definite-length block
+            out: Optional writable buffer (bytearray, NumPy array) that receives
+                the payload directly from the socket
+
+        Returns:
+            memoryview: Block payload bytes
+        """
+        self.send_command(command)
+        return self.read_block(out)
+
+    def read_line(self) -> bytes:
+        """Read up to and excluding the next newline"""
+        while True:
+            index = self._buffer.find(b'\n', self._start, self._end)
+            if index >= 0:
+                line = bytes(self._view[self._start:index])
+                self._start = index + 1
+                return line
+            self._fill()
+
+    def read_block(self, out=None):
+        """Read a definite-length block, receiving the payload straight into out"""
+        self._require(2)
+        digits = self._buffer[self._start + 1] - ord('0')
+        self._require(2 + digits)
+        header_length, length = parse_block_header(bytes(self._view[self._start:self._start + 2 + digits]))
+        self._start += header_length
+        if out is None:
+            out = bytearray(length)
+        target = memoryview(out).cast('B')
+        too_small = len(target) < length
+        if too_small:
+            target = memoryview(bytearray(length))  # Still drain the payload to stay in sync
+        self.read_into(target[:length])
+        self._require(1)
+        if self._buffer[self._start] == ord('\n'):
+            self._start += 1
+        if too_small:
+            raise ValueError(f'Output buffer too small for {length} bytes')
+        return target[:length]
+
+    def read_into(self, target: memoryview):
+        """Fill target exactly, draining buffered bytes before reading the socket"""
+        buffered = min(self._end - self._start, len(target))
+        target[:buffered] = self._view[self._start:self._start + buffered]
+        self._start += buffered
+        received = buffered
+        while received < len(target):
+            count = self.sock.recv_into(target[received:])
+            if not count:
+                raise ConnectionError('Connection closed by oscilloscope')
+            received += count
+
+    def _require(self, count: int):
+        """Make sure at least count unread bytes are buffered"""
+        while self._end - self._start < count:
+            self._fill()
+
+    def _fill(self):
+        """Receive more bytes into the buffer, compacting or growing it as needed"""
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif self._end == len(self._buffer):
+            pending = self._end - self._start
+            if self._start == 0:
+                self._view.release()
+                self._buffer.extend(bytes(len(self._buffer)))
+                self._view = memoryview(self._buffer)
+            else:
+                self._view[:pending] = self._view[self._start:self._end]
+                self._start, self._end = 0, pending
+        count = self.sock.recv_into(self._view[self._end:])
+        if not count:
+            raise ConnectionError('Connection closed by oscilloscope')
+        self._end += count
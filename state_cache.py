@@ -0,0 +1,111 @@
+"""Shadow instrument-state cache for Rigol oscilloscope"""
+
+import re
+
+# Prefixes of the settings that change acquisition timing
+TIMING_PREFIXES = (':ACQUIRE', ':TIMEBASE', ':CHANNEL', ':LA')
+# Prefixes of the settings that change waveform scaling
+SCALING_PREFIXES = (':CHANNEL', ':MATH', ':WAVEFORM')
+
+class StateCache:
+    """Shadow copy of settings written to and static values read from the scope
+
+    Writes of a value the scope already has are dropped and read-only queries
+    are answered from cache until a write they depend on invalidates them.
+    Changes made on the front panel are not seen; call clear() after them.
+    """
+
+    # Commands that reset the whole instrument state
+    FLUSH_COMMANDS = ('*RST', '*RCL', ':AUTOSCALE', ':SYSTEM:AUTOSCALE', ':SYSTEM:SETUP')
+
+    # Commands that take a parameter but perform an action, so are never dropped
+    # (:TRIGger:SWEep SINGle re-arms the trigger each time it is sent)
+    ACTION_COMMANDS = (':SYSTEM:AUTOSCALE', ':SYSTEM:SETUP', ':SYSTEM:OPTION',
+                       ':FUNCTION:WRECORD:OPERATE', ':FUNCTION:WREPLAY:OPERATE',
+                       ':MEASURE:ITEM', ':MEASURE:STATISTIC:ITEM', ':TRACE', ':DISPLAY:DATA',
+                       ':TRIGGER:SWEEP')
+
+    # Cacheable queries and the command prefixes whose writes invalidate them
+    CACHED_QUERIES = {
+        '*IDN?': (),
+        ':ACQUIRE:SRATE?': TIMING_PREFIXES,
+        ':ACQUIRE:MDEPTH?': TIMING_PREFIXES,
+        ':WAVEFORM:FORMAT?': (':WAVEFORM:FORMAT',),
+        ':WAVEFORM:XINCREMENT?': TIMING_PREFIXES + (':WAVEFORM',),
+        ':WAVEFORM:XORIGIN?': TIMING_PREFIXES + (':WAVEFORM',),
+        ':WAVEFORM:XREFERENCE?': TIMING_PREFIXES + (':WAVEFORM',),
+        ':WAVEFORM:YINCREMENT?': SCALING_PREFIXES,
+        ':WAVEFORM:YORIGIN?': SCALING_PREFIXES,
+        ':WAVEFORM:YREFERENCE?': SCALING_PREFIXES,
+        ':WAVEFORM:PREAMBLE?': TIMING_PREFIXES + SCALING_PREFIXES,
+        ':FUNCTION:WRECORD:FMAX?': TIMING_PREFIXES + (':FUNCTION',),
+    }
+
+    # Settings that change other settings as a side effect
+    COUPLED_SETTINGS = [
+        (re.compile(r'(:CHANNEL\d):(RANGE|SCALE|PROBE|VERNIER)$'), (r'\1:RANGE', r'\1:SCALE', r'\1:OFFSET')),
+        (re.compile(r':(ACQUIRE|TIMEBASE|WAVEFORM:SOURCE|WAVEFORM:MODE)'), (':WAVEFORM:STAR', ':WAVEFORM:STOP')),
+        (re.compile(r':TIMEBASE:MODE$'), (':TIMEBASE:SCALE', ':TIMEBASE:OFFSET')),
+    ]
+
+    def __init__(self):
+        self.settings = {}
+        self.queries = {}
+        self.skipped_writes = 0
+        self.query_hits = 0
+
+    @staticmethod
+    def _split(command: str):
+        """Split a command into its upper-case header and its parameter"""
+        header, _, value = command.strip().partition(' ')
+        return header.upper(), value.strip()
+
+    def is_redundant(self, command: str) -> bool:
+        """Check whether a write would set a value the scope already has"""
+        header, value = self._split(command)
+        if value and self.settings.get(header) == value:
+            self.skipped_writes += 1
+            return True
+        return False
+
+    def record_write(self, command: str):
+        """Update the shadow state for a command about to be sent"""
+        header, value = self._split(command)
+        if header.startswith(self.FLUSH_COMMANDS):
+            self.clear()
+            return
+        for pattern, templates in self.COUPLED_SETTINGS:
+            match = pattern.match(header)
+            if match:
+                self._drop_settings(tuple(match.expand(t) for t in templates))
+        self.queries = {query: response for query, response in self.queries.items()
+                        if not header.startswith(self.CACHED_QUERIES[query])}
+        if value and not header.startswith(('*',) + self.ACTION_COMMANDS):
+            self.settings[header] = value
+
+    def discard(self, command: str):
+        """Forget a setting whose write failed"""
+        self.settings.pop(self._split(command)[0], None)
+
+    def get_query(self, command: str):
+        """Get a cached query response, or None"""
+        response = self.queries.get(command.strip().upper())
+        if response is not None:
+            self.query_hits += 1
+        return response
+
+    def record_query(self, command: str, response: str):
+        """Cache the response of a cacheable query"""
+        query = command.strip().upper()
+        if query in self.CACHED_QUERIES and response:
+            self.queries[query] = response
+
+    def clear(self):
+        """Forget everything"""
+        self.settings.clear()
+        self.queries.clear()
+
+    def _drop_settings(self, prefixes: tuple):
+        """Forget settings whose header starts with any of prefixes"""
+        for header in [h for h in self.settings if h.startswith(prefixes)]:
+            del self.settings[header]
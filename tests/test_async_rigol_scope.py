@@ -0,0 +1,202 @@
+"""AsyncRigolScope command groups return what the synchronous RigolScope returns"""
+
+import asyncio
+import os
+import sys
+import threading
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_rigol_scope import MAX_WORKER_THREADS, AsyncRigolScope
+from rigol_scope import RigolScope
+from scope_simulator import ScopeSimulatorServer
+
+TIMEOUT = 0.5
+
+# Every public command group method with a return value, with arguments
+CALLS = [
+    ('acquire', 'get_memory_depth', ()),
+    ('acquire', 'get_sample_rate', ()),
+    ('decoder', 'get_config_srate', (1,)),
+    ('decoder', 'get_format', (1,)),
+    ('decoder', 'get_mode', (1,)),
+    ('display', 'get_data', ()),
+    ('display', 'get_screenshot', ()),
+    ('display', 'save_screenshot', ('{tmp}/screen.bmp',)),
+    ('etable', 'get_data', (1,)),
+    ('etable', 'get_data_array', (1, 'RS232', 'HEX')),
+    ('etable', 'poll', (1, 'RS232', 'HEX')),
+    ('function', 'get_record_end', ()),
+    ('function', 'get_record_interval', ()),
+    ('function', 'get_record_max', ()),
+    ('function', 'get_replay_current', ()),
+    ('function', 'get_replay_max', ()),
+    ('ieee', 'get_event_status', ()),
+    ('ieee', 'get_identification', ()),
+    ('ieee', 'get_status_byte', ()),
+    ('ieee', 'self_test', ()),
+    ('mask', 'get_failed', ()),
+    ('mask', 'get_passed', ()),
+    ('mask', 'get_total', ()),
+    ('measure', 'get_all_measurements', ()),
+    ('measure', 'get_all_measurements_array', ()),
+    ('measure', 'get_counter_value', ()),
+    ('measure', 'get_frequency', ('CHANnel1',)),
+    ('measure', 'get_measurement', ('VPP', 'CHANnel1')),
+    ('measure', 'get_measurements', (['VPP', 'FREQuency'], ['CHANnel1', 'CHANnel2'])),
+    ('measure', 'get_statistics', (['VPP'], 'CHANnel1')),
+    ('storage', 'get_image_color', ()),
+    ('storage', 'get_image_invert', ()),
+    ('storage', 'get_image_type', ()),
+    ('system', 'get_error', ()),
+    ('system', 'get_gam', ()),
+    ('system', 'get_ram', ()),
+    ('trace', 'get_data_load', (1,)),
+    ('trace', 'upload', (1, np.sin(np.linspace(0, 2 * np.pi, 20000)))),
+    ('trigger', 'get_position', ()),
+    ('trigger', 'get_status', ()),
+    ('waveform', 'get_data_array', ()),
+    ('waveform', 'get_data', ()),
+    ('waveform', 'get_format', ()),
+    ('waveform', 'get_parsed_preamble', ()),
+    ('waveform', 'get_preamble', ()),
+    ('waveform', 'get_volts', ()),
+    ('waveform', 'get_x_increment', ()),
+    ('waveform', 'get_x_origin', ()),
+    ('waveform', 'get_x_reference', ()),
+    ('waveform', 'get_y_increment', ()),
+    ('waveform', 'get_y_origin', ()),
+    ('waveform', 'get_y_reference', ()),
+    ('waveform', 'prepare_raw', ('CHANnel1', 'BYTE')),
+    ('waveform', 'capture', (['CHANnel1', 'CHANnel2'],)),
+    ('waveform', 'read_raw', ('CHANnel1',)),
+]
+
+
+@pytest.fixture
+def server():
+    with ScopeSimulatorServer(port=0) as server:
+        yield server
+
+
+def outcome(call):
+    """Result of call(), or the type of the exception it raised"""
+    try:
+        return call()
+    except Exception as e:
+        return type(e)
+
+
+def same(a, b):
+    if isinstance(a, (np.ndarray, memoryview)) or isinstance(b, (np.ndarray, memoryview)):
+        return np.array_equal(np.asarray(a), np.asarray(b), equal_nan=np.asarray(a).dtype.kind == 'f')
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if hasattr(a, '__dict__') and not isinstance(a, type):
+        return type(a) is type(b) and vars(a).keys() == vars(b).keys() and \
+            all(same(value, vars(b)[key]) for key, value in vars(a).items())
+    if isinstance(a, float) and isinstance(b, float) and np.isnan(a) and np.isnan(b):
+        return True
+    return a == b
+
+
+@pytest.mark.parametrize('group, method, args', CALLS, ids=[f'{g}.{m}' for g, m, _ in CALLS])
+def test_async_matches_sync(server, tmp_path, group, method, args):
+    port = server.server_address[1]
+    args = tuple(arg.format(tmp=tmp_path) if isinstance(arg, str) else arg for arg in args)
+    scope = RigolScope()
+    assert scope.connect_socket('127.0.0.1', port, TIMEOUT)
+    scope.stop()  # Freeze the simulated acquisition so both reads see the same data
+    instrumentation = scope.enable_instrumentation()
+    expected = outcome(lambda: getattr(getattr(scope, group), method)(*args))
+    # Both sides timing out would compare equal without testing anything
+    timeouts = sum(stats['timeouts'] for stats in instrumentation.snapshot()['commands'].values())
+    assert timeouts == 0, f'{group}.{method}: the simulator did not answer'
+
+    async def run():
+        async with AsyncRigolScope('127.0.0.1', port, TIMEOUT) as async_scope:
+            try:
+                return await getattr(getattr(async_scope, group), method)(*args)
+            except Exception as e:
+                return type(e)
+
+    result = asyncio.run(run())
+    scope.disconnect()
+    assert same(result, expected), f'{group}.{method}: {result!r} != {expected!r}'
+
+
+def test_round_trips_run_once(server):
+    """A method with n queries costs n round trips, not a rerun per reply"""
+    port = server.server_address[1]
+
+    async def run():
+        async with AsyncRigolScope('127.0.0.1', port) as scope:
+            queries = []
+            query = scope.query
+
+            async def counting_query(command, timeout=None):
+                queries.append(command)
+                return await query(command, timeout)
+            scope.query = counting_query
+            await scope.waveform.get_parsed_preamble(refresh=True)
+            await scope.measure.get_statistics(['VPP', 'VMAX'], 'CHANnel1')
+            return queries
+
+    queries = asyncio.run(run())
+    assert queries.count(':WAVeform:PREamble?') == 1
+
+
+def pool_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith('AsyncRigolScope')]
+
+
+def test_scopes_share_a_bounded_pool(server):
+    """Worker threads don't grow with the number of scopes and go away on disconnect"""
+    port = server.server_address[1]
+
+    async def run():
+        scopes = [AsyncRigolScope('127.0.0.1', port) for _ in range(MAX_WORKER_THREADS + 8)]
+        for scope in scopes:
+            await scope.connect()
+        results = await asyncio.gather(*(scope.ieee.get_identification() for scope in scopes))
+        threads = len(pool_threads())
+        for scope in scopes:
+            await scope.disconnect()
+        return results, threads
+
+    results, threads = asyncio.run(run())
+    assert all(result.startswith('RIGOL') for result in results)
+    assert threads <= MAX_WORKER_THREADS
+    for thread in pool_threads():
+        thread.join(1)
+    assert not pool_threads()
+
+
+def test_cancelled_call_stops_at_next_io(server):
+    port = server.server_address[1]
+
+    async def run():
+        async with AsyncRigolScope('127.0.0.1', port) as scope:
+            sent = []
+            send_command = scope.send_command
+
+            async def slow_send(command, timeout=None):
+                sent.append(command)
+                await asyncio.sleep(0.2)
+                return await send_command(command, timeout)
+            scope.send_command = slow_send
+            task = asyncio.create_task(scope.waveform.capture(['CHANnel1', 'CHANnel2']))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            scope.send_command = send_command
+            # The scope is usable at once and the cancelled method sent nothing more
+            identification = await scope.ieee.get_identification()
+            return sent, identification
+
+    sent, identification = asyncio.run(run())
+    assert sent == [':STOP']
+    assert identification.startswith('RIGOL')
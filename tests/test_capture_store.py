@@ -0,0 +1,45 @@
+"""record_capture against the simulator"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capture_store import CaptureFile, record_capture
+from rigol_scope import RigolScope
+from scope_simulator import ScopeSimulatorServer
+
+
+@pytest.fixture
+def scope():
+    with ScopeSimulatorServer(port=0) as server:
+        scope = RigolScope()
+        assert scope.connect_socket('127.0.0.1', server.server_address[1], 2)
+        yield scope
+        scope.disconnect()
+
+
+def test_records_append_to_one_file(scope, tmp_path):
+    path = str(tmp_path / 'capture.rcap')
+    scope.channel.set_display(2, True)  # 600K needs two channels
+    scope.acquire.set_memory_depth('600K')
+    first = record_capture(scope, path, 'CHANnel1', chunk_size=100000)
+    capture = record_capture(scope, path, 'CHANnel1', append=True)
+    assert first.records == 1 and capture.records == 2
+    assert capture.codes.shape == (2, 600000)
+    expected = scope.waveform.read_raw('CHANnel1')
+    assert np.array_equal(capture.codes[0], expected) and np.array_equal(capture.codes[1], expected)
+    assert capture.settings[':ACQuire:MDEPth?'] == '600000'
+    assert None not in capture.settings.values()
+    assert np.allclose(capture.volts[1, :10], capture.preamble.to_volts(expected[:10]))
+
+
+def test_append_refuses_other_scaling(scope, tmp_path):
+    path = str(tmp_path / 'capture.rcap')
+    record_capture(scope, path, 'CHANnel1')
+    scope.channel.set_scale(1, 2)
+    with pytest.raises(ValueError):
+        record_capture(scope, path, 'CHANnel1', append=True)
+    assert CaptureFile(path).records == 1
@@ -0,0 +1,85 @@
+"""Event table parsing and incremental polling"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands.etable_commands import ETableCommands, parse_value
+
+HEADER = 'Time,TX,RX'
+
+
+class TableDevice:
+    """Device whose :ETABle<n>:DATA? returns text, or fails with an empty block"""
+
+    def __init__(self):
+        self.text = ''
+
+    def query_binary(self, command):
+        return self.text.encode('ascii')
+
+
+def table(events, descending=False):
+    """Event table text for (time, tx) events, numbered from 1 in display order"""
+    events = sorted(events, reverse=descending)
+    return '\n'.join([HEADER] + [f'{row},{time:.6e},{tx:02X},' for row, (time, tx) in enumerate(events, 1)])
+
+
+def poll(etable):
+    return [int(tx) for tx in etable.poll(1, 'RS232', 'HEX')['tx']]
+
+
+def test_parse_value_dec_is_base_10():
+    assert parse_value('012', 'DEC') == (12, False)
+    assert parse_value('0x1F', 'HEX') == (31, False)
+    assert parse_value('0b101', 'BIN') == (5, False)
+
+
+def test_poll_returns_only_new_rows():
+    device = TableDevice()
+    etable = ETableCommands(device)
+    device.text = table([(1.0, 1), (2.0, 2)])
+    assert poll(etable) == [1, 2]
+    device.text = table([(1.0, 1), (2.0, 2), (3.0, 3)])
+    assert poll(etable) == [3]
+    assert poll(etable) == []
+
+
+def test_failed_read_keeps_the_position():
+    device = TableDevice()
+    etable = ETableCommands(device)
+    device.text = table([(1.0, 1), (2.0, 2)])
+    poll(etable)
+    device.text = ''
+    assert poll(etable) == []
+    device.text = table([(1.0, 1), (2.0, 2), (3.0, 3)])
+    assert poll(etable) == [3]
+
+
+def test_wrapped_table():
+    device = TableDevice()
+    etable = ETableCommands(device)
+    device.text = table([(1.0, 1), (2.0, 2), (3.0, 3)])
+    poll(etable)
+    # The oldest rows drop out and the rest are renumbered
+    device.text = table([(3.0, 3), (4.0, 4), (5.0, 5)])
+    assert poll(etable) == [4, 5]
+
+
+def test_descending_table():
+    device = TableDevice()
+    etable = ETableCommands(device)
+    device.text = table([(1.0, 1), (2.0, 2)], descending=True)
+    assert poll(etable) == [1, 2]
+    device.text = table([(1.0, 1), (2.0, 2), (3.0, 3), (4.0, 4)], descending=True)
+    assert poll(etable) == [3, 4]
+
+
+def test_restarted_table_is_returned_again():
+    device = TableDevice()
+    etable = ETableCommands(device)
+    device.text = table([(1.0, 1), (2.0, 2)])
+    poll(etable)
+    device.text = table([(0.5, 7)])
+    assert poll(etable) == [7]
@@ -0,0 +1,168 @@
+"""RigolScope against the simulator"""
+
+import os
+import sys
+import threading
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rigol_scope import RigolScope
+from scope_simulator import ScopeSimulatorServer
+
+
+@pytest.fixture
+def server():
+    with ScopeSimulatorServer(port=0) as server:
+        yield server
+
+
+def connect(server, timeout: float = 2.0):
+    scope = RigolScope()
+    assert scope.connect_socket('127.0.0.1', server.server_address[1], timeout)
+    return scope
+
+
+def test_timed_out_reply_does_not_shift_later_replies(server):
+    scope = connect(server, 0.2)
+    server.bandwidth = 2e5  # The screenshot needs seconds, the timeout hits mid-block
+    assert scope.query_binary(':DISPlay:DATA?') == b''
+    server.bandwidth = 0
+    assert scope.query('*IDN?').startswith('RIGOL')
+    assert scope.query(':WAVeform:FORMat?') == 'BYTE'
+    scope.disconnect()
+
+
+def test_data_format_follows_reset(server):
+    scope = connect(server)
+    scope.waveform.set_format('WORD')
+    assert scope.waveform.get_data_array().dtype == 'uint16'
+    scope.ieee.reset()
+    data = scope.waveform.get_data_array()
+    assert data.dtype == 'uint8' and len(data) == 1200
+    scope.disconnect()
+
+
+def test_batch_reports_only_its_own_errors(server):
+    scope = connect(server)
+    scope.send_command(':NOT:A:COMMand')  # Leaves -113 in the error queue
+    with scope.batch() as batch:
+        scope.channel.set_scale(1, 2)
+        scope.timebase.set_main_scale(0.001)
+    assert batch.errors == []
+    assert float(scope.query(':CHANnel1:SCALe?')) == 2
+    with scope.batch() as batch:
+        scope.send_command(':NOT:A:COMMand')
+    assert len(batch.errors) == 1 and batch.errors[0].startswith('-113')
+    scope.disconnect()
+
+
+def test_batch_send_failure_is_recorded(server):
+    scope = connect(server)
+    scope.enable_cache()
+    scope.channel.set_scale(1, 1)
+
+    def fail(message):
+        raise BrokenPipeError('Broken pipe')
+    scope._write = fail
+    with scope.batch() as batch:
+        scope.channel.set_scale(1, 2)
+    assert 'Failed to send command: Broken pipe' in batch.errors
+    assert 'No *OPC? reply after the batch' not in batch.errors  # Nothing was sent to wait for
+    del scope._write
+    # The cache did not keep the unsent value, so setting it again is sent
+    scope.channel.set_scale(1, 2)
+    assert float(scope.query(':CHANnel1:SCALe?')) == 2
+    scope.disconnect()
+
+
+def test_wait_complete_after_opc_timeout_stays_in_step(server):
+    scope = connect(server, 0.3)
+    server.latency = 0.5  # *OPC? times out; its "1" arrives late
+    timer = threading.Timer(0.4, setattr, (server, 'latency', 0.0))
+    timer.start()
+    assert scope.wait_complete(timeout=3)
+    timer.join()
+    assert scope.query('*IDN?').startswith('RIGOL')
+    assert scope.query('*ESR?') == '0'
+    scope.disconnect()
+
+
+def test_instrumentation_counts_resync_retries(server):
+    scope = connect(server, 0.2)
+    scope.enable_instrumentation()
+    server.bandwidth = 2e5
+    scope.query_binary(':DISPlay:DATA?')
+    server.bandwidth = 0
+    stats = scope.instrumentation.snapshot()['commands'][':DISPlay:DATA?']
+    assert (stats['errors'], stats['timeouts'], stats['retries']) == (1, 1, 1)
+    scope.disconnect()
+
+
+def test_read_raw_matches_chunked_reads(server):
+    scope = connect(server)
+    scope.acquire.set_memory_depth('1200K')  # Five BYTE chunks of at most 250000 points
+    data = scope.waveform.read_raw('CHANnel1')
+    assert data.dtype == 'uint8' and len(data) == 1200000
+    chunks = list(scope.waveform.iter_raw('CHANnel1', chunk_size=70000))
+    assert [start for start, _ in chunks] == list(range(0, 1200000, 70000))
+    assert np.array_equal(np.concatenate([chunk for _, chunk in chunks]), data)
+    words = scope.waveform.read_raw('CHANnel1', 'WORD')
+    assert words.dtype == 'uint16' and np.array_equal(words, data)
+    scope.disconnect()
+
+
+def test_query_binary_receives_into_out(server):
+    scope = connect(server)
+    out = bytearray(1200)
+    data = scope.query_binary(':WAVeform:DATA?', out)
+    assert memoryview(data).nbytes == 1200 and bytes(data) == bytes(out)
+    assert scope.query_binary(':NOT:A:QUERy?') == b''  # No reply: resynchronized
+    assert scope.query('*IDN?').startswith('RIGOL')
+    scope.disconnect()
+
+
+def test_query_many_pairs_replies_with_queries(server):
+    scope = connect(server, 0.5)
+    assert scope.query_many(['*IDN?', ':WAVeform:FORMat?', ':WAVeform:MODE?']) == \
+        [scope.query('*IDN?'), 'BYTE', 'NORM']
+    # The unanswered query leaves too few replies, so none can be trusted
+    assert scope.query_many(['*IDN?', ':NOT:A:QUERy?', ':WAVeform:FORMat?']) == [None] * 3
+    scope.disconnect()
+
+
+def test_cache_drops_redundant_writes_only(server):
+    scope = connect(server)
+    scope.enable_cache()
+    scope.enable_instrumentation()
+    scope.waveform.set_format('WORD')
+    scope.waveform.set_format('WORD')
+    scope.trigger.set_sweep('SINGle')
+    scope.trigger.set_sweep('SINGle')  # Re-arms the trigger, never dropped
+    commands = scope.instrumentation.snapshot()['commands']
+    assert commands[':WAVeform:FORMat']['count'] == 1
+    assert commands[':TRIGger:SWEep']['count'] == 2
+    assert scope.cache.skipped_writes == 1
+    scope.disconnect()
+
+
+def test_cache_resends_window_after_mode_change(server):
+    scope = connect(server)
+    scope.enable_cache()
+    scope.waveform.set_start(100)
+    scope.waveform.set_mode('RAW')  # The scope resets the read window
+    assert scope.query(':WAVeform:STARt?') == '1'
+    scope.waveform.set_start(100)
+    assert scope.query(':WAVeform:STARt?') == '100'
+    scope.disconnect()
+
+
+def test_cached_queries_follow_settings(server):
+    scope = connect(server)
+    scope.enable_cache()
+    rate = scope.acquire.get_sample_rate()
+    assert scope.acquire.get_sample_rate() == rate and scope.cache.query_hits == 1
+    scope.timebase.set_main_scale(0.01)
+    assert scope.acquire.get_sample_rate() == rate / 10
+    scope.disconnect()
@@ -0,0 +1,44 @@
+"""ScopeFleet against simulators, one of them unreachable"""
+
+import os
+import socket
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scope_fleet import ScopeFleet
+from scope_simulator import ScopeSimulatorServer
+from socket_transport import SocketTransport
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def fleet():
+    with ScopeSimulatorServer(port=0) as good, ScopeSimulatorServer(port=0) as bad:
+        addresses = {'good': good.server_address[1], 'bad': bad.server_address[1]}
+        fleet = ScopeFleet(list(addresses))
+        for name, scope in fleet.scopes.items():
+            assert scope.connect_socket('127.0.0.1', addresses[name], 0.5)
+        # The bad scope loses its connection and cannot reconnect
+        fleet.scopes['bad'].socket.close()
+        fleet.scopes['bad'].socket = SocketTransport('127.0.0.1', closed_port(), 0.5)
+        yield fleet
+        fleet.disconnect()
+
+
+def test_broadcast_fails_the_broken_scope(fleet):
+    result = fleet.broadcast(lambda scope: scope.channel.set_scale(1, 2))
+    assert list(result.results) == ['good']
+    assert list(result.errors) == ['bad']
+
+
+def test_measurements_of_the_broken_scope_are_errors(fleet):
+    result = fleet.get_measurements(['VPP'], ['CHANnel1'])
+    assert list(result.results) == ['good']
+    assert isinstance(result.errors['bad'], ConnectionError)
@@ -0,0 +1,53 @@
+"""SingleShotCapture against the simulator"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rigol_scope import RigolScope
+from scope_simulator import ScopeSimulatorServer
+from single_shot import SingleShotCapture
+
+SOURCES = ['CHANnel1', 'CHANnel2']
+
+
+@pytest.fixture
+def scope():
+    with ScopeSimulatorServer(port=0) as server:
+        scope = RigolScope()
+        assert scope.connect_socket('127.0.0.1', server.server_address[1], 2)
+        yield scope
+        scope.disconnect()
+
+
+def expected(scope, source, mode, start, stop):
+    """The window read on its own, after the capture has stopped"""
+    waveform = scope.waveform
+    waveform.set_source(source)
+    waveform.set_mode(mode)
+    waveform.set_start(start)
+    waveform.set_stop(stop)
+    return scope.waveform.get_data_array()
+
+
+@pytest.mark.parametrize('mode, window', [('NORMal', (100, 500)), ('NORMal', None), ('RAW', None)])
+def test_multiple_sources(scope, mode, window):
+    capture = SingleShotCapture(scope, SOURCES, mode=mode, window=window, count=3, timeout=2)
+    capture.start()
+    assert capture.wait(20)
+    assert capture.errors == 0, capture.last_error
+    assert capture.frames_read == 3
+    start, stop = window or (1, capture.preambles[0].points)
+    frame = capture.get(1)
+    assert frame.data.shape == (len(SOURCES), stop - start + 1)
+    # The channels carry different signals, so each row must come from its own source
+    assert not np.array_equal(frame.data[0], frame.data[1])
+    last = None
+    while frame is not None:
+        last = frame.data.copy()
+        frame = capture.get(0.1)
+    for row, source in enumerate(SOURCES):
+        assert np.array_equal(last[row], expected(scope, source, mode, start, stop))
@@ -0,0 +1,69 @@
+"""WaveformStream against the simulator"""
+
+import os
+import sys
+import time
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rigol_scope import RigolScope
+from scope_simulator import SCREEN_POINTS, ScopeSimulatorServer
+from waveform_stream import WaveformStream
+
+
+@pytest.fixture
+def server():
+    with ScopeSimulatorServer(port=0) as server:
+        yield server
+
+
+def connect(server, timeout: float = 2.0):
+    scope = RigolScope()
+    assert scope.connect_socket('127.0.0.1', server.server_address[1], timeout)
+    return scope
+
+
+@pytest.mark.parametrize('format', ['BYTE', 'WORD'])
+def test_frames_are_complete_and_in_order(server, format):
+    scope = connect(server)
+    with WaveformStream(scope, format=format, frames=4, policy='block') as stream:
+        frames = []
+        for _ in range(10):
+            frame = stream.get(timeout=2)
+            frames.append((frame.sequence, len(frame.data), frame.data.dtype.itemsize, frame.to_volts().max()))
+    assert [sequence for sequence, *_ in frames] == list(range(10))
+    assert all(points == SCREEN_POINTS for _, points, _, _ in frames)
+    assert all(itemsize == (2 if format == 'WORD' else 1) for _, _, itemsize, _ in frames)
+    assert all(3.0 < volts < 3.5 for *_, volts in frames)  # CHANnel1 is a 3.3 V square wave
+    assert stream.errors == 0
+    scope.disconnect()
+
+
+def test_start_resets_read_window(server):
+    scope = connect(server)
+    scope.waveform.set_start(100)
+    scope.waveform.set_stop(200)
+    with WaveformStream(scope) as stream:
+        frame = stream.get(timeout=2)
+        assert len(frame.data) == SCREEN_POINTS
+    assert stream.errors == 0
+    scope.disconnect()
+
+
+def test_failed_reads_back_off_and_stop(server):
+    scope = connect(server, 0.1)
+    stream = WaveformStream(scope, max_errors=3, error_backoff=0.1)
+    stream.start()
+    server.latency = 0.3  # Every read times out from now on
+    start = time.perf_counter()
+    while stream.running and time.perf_counter() - start < 5:
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    stream.stop()
+    assert not stream.running
+    assert stream.errors == 3 and isinstance(stream.last_error, ConnectionError)
+    assert elapsed >= 3 * 0.1 + 0.1 + 0.2  # Three timeouts plus the doubled pauses between them
+    server.latency = 0
+    assert scope.query('*IDN?').startswith('RIGOL')
+    scope.disconnect()
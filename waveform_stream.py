@@ -0,0 +1,281 @@
+# Continuous screen-waveform streaming for Rigol oscilloscopes
+
+import threading
+import time
+from collections import deque
+import numpy as np
+from commands.waveform_commands import FORMAT_DTYPES
+
+MAX_ERROR_BACKOFF = 1.0  # Longest pause in seconds after repeated read errors
+
+class WaveformFrame:
+    """One streamed screen waveform
+
+    data is a view into the stream's ring buffer. It stays valid until the
+    consumer asks for the next frame or calls release(); copy it to keep it.
+    """
+
+    def __init__(self, stream, slot: int, sequence: int, timestamp: float, data):
+        self.stream = stream
+        self.slot = slot
+        self.sequence = sequence  # Frame number since start, gaps mean dropped frames
+        self.timestamp = timestamp  # time.time() when the frame was received
+        self.data = data
+
+    def to_volts(self, dtype=np.float64, out=None):
+        """Scale the frame to volts with the stream's preamble"""
+        return self.stream.preamble.to_volts(self.data, dtype=dtype, out=out)
+
+    def __repr__(self):
+        return f'WaveformFrame(sequence={self.sequence}, points={len(self.data)})'
+
+
+class WaveformStream:
+    """Background reader streaming screen waveforms into a ring of preallocated frames
+
+    A reader thread polls :WAVeform:DATA? in NORMal mode and receives each
+    frame straight into a free slot of the ring. Consumers take frames with
+    get(), by iterating over the stream, or through a callback run on its own
+    dispatcher thread. When every slot is in use the policy decides:
+
+        block        the reader waits for the consumer (backpressure)
+        drop_oldest  the oldest queued frame is overwritten
+        drop_newest  the new frame is read and discarded
+
+    After a failed read the reader pauses error_backoff seconds, doubling
+    with each further failure, and stops after max_errors failures in a row
+    (0 retries forever); last_error holds the cause.
+
+    The scope must not be used from other threads while the stream runs.
+    """
+
+    POLICIES = ['block', 'drop_oldest', 'drop_newest']
+    frame_class = WaveformFrame
+
+    def __init__(self, scope, source: str = 'CHANnel1', format: str = 'BYTE', frames: int = 16,
+                 policy: str = 'drop_oldest', callback=None, max_errors: int = 10,
+                 error_backoff: float = 0.01):
+        if format.upper() not in FORMAT_DTYPES:
+            raise ValueError(f'Invalid format. Must be one of {list(FORMAT_DTYPES)}')
+        if policy not in self.POLICIES:
+            raise ValueError(f'Invalid policy. Must be one of {self.POLICIES}')
+        if frames < 2:
+            raise ValueError('Stream needs at least 2 frames')
+        self.scope = scope
+        self.source = source
+        self.format = format
+        self.frames = frames
+        self.policy = policy
+        self.callback = callback
+        self.max_errors = max_errors
+        self.error_backoff = error_backoff
+        self.preamble = None
+        self.buffer = None  # (frames, points) array holding the ring
+        self.frames_read = 0
+        self.frames_delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self._consecutive_errors = 0
+        self._condition = threading.Condition()
+        self._free = deque()
+        self._ready = deque()
+        self._held = None
+        self._scratch = None
+        self._running = False
+        self._reader = None
+        self._dispatcher = None
+        self._started = None
+        self._rate_window = deque(maxlen=64)  # Receive times of the latest frames
+
+    def start(self):
+        """Configure the screen read, allocate the ring and start the reader thread"""
+        if self._running:
+            return self
+        waveform = self.scope.waveform
+        waveform.set_source(self.source)
+        waveform.set_mode('NORMal')
+        waveform.set_format(self.format)
+        self.preamble = waveform.get_parsed_preamble(refresh=True)
+        # A window left by an earlier RAW read would shorten every frame
+        waveform.set_start(1)
+        waveform.set_stop(self.preamble.points)
+        dtype = FORMAT_DTYPES[self.format.upper()]
+        self.buffer = np.empty((self.frames, self.preamble.points), dtype=dtype)
+        self._scratch = np.empty(self.preamble.points, dtype=dtype)
+        self._free = deque(range(self.frames))
+        self._ready.clear()
+        self._held = None
+        self.frames_read = self.frames_delivered = self.dropped = self.errors = 0
+        self._consecutive_errors = 0
+        self._rate_window.clear()
+        self._started = time.perf_counter()
+        self._running = True
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+        if self.callback is not None:
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+            self._dispatcher.start()
+        return self
+
+    def stop(self):
+        """Stop the reader (and dispatcher) threads; queued frames stay readable"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        for thread in (self._reader, self._dispatcher):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join()
+        self._reader = self._dispatcher = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def running(self):
+        return self._running
+
+    def get(self, timeout: float = None):
+        """Get the oldest queued frame, waiting up to timeout seconds
+
+        Returns:
+            WaveformFrame or None on timeout or when the stream has stopped
+        """
+        with self._condition:
+            self._release()
+            if not self._condition.wait_for(lambda: self._ready or not self._running, timeout):
+                return None
+            if not self._ready:
+                return None
+            slot, sequence, timestamp = self._ready.popleft()
+            self._held = slot
+            self.frames_delivered += 1
+            return self.frame_class(self, slot, sequence, timestamp, self.buffer[slot])
+
+    def get_latest(self, timeout: float = None):
+        """Get the newest frame, discarding older queued ones"""
+        with self._condition:
+            while len(self._ready) > 1:
+                self._free.append(self._ready.popleft()[0])
+                self.dropped += 1
+        return self.get(timeout)
+
+    def release(self):
+        """Hand the slot of the last frame back to the reader"""
+        with self._condition:
+            self._release()
+
+    def __iter__(self):
+        while True:
+            frame = self.get()
+            if frame is None:
+                return
+            yield frame
+
+    @property
+    def queued(self):
+        """Number of frames waiting for the consumer"""
+        return len(self._ready)
+
+    @property
+    def frames_per_second(self):
+        """Receive rate over the latest frames"""
+        window = self._rate_window
+        if len(window) < 2 or window[-1] == window[0]:
+            return 0.0
+        return (len(window) - 1) / (window[-1] - window[0])
+
+    def stats(self):
+        """Counters of the stream so far"""
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            'frames_read': self.frames_read,
+            'frames_delivered': self.frames_delivered,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'queued': self.queued,
+            'frames_per_second': self.frames_per_second,
+            'average_frames_per_second': self.frames_read / elapsed if elapsed else 0.0,
+        }
+
+    def _release(self):
+        if self._held is not None:
+            self._free.append(self._held)
+            self._held = None
+            self._condition.notify_all()
+
+    def _acquire_slot(self):
+        """Pick the slot for the next frame according to the policy, None for scratch"""
+        with self._condition:
+            if self.policy == 'block':
+                self._condition.wait_for(lambda: self._free or not self._running)
+            if self._free:
+                return self._free.popleft()
+            if not self._running:
+                return None
+            if self.policy == 'drop_oldest' and self._ready:
+                self.dropped += 1
+                return self._ready.popleft()[0]
+            return None
+
+    def _read_loop(self):
+        while self._running:
+            slot = self._acquire_slot()
+            if not self._running:
+                if slot is not None:
+                    with self._condition:
+                        self._free.append(slot)
+                break
+            target = self.buffer[slot] if slot is not None else self._scratch
+            try:
+                data = self.scope.query_binary(':WAVeform:DATA?', target)
+                received = memoryview(data).nbytes // target.itemsize
+                if received != len(target):
+                    raise ConnectionError(f'Incomplete frame: expected {len(target)} points, got {received}')
+            except Exception as e:
+                with self._condition:
+                    if slot is not None:
+                        self._free.append(slot)
+                if not self._handle_error(e):
+                    break
+                continue
+            self._consecutive_errors = 0
+            now = time.perf_counter()
+            with self._condition:
+                self._rate_window.append(now)
+                self.frames_read += 1
+                if slot is None:
+                    self.dropped += 1
+                else:
+                    self._ready.append((slot, self.frames_read - 1, time.time()))
+                    self._condition.notify_all()
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def _handle_error(self, error):
+        """Count a failed read and back off before the next one
+
+        Returns:
+            bool: False when the reader should give up
+        """
+        self.errors += 1
+        self.last_error = error
+        self._consecutive_errors += 1
+        if not self.scope.connected or (self.max_errors and self._consecutive_errors >= self.max_errors):
+            return False
+        delay = min(self.error_backoff * 2 ** (self._consecutive_errors - 1), MAX_ERROR_BACKOFF)
+        with self._condition:
+            self._condition.wait_for(lambda: not self._running, delay)
+        return True
+
+    def _dispatch_loop(self):
+        for frame in self:
+            try:
+                self.callback(frame)
+            except Exception as e:
+                print(f"Failed to process frame: {str(e)}")
+        self.release()